@@ -1,29 +1,25 @@
-from src.scraper import ScraperFactory
-from utils import load_urls, clean_text
-from src.database import ChromaDBHandler
+import logging
+import os
+from src.ingestion import IngestionEngine
+from src.metrics import metrics
+from utils import load_urls
 
 def process_urls():
     """Fetches data from URLs and stores it in ChromaDB."""
     # urls = load_urls()
     urls = ['https://www.uscis.gov/forms/all-forms', 'https://www.uscis.gov/sites/default/files/document/legal-docs/2013-1231_OLF_Exemption_PM_Effective.pdf']
-    chroma_db = ChromaDBHandler()
+    engine = IngestionEngine()
 
-    for url in urls:
-        file_type = "pdf" if url.endswith(".pdf") else "web"
-        scraper = ScraperFactory.get_scraper(file_type)
+    stats = engine.run(urls)
+    print(f"Ingestion finished: {stats['indexed']} URL(s) indexed, {stats['unchanged']} unchanged, "
+          f"{stats['removed']} kept removed, {stats['failed']} failed, {stats['skipped']} resumed from checkpoint, "
+          f"{stats['documents']} chunk(s) added")
 
-        try:
-            documents = scraper.scrape(url)
-
-            for doc in documents:
-                doc.page_content = clean_text(doc.page_content)
-                print("===============")
-                print(doc.page_content[:500])
-            
-            chroma_db.add_documents(documents)
-            print(f"Successfully added {len(documents)} document(s) from {url}")
-        except Exception as e:
-            print(f"Failed to process {url}: {str(e)}")
+    if metrics.enabled:
+        metrics.log_snapshot()
+        os.makedirs("logs", exist_ok=True)
+        metrics.write_prometheus(os.path.join("logs", "metrics.prom"))
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     process_urls()
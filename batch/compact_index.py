@@ -0,0 +1,181 @@
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database import ChromaDBHandler
+from src.http_client import HostRateLimiter, get_session
+from src.manifest import IngestionManifest
+from src.partitions import parse_partition, superseded_visa_bulletins
+
+# Fixed probe queries timed against every partition before and after compaction
+PROBE_QUERIES = [
+    "I-485 processing time", "H-1B cap", "how do I apply for naturalization", "N-400 filing fee",
+    "visa bulletin priority date", "employment authorization renewal", "advance parole travel document",
+]
+
+
+class IndexCompactor:
+    """
+    Removes (or archives) documents whose source URLs are gone or superseded, then
+    compacts the lexical index and reports per-partition size and query latency.
+
+    A source is stale when its URL now answers 404/410, permanently redirects to a
+    different URL (the new URL is picked up by the trackers and ingested on its own),
+    or is a visa bulletin older than the `keep_bulletins` most recent months.
+    """
+
+    def __init__(self, chroma_db: ChromaDBHandler = None, manifest: IngestionManifest = None, archive: bool = False,
+                 keep_bulletins: int = 2, check_urls: bool = True, max_workers: int = 8):
+        """
+        :param chroma_db: Vector store handler, defaults to the ChromaDBHandler singleton
+        :param manifest: Ingestion manifest; removed URLs are tombstoned in it so ingestion does not restore them
+        :param archive: Move stale documents to archive collections instead of deleting them
+        :param keep_bulletins: Number of most recent visa bulletin months kept searchable
+        :param check_urls: Whether to check every source URL over HTTP
+        :param max_workers: Number of concurrent URL checks
+        """
+        self.chroma_db = chroma_db or ChromaDBHandler()
+        self.manifest = manifest or IngestionManifest()
+        self.archive = archive
+        self.keep_bulletins = keep_bulletins
+        self.check_urls = check_urls
+        self.max_workers = max_workers
+        self.rate_limiter = HostRateLimiter()
+
+    def check_url(self, url: str) -> str:
+        """Returns "gone", "replaced" or None if the URL is still served."""
+        try:
+            self.rate_limiter.wait(url)
+            session = get_session()
+            response = session.head(url, allow_redirects=False, timeout=30)
+            if response.status_code in (403, 405, 501):
+                # Some servers refuse HEAD; fall back to a GET without reading the body
+                response = session.get(url, allow_redirects=False, timeout=30, stream=True)
+                response.close()
+        except Exception as e:
+            # A transient failure is not evidence that the page is gone
+            logging.warning(f"Could not check {url}: {e}")
+            return None
+
+        if response.status_code in (404, 410):
+            return "gone"
+        if response.status_code in (301, 308):
+            location = urljoin(url, response.headers.get("Location", ""))
+            if location.rstrip("/") != url.rstrip("/"):
+                return "replaced"
+        return None
+
+    def scan(self, partition: str) -> tuple[dict, int]:
+        """Returns the partition's {source: [ids]} and the total size of its texts in bytes."""
+        sources = {}
+        text_bytes = 0
+        for page in self.chroma_db.iter_collection(partition, include=["documents", "metadatas"]):
+            for doc_id, text, metadata in zip(page["ids"], page["documents"], page["metadatas"]):
+                sources.setdefault((metadata or {}).get("source", ""), []).append(doc_id)
+                text_bytes += len(text.encode("utf-8"))
+        return sources, text_bytes
+
+    def stale_sources(self, sources: list[str]) -> dict:
+        """Maps every stale source URL to the reason it is stale."""
+        stale = {source: "superseded" for source in superseded_visa_bulletins(sources, self.keep_bulletins)}
+        if self.check_urls:
+            candidates = [source for source in sources if source.startswith("http") and source not in stale]
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for source, reason in zip(candidates, executor.map(self.check_url, candidates)):
+                    if reason:
+                        stale[source] = reason
+        return stale
+
+    def probe_latency(self, partition: str, repeat: int = 3) -> float:
+        """Median milliseconds of the probe queries against one partition."""
+        domain_key, content_type = parse_partition(partition)
+        where = {"$and": [{"domain": domain_key}, {"content_type": content_type}]}
+        timings = []
+        for _ in range(repeat):
+            for query in PROBE_QUERIES:
+                started = time.perf_counter()
+                self.chroma_db.search(query, k=5, where=where)
+                timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+
+    def run(self) -> dict:
+        """Compacts every partition and returns the per-partition report."""
+        migrated = self.chroma_db.migrate_legacy_collection()
+        if migrated:
+            logging.info(f"Moved {migrated} document(s) from the legacy collection into partitions")
+
+        # Warm the embedding cache so the latency probes time the vector lookups only
+        self.chroma_db.embeddings.embed_queries(PROBE_QUERIES)
+
+        report = {"migrated": migrated, "partitions": {}}
+        for partition in self.chroma_db.partitions():
+            sources, text_bytes = self.scan(partition)
+            before = {"documents": sum(map(len, sources.values())), "text_bytes": text_bytes,
+                      "p50_ms": self.probe_latency(partition)}
+
+            stale = self.stale_sources(list(sources))
+            ids = [doc_id for source in stale for doc_id in sources[source]]
+            if ids:
+                if self.archive:
+                    self.chroma_db.archive_documents(ids)
+                else:
+                    self.chroma_db.delete_documents(ids)
+                self.manifest.forget(stale)
+                for source, reason in sorted(stale.items()):
+                    logging.info(f"{'Archived' if self.archive else 'Removed'} {len(sources[source])} chunk(s) "
+                                 f"of {source} ({reason}) from {partition}")
+
+            _, text_bytes = self.scan(partition)
+            after = {"documents": before["documents"] - len(ids), "text_bytes": text_bytes,
+                     "p50_ms": self.probe_latency(partition)}
+            report["partitions"][partition] = {
+                "before": before, "after": after, "removed_sources": len(stale), "removed_documents": len(ids),
+            }
+
+        index_path = os.path.join(self.chroma_db.path, "lexical_index.db")
+        size_before = os.path.getsize(index_path) if os.path.exists(index_path) else 0
+        self.chroma_db.lexical_index.compact()
+        report["lexical_index_bytes"] = {"before": size_before, "after": os.path.getsize(index_path)}
+        return report
+
+
+def print_report(report: dict):
+    """Prints one line per partition with its size and latency change."""
+    for partition, entry in report["partitions"].items():
+        before, after = entry["before"], entry["after"]
+        print(f"{partition}: {before['documents']} -> {after['documents']} documents "
+              f"({entry['removed_sources']} source(s) removed), "
+              f"{before['text_bytes'] / 1e6:.1f} -> {after['text_bytes'] / 1e6:.1f} MB text, "
+              f"p50 {before['p50_ms']:.1f} -> {after['p50_ms']:.1f} ms")
+    sizes = report["lexical_index_bytes"]
+    print(f"lexical index: {sizes['before'] / 1e6:.1f} -> {sizes['after'] / 1e6:.1f} MB")
+
+
+def main():
+    """Compacts the vector store and writes the report to logs/compaction.json."""
+    parser = argparse.ArgumentParser(description="Remove or archive stale documents from the vector store.")
+    parser.add_argument("--archive", action="store_true", help="Archive stale documents instead of deleting them")
+    parser.add_argument("--keep-bulletins", type=int, default=2, help="Most recent visa bulletin months to keep")
+    parser.add_argument("--no-url-check", action="store_true", help="Only drop superseded visa bulletins")
+    args = parser.parse_args()
+
+    os.makedirs("logs", exist_ok=True)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    compactor = IndexCompactor(archive=args.archive, keep_bulletins=args.keep_bulletins,
+                               check_urls=not args.no_url_check)
+    report = compactor.run()
+    print_report(report)
+    with open(os.path.join("logs", "compaction.json"), "w") as file:
+        json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
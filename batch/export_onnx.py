@@ -0,0 +1,61 @@
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database import EMBEDDING_MODEL_NAME
+
+
+def export_onnx(output_dir: str, model_name: str = EMBEDDING_MODEL_NAME, quantize: bool = True):
+    """
+    Exports the embedding model's transformer to ONNX for the onnx embedding backend,
+    writing model.onnx, the tokenizer files and, with quantize, model_quantized.onnx
+    with dynamically int8-quantized weights.
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+    tokenizer.save_pretrained(output_dir)
+
+    sample = tokenizer(["An example sentence to trace the model with."], return_tensors="pt")
+    input_names = ["input_ids", "attention_mask", "token_type_ids"]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+    model_path = os.path.join(output_dir, "model.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            model_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+        )
+    print(f"Exported {model_name} to {model_path}")
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantized_path = os.path.join(output_dir, "model_quantized.onnx")
+        quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QInt8)
+        print(f"Wrote int8-quantized model to {quantized_path}")
+
+
+def main():
+    """Exports the embedding model; point IMMIGO_ONNX_MODEL_PATH at the output directory to use it."""
+    root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Export the embedding model to (quantized) ONNX.")
+    parser.add_argument("--output", default=os.path.join(root_dir, "resources/onnx/all-MiniLM-L6-v2"))
+    parser.add_argument("--model", default=EMBEDDING_MODEL_NAME)
+    parser.add_argument("--no-quantize", action="store_true")
+    args = parser.parse_args()
+    export_onnx(args.output, args.model, quantize=not args.no_quantize)
+
+
+if __name__ == "__main__":
+    main()
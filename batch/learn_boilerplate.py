@@ -0,0 +1,51 @@
+import os
+import random
+import sys
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.boilerplate import BoilerplateModel, normalize_domain
+from src.http_client import get_session
+from src.scraper import ScraperFactory
+
+
+def learn_boilerplate(url_files: list[str], sample_size: int = 40, seed: int = 0):
+    """Samples web pages per domain from the URL files, learns their boilerplate and saves the models."""
+    urls_by_domain = defaultdict(list)
+    for file_path in url_files:
+        try:
+            with open(file_path, "r") as file:
+                for line in file:
+                    url = line.strip()
+                    if url and ScraperFactory.get_file_type(url) == "web":
+                        urls_by_domain[normalize_domain(url)].append(url)
+        except FileNotFoundError:
+            print(f"Error: File '{file_path}' not found.")
+
+    rng = random.Random(seed)
+    for domain, urls in urls_by_domain.items():
+        sample = rng.sample(urls, min(sample_size, len(urls)))
+        scraper = ScraperFactory.get_scraper("web", session=get_session())
+        pages = [doc.page_content for url in sample for doc in scraper.scrape(url)]
+        if len(pages) < 3:
+            print(f"Skipping {domain}: only {len(pages)} page(s) could be fetched")
+            continue
+
+        model = BoilerplateModel.learn(domain, pages)
+        path = model.save()
+        print(f"Learned {len(model.phrases)} boilerplate phrase(s) for {domain} from {len(pages)} pages: {path}")
+
+
+def main():
+    """Main function to learn boilerplate models for the tracked domains."""
+    root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    url_files = [
+        os.path.join(root_dir, "resources/uscis_filtered.txt"),
+        os.path.join(root_dir, "resources/dos.txt"),
+    ]
+    learn_boilerplate(url_files)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import sqlite3
+import threading
+import time
+from typing import Iterable, Set
+
+
+class URLStore:
+    """
+    SQLite index of every URL seen by the URL trackers.
+
+    Each URL records the tracker that found it and when it was first and last seen.
+    HTTP validators of the listing pages are kept alongside so that trackers can make
+    conditional requests.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                tracker TEXT NOT NULL,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS urls_tracker_first_seen ON urls (tracker, first_seen);
+            CREATE TABLE IF NOT EXISTS pages (
+                page_url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL
+            );
+            """
+        )
+        self._conn.commit()
+
+    def count(self, tracker: str = None) -> int:
+        """Returns the number of stored URLs, optionally for one tracker."""
+        with self._lock:
+            if tracker is None:
+                return self._conn.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+            return self._conn.execute("SELECT COUNT(*) FROM urls WHERE tracker = ?", (tracker,)).fetchone()[0]
+
+    def import_urls(self, urls: Iterable[str], tracker: str) -> int:
+        """Seeds the store with already-known URLs; returns how many were new."""
+        return len(self.add_urls(urls, tracker))
+
+    def add_urls(self, urls: Iterable[str], tracker: str) -> Set[str]:
+        """Records the URLs as seen now and returns the ones that were not stored before."""
+        urls = set(urls)
+        now = time.time()
+        with self._lock:
+            known = self._known(urls)
+            new_urls = urls - known
+            self._conn.executemany(
+                "INSERT INTO urls (url, tracker, first_seen, last_seen) VALUES (?, ?, ?, ?)",
+                [(url, tracker, now, now) for url in new_urls],
+            )
+            self._conn.executemany("UPDATE urls SET last_seen = ? WHERE url = ?", [(now, url) for url in known])
+            self._conn.commit()
+        return new_urls
+
+    def unknown(self, urls: Iterable[str]) -> Set[str]:
+        """Returns the URLs that are not stored yet."""
+        urls = set(urls)
+        with self._lock:
+            return urls - self._known(urls)
+
+    def get_validators(self, page_url: str) -> dict:
+        """Returns the stored ETag / Last-Modified of a listing page."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified FROM pages WHERE page_url = ?", (page_url,)
+            ).fetchone()
+        return {"etag": row[0], "last_modified": row[1]} if row else {}
+
+    def set_validators(self, page_url: str, etag: str, last_modified: str):
+        """Stores the validators of a listing page after a successful fetch."""
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO pages (page_url, etag, last_modified, fetched_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT(page_url) DO UPDATE SET
+                    etag = excluded.etag, last_modified = excluded.last_modified, fetched_at = excluded.fetched_at
+                """,
+                (page_url, etag, last_modified, time.time()),
+            )
+            self._conn.commit()
+
+    def _known(self, urls: Set[str]) -> Set[str]:
+        known = set()
+        urls = list(urls)
+        for start in range(0, len(urls), 500):
+            batch = urls[start:start + 500]
+            rows = self._conn.execute(
+                f"SELECT url FROM urls WHERE url IN ({','.join('?' * len(batch))})", batch
+            ).fetchall()
+            known.update(row[0] for row in rows)
+        return known
+
+    def close(self):
+        """Closes the underlying database connection."""
+        self._conn.close()
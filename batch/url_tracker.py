@@ -1,12 +1,21 @@
 import os
+import sys
+import time
 import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
+from concurrent.futures import ThreadPoolExecutor
 import logging
-from typing import List, Set
+from typing import List, Set, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch.url_store import URLStore
+from src.html_extract import HTMLPage, PrefixMatcher
+from src.http_client import HostRateLimiter, get_session
 
 class URLTracker:
-    def __init__(self, base_url: str, page_urls: List[str], file_path: str, new_file_path: str, valid_url_prefixes: Set[str] = None):
+    def __init__(self, base_url: str, page_urls: List[str], file_path: str, new_file_path: str, valid_url_prefixes: Set[str] = None,
+                 name: str = None, store_path: str = None, max_workers: int = 4, follow_pagination: bool = False,
+                 time_budget: float = 60.0, max_pages: int = 50):
         """
         Initializes the URLTracker class with necessary parameters.
         
@@ -14,13 +23,29 @@ class URLTracker:
         :param page_urls: List of URLs to track for new links
         :param file_path: Path to the file storing previously found URLs
         :param new_file_path: Path to the file for appending new URLs
+        :param name: Tracker name recorded with every URL in the store
+        :param store_path: Path to the SQLite URL index, defaults to url_index.db next to file_path
+        :param max_workers: Number of listing pages fetched concurrently
+        :param follow_pagination: Whether to follow "next" links on listing pages
+        :param time_budget: Seconds a tracking run may spend following pagination
+        :param max_pages: Maximum number of pages followed per listing
         """
         self.base_url = base_url
         self.page_urls = page_urls
         self.file_path = file_path
         self.new_file_path = new_file_path
         self.valid_url_prefixes = valid_url_prefixes or self.get_default_valid_url_prefixes()
+        self.link_matcher = PrefixMatcher([base_url + prefix for prefix in self.valid_url_prefixes])
+        self.name = name or os.path.splitext(os.path.basename(file_path))[0]
+        self.max_workers = max_workers
+        self.follow_pagination = follow_pagination
+        self.time_budget = time_budget
+        self.max_pages = max_pages
+        self.rate_limiter = HostRateLimiter()
+        self.pending_validators = {}
         self.setup_logging()
+        self.store = URLStore(store_path or os.path.join(os.path.dirname(file_path), "url_index.db"))
+        self.seed_store()
 
     def setup_logging(self):
         """Sets up logging configuration."""
@@ -45,62 +70,96 @@ class URLTracker:
             "/newsroom/alerts/"
         }
 
+    def seed_store(self):
+        """Imports the previously tracked URLs from file_path the first time the store is used."""
+        if self.store.count(self.name) == 0:
+            imported = self.store.import_urls(self.read_old_urls(), self.name)
+            if imported:
+                logging.info(f"Imported {imported} URLs from {self.file_path} into the URL index.")
+
     def get_urls_from_page(self, url: str) -> Set[str]:
         """Fetches and extracts URLs from the provided webpage."""
+        return self.fetch_listing(url)[0]
+
+    def fetch_listing(self, url: str) -> Tuple[Set[str], str]:
+        """
+        Conditionally fetches a listing page and extracts its valid URLs and its "next" page link.
+
+        Returns an empty set and no next link if the page is unchanged since the last fetch.
+        """
         try:
+            headers = {}
+            validators = self.store.get_validators(url)
+            if validators.get("etag"):
+                headers["If-None-Match"] = validators["etag"]
+            if validators.get("last_modified"):
+                headers["If-Modified-Since"] = validators["last_modified"]
+
             # Send an HTTP request to the URL
-            response = requests.get(url)
+            self.rate_limiter.wait(url)
+            response = get_session().get(url, headers=headers)
+            if response.status_code == 304:
+                logging.info(f"Page unchanged since last run: {url}")
+                return set(), None
             response.raise_for_status()  # Raise an error if the HTTP request failed
+            # Saved only once the URLs are stored, so a failed run does not turn into a 304 next time
+            self.pending_validators[url] = (response.headers.get("ETag"), response.headers.get("Last-Modified"))
 
-            # Parse the page content using BeautifulSoup
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            # Find all anchor tags and extract the href attribute
-            links = soup.find_all('a', href=True)
-
-            # Filter and collect only valid URLs under the 'visas-news' or 'visa-bulletin' paths
-            urls = set()  # Use a set to avoid duplicates
-            for link in links:
-                href = link['href']
-                # Resolve the relative URL to a full URL
-                full_url = urljoin(self.base_url, href)
-                if any(full_url.startswith(self.base_url + prefix) for prefix in self.valid_url_prefixes):
-                    urls.add(full_url)
+            # Keep only links under the tracked prefixes, resolved against the base URL;
+            # the "next" link (e.g. ?page=1 on the newsroom listings) resolves against the page
+            page = HTMLPage(response.text, url)
+            urls = page.links(base_url=self.base_url, matcher=self.link_matcher)
+            next_url = page.next_url()
 
-            return urls
+            return urls, next_url
 
         except requests.exceptions.RequestException as e:
             logging.error(f"Error fetching the page {url}: {e}")
-            return set()
+            return set(), None
+
+    def crawl_listing(self, page_url: str, deadline: float) -> Set[str]:
+        """Collects URLs from a listing page, following pagination while it keeps yielding unseen URLs."""
+        logging.info(f"Processing URL: {page_url}")
+        page_urls, next_url = self.fetch_listing(page_url)
+        urls = set(page_urls)
+        pages = 1
+        while self.follow_pagination and next_url and pages < self.max_pages and time.monotonic() < deadline:
+            # Listings are newest first, so once a page has nothing new the rest is already tracked.
+            # Only the last page is checked: new URLs are not in the store until the crawl ends.
+            if not self.store.unknown(page_urls):
+                break
+            page_urls, next_url = self.fetch_listing(next_url)
+            urls |= page_urls
+            pages += 1
+        return urls
 
     def track_new_urls(self):
         """Tracks new URLs and stores them to compare against previous ones."""
-        # To accumulate all new URLs
-        all_new_urls = set()
+        deadline = time.monotonic() + self.time_budget
 
-        for page_url in self.page_urls:
-            logging.info(f"Processing URL: {page_url}")
-            # Get the current URLs from the page
-            current_urls = self.get_urls_from_page(page_url)
+        # Fetch the listing pages concurrently
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            current_urls = executor.map(lambda page_url: self.crawl_listing(page_url, deadline), self.page_urls)
+            current_urls = set().union(*current_urls)
 
-            # Try to read previously stored URLs
-            old_urls = self.read_old_urls()
+        # Find new URLs that were not previously tracked
+        all_new_urls = self.store.unknown(current_urls)
 
-            # Find new URLs that were not previously tracked
-            new_urls = current_urls - old_urls
-            all_new_urls.update(new_urls)
-
-            if new_urls:
-                logging.info(f"New URLs found on {page_url}:")
-                for url in new_urls:
-                    logging.info(url)
-
-        # If there are new URLs to store, update the file
+        # Write the new URLs out before the store marks them known, so a failed write
+        # leaves them new (and the listing validators unchanged) for the next run
         if all_new_urls:
+            logging.info(f"New URLs found by {self.name} tracker:")
+            for url in sorted(all_new_urls):
+                logging.info(url)
             self.store_new_urls(all_new_urls)
         else:
             logging.info("No new URLs found.")
 
+        self.store.add_urls(current_urls, self.name)
+        for page_url, (etag, last_modified) in self.pending_validators.items():
+            self.store.set_validators(page_url, etag, last_modified)
+        self.pending_validators.clear()
+
     def read_old_urls(self) -> Set[str]:
         """Reads the previously stored URLs from the file."""
         try:
@@ -111,13 +170,14 @@ class URLTracker:
         return old_urls
 
     def store_new_urls(self, new_urls: Set[str]):
-        """Stores new URLs to the file."""
+        """Stores new URLs to the file, re-raising the error if the write fails."""
         try:
             with open(self.new_file_path, 'a') as file:  # Append to the file
-                file.write("\n".join(new_urls) + "\n")
+                file.write("\n".join(sorted(new_urls)) + "\n")
             logging.info(f"Stored new URLs in {self.new_file_path}")
-        except Exception as e:
+        except OSError as e:
             logging.error(f"Error writing new URLs to file: {e}")
+            raise
 
 
 class URLTrackerFactory:
@@ -137,7 +197,7 @@ class URLTrackerFactory:
         ]
         self.file_path = os.path.join(self.root_dir, "resources/dos.txt")
         self.new_file_path = os.path.join(self.root_dir, "resources/dos_untracked.txt")
-        return URLTracker(self.base_url, self.page_urls, self.file_path, self.new_file_path)
+        return URLTracker(self.base_url, self.page_urls, self.file_path, self.new_file_path, name="dos")
 
     def create_uscis_tracker(self) -> URLTracker:
         """Creates a URLTracker for USCIS with its specific configuration."""
@@ -150,7 +210,8 @@ class URLTrackerFactory:
         ]
         self.file_path = os.path.join(self.root_dir, "resources/uscis.txt")
         self.new_file_path = os.path.join(self.root_dir, "resources/uscis_untracked.txt")
-        return URLTracker(self.base_url, self.page_urls, self.file_path, self.new_file_path)
+        return URLTracker(self.base_url, self.page_urls, self.file_path, self.new_file_path, name="uscis",
+                          follow_pagination=True)
 
 
 # Main function to start the tracking process
@@ -0,0 +1,54 @@
+"""Micro-benchmark of utils.clean_text against the previous multi-pass implementation."""
+import os
+import random
+import re
+import sys
+import timeit
+from html import unescape
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.boilerplate import USCIS_HEADER, USCIS_FOOTER
+from utils import clean_text
+
+
+def legacy_clean_text(text: str) -> str:
+    """The clean_text implementation this module replaced: two regex passes plus str.replace."""
+    text = unescape(text)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\n+', ' ', text)
+    text = text.lower()
+    text = text.strip()
+    text = text.replace(USCIS_HEADER, "")
+    text = text.replace(USCIS_FOOTER, "")
+    return text
+
+
+def synthetic_page(words: int, seed: int) -> str:
+    """Builds a USCIS-style page: navigation, body text with entities and newlines, footer."""
+    rng = random.Random(seed)
+    vocabulary = ["petition", "green", "card", "form", "i-485", "applicant", "&amp;", "uscis", "fee", "status"]
+    body = []
+    for i in range(words):
+        body.append(rng.choice(vocabulary))
+        if i % 12 == 11:
+            body.append("\n\n")
+    return "USCIS\n  " + USCIS_HEADER.upper() + "\n" + " ".join(body) + "\n" + USCIS_FOOTER + "\n"
+
+
+def main():
+    pages = [synthetic_page(words, seed) for seed, words in enumerate([200, 1_000, 5_000] * 10)]
+    for page in pages:
+        assert " ".join(legacy_clean_text(page).split()) == clean_text(page)
+
+    number = 20
+    legacy = min(timeit.repeat(lambda: [legacy_clean_text(page) for page in pages], number=number, repeat=5))
+    current = min(timeit.repeat(lambda: [clean_text(page) for page in pages], number=number, repeat=5))
+    per_page = number * len(pages)
+    print(f"legacy clean_text:  {legacy / per_page * 1e6:8.1f} us/page")
+    print(f"current clean_text: {current / per_page * 1e6:8.1f} us/page")
+    print(f"speedup:            {legacy / current:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Embedding backend benchmark: documents per second and recall@5 on a fixed synthetic corpus.
+
+recall@5 is measured against the exact top 5 of the first backend (single-process
+sentence-transformers in float32), so it shows how much ranking quality a faster
+backend such as int8 ONNX gives up. ONNX backends are included when --onnx-path points
+at a directory written by batch/export_onnx.py.
+
+    python benchmarks/bench_embeddings.py --docs 2000 --onnx-path resources/onnx/all-MiniLM-L6-v2
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.fixtures import synthetic_text
+from benchmarks.run import QUERIES
+from src.embeddings import create_embeddings
+
+
+def corpus(size: int, seed: int = 0) -> list[str]:
+    """Chunks of 20 to 250 words, mimicking the spread of chunk lengths after splitting pages."""
+    rng = random.Random(seed)
+    return [synthetic_text(i, rng.randint(20, 250)) for i in range(size)]
+
+
+def backends(args) -> dict:
+    """Backend name to create_embeddings options."""
+    configs = {
+        "sentence-transformers": {"backend": "sentence-transformers", "batch_size": 32},
+        "sentence-transformers-b64": {"backend": "sentence-transformers", "batch_size": 64},
+        f"sentence-transformers-{args.processes}proc": {
+            "backend": "sentence-transformers", "batch_size": 64, "processes": args.processes, "pool_min_texts": 0,
+        },
+    }
+    if args.onnx_path:
+        configs["onnx"] = {"backend": "onnx", "model_path": args.onnx_path, "batch_size": 64}
+        configs["onnx-int8"] = {"backend": "onnx", "model_path": args.onnx_path, "batch_size": 64, "quantized": True}
+    return configs
+
+
+def top_k(document_vectors: np.ndarray, query_vectors: np.ndarray, k: int = 5) -> list[set]:
+    """Exact cosine top-k document indices per query."""
+    documents = document_vectors / np.linalg.norm(document_vectors, axis=1, keepdims=True)
+    queries = query_vectors / np.linalg.norm(query_vectors, axis=1, keepdims=True)
+    scores = queries @ documents.T
+    return [set(row) for row in np.argsort(-scores, axis=1)[:, :k]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare embedding backends on throughput and recall@5.")
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    parser.add_argument("--onnx-path", help="Directory written by batch/export_onnx.py")
+    parser.add_argument("--output", help="Write the results JSON to this path")
+    args = parser.parse_args()
+
+    texts = corpus(args.docs)
+    queries = QUERIES + [synthetic_text(10_000 + i, 8) for i in range(40)]
+
+    results = {}
+    reference = None
+    for name, options in backends(args).items():
+        embeddings = create_embeddings(**options)
+        embeddings.embed_documents(texts[:64])  # load and warm up before timing
+
+        started = time.perf_counter()
+        document_vectors = np.array(embeddings.embed_documents(texts), dtype=np.float32)
+        seconds = time.perf_counter() - started
+        query_vectors = np.array([embeddings.embed_query(query) for query in queries], dtype=np.float32)
+        if hasattr(embeddings, "close"):
+            embeddings.close()
+
+        ranked = top_k(document_vectors, query_vectors)
+        reference = reference or ranked
+        recall = sum(len(found & expected) for found, expected in zip(ranked, reference)) / (5 * len(queries))
+        results[name] = {"docs_per_second": len(texts) / seconds, "seconds": seconds, "recall_at_5": recall}
+        print(f"{name}: {results[name]['docs_per_second']:.1f} docs/s, recall@5 {recall:.3f}")
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
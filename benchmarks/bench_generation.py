@@ -0,0 +1,88 @@
+"""
+Generation benchmark against the local fake chat endpoint (see fixtures.FakeChatServer).
+
+Sends concurrent questions with large retrieved contexts through ChatModel and reports
+time to first token, tokens per second, retries after rate limiting, and how much of
+the retrieved context survived packing into the token budget. No network access or
+Groq key is needed.
+
+    python benchmarks/bench_generation.py --questions 32 --concurrency 4 --rate-limit-every 7
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from langchain.schema import Document
+from benchmarks.fixtures import FakeChatServer, synthetic_text
+from benchmarks.run import QUERIES, percentile
+from src.chat_model import ChatModel
+from src.context_packer import approximate_tokens
+
+
+def retrieved_documents(seed: int, count: int = 8, words: int = 1500) -> list[Document]:
+    """Full-page-sized chunks from a few sources, including a duplicate, as retrieval would return them."""
+    documents = [
+        Document(page_content=synthetic_text(seed * 100 + i, words),
+                 metadata={"source": f"https://www.uscis.gov/policy/{seed}-{i % 3}"})
+        for i in range(count)
+    ]
+    return documents + documents[:1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure streaming generation against a fake chat endpoint.")
+    parser.add_argument("--questions", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--context-budget", type=int, default=6000)
+    parser.add_argument("--answer-tokens", type=int, default=200)
+    parser.add_argument("--rate-limit-every", type=int, default=7, help="Refuse every n-th request with a 429")
+    parser.add_argument("--output", help="Write the results JSON to this path")
+    args = parser.parse_args()
+
+    with FakeChatServer(answer_tokens=args.answer_tokens, rate_limit_every=args.rate_limit_every) as server:
+        chat_model = ChatModel(api_key="fake", base_url=server.base_url, context_budget=args.context_budget,
+                               max_concurrency=args.concurrency, backoff_base=0.05)
+
+        def ask(i: int) -> dict:
+            documents = retrieved_documents(i)
+            stats = {"retrieved_tokens": sum(approximate_tokens(doc.page_content) for doc in documents)}
+            for _ in chat_model.stream(QUERIES[i % len(QUERIES)], documents, stats=stats):
+                pass
+            return stats
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.questions) as executor:
+            runs = list(executor.map(ask, range(args.questions)))
+        elapsed = time.perf_counter() - started
+
+        ttft = [run["ttft_seconds"] for run in runs]
+        rates = [run["tokens_per_second"] for run in runs]
+        packed = sum(approximate_tokens(doc.page_content) for doc in chat_model.packer.pack(retrieved_documents(0)))
+        results = {
+            "questions": args.questions,
+            "concurrency": args.concurrency,
+            "seconds": elapsed,
+            "ttft_p50_s": percentile(ttft, 50),
+            "ttft_p95_s": percentile(ttft, 95),
+            "tokens_per_second_p50": percentile(rates, 50),
+            "aggregate_tokens_per_second": chat_model.stats["output_tokens"] / elapsed,
+            "retries": chat_model.stats["retries"],
+            "rate_limited_by_server": server.rate_limited,
+            "retrieved_context_tokens": runs[0]["retrieved_tokens"],
+            "packed_context_tokens": packed,
+        }
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
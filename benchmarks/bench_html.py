@@ -0,0 +1,133 @@
+"""
+HTML extraction benchmark: pages per second and allocations of the lxml-based
+src.html_extract against the BeautifulSoup html.parser path it replaced, for both
+the WebScraper (text and metadata) and URLTracker (filtered links) workloads.
+
+Allocations are the peak Python heap while one page is extracted and the number of
+blocks still allocated afterwards, as tracemalloc sees them; libxml2's own C allocations
+are not traced. The BeautifulSoup path needs bs4, which is no longer a dependency.
+
+    python benchmarks/bench_html.py --pages 200
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from urllib.parse import urljoin
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from batch.url_tracker import URLTracker
+from benchmarks.fixtures import html_page, listing_page, synthetic_text
+from src.html_extract import HTMLPage, PrefixMatcher
+
+BASE_URL = "https://www.uscis.gov"
+
+
+def legacy_scrape(markup: str, url: str) -> tuple[str, dict]:
+    """The WebScraper extraction this module replaced: all page text plus WebBaseLoader metadata."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(markup, "html.parser")
+    metadata = {"source": url}
+    if title := soup.find("title"):
+        metadata["title"] = title.get_text()
+    if description := soup.find("meta", attrs={"name": "description"}):
+        metadata["description"] = description.get("content", "No description found.")
+    if html := soup.find("html"):
+        metadata["language"] = html.get("lang", "No language found.")
+    return soup.get_text(), metadata
+
+
+def legacy_links(markup: str, url: str, prefixes: set[str]) -> tuple[set[str], str]:
+    """The URLTracker link extraction this module replaced."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(markup, "html.parser")
+    urls = set()
+    for link in soup.find_all("a", href=True):
+        full_url = urljoin(BASE_URL, link["href"])
+        if any(full_url.startswith(BASE_URL + prefix) for prefix in prefixes):
+            urls.add(full_url)
+    next_link = soup.find(["a", "link"], rel="next", href=True)
+    return urls, urljoin(url, next_link["href"]) if next_link else None
+
+
+def scrape(markup: str, url: str) -> tuple[str, dict]:
+    page = HTMLPage(markup, url)
+    return page.main_text(), page.metadata()
+
+
+def links(markup: str, url: str, matcher: PrefixMatcher) -> tuple[set[str], str]:
+    page = HTMLPage(markup, url)
+    return page.links(base_url=BASE_URL, matcher=matcher), page.next_url()
+
+
+def crowded_listing(page: int, anchors: int = 400) -> str:
+    """A listing page whose navigation and sidebar carry many anchors outside the tracked prefixes."""
+    menu = "".join(f"<li><a href=\"/topic-{i}/{synthetic_text(i, 2).lower().strip('.')}\">Topic {i}</a></li>"
+                   for i in range(anchors))
+    return listing_page("crowded", page, 10_000).replace("<main>", f"<aside><ul>{menu}</ul></aside><main>", 1)
+
+
+def measure(extract, pages: list[tuple[str, str]]) -> dict:
+    """Pages per second over all pages, then the tracemalloc peak and retained blocks of one page."""
+    for markup, url in pages[:5]:
+        extract(markup, url)  # warm up imports and caches before timing
+
+    started = time.perf_counter()
+    for markup, url in pages:
+        extract(markup, url)
+    seconds = time.perf_counter() - started
+
+    markup, url = pages[0]
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = extract(markup, url)
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+    del result
+    return {"pages_per_second": len(pages) / seconds, "retained_blocks": blocks, "peak_kib": peak / 1024}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare lxml and BeautifulSoup HTML extraction.")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--output", help="Write the results JSON to this path")
+    args = parser.parse_args()
+
+    articles = [(html_page(i, words=1200), f"{BASE_URL}/policy/page-{i}") for i in range(args.pages)]
+    listings = [(crowded_listing(i), f"{BASE_URL}/newsroom/news-releases?page={i}") for i in range(args.pages)]
+    prefixes = URLTracker.get_default_valid_url_prefixes(None)
+    matcher = PrefixMatcher([BASE_URL + prefix for prefix in prefixes])
+
+    for markup, url in listings[:3]:
+        assert links(markup, url, matcher) == legacy_links(markup, url, prefixes)
+
+    workloads = {
+        "scrape/beautifulsoup": (legacy_scrape, articles),
+        "scrape/lxml": (scrape, articles),
+        "listing/beautifulsoup": (lambda markup, url: legacy_links(markup, url, prefixes), listings),
+        "listing/lxml": (lambda markup, url: links(markup, url, matcher), listings),
+    }
+    results = {}
+    for name, (extract, pages) in workloads.items():
+        results[name] = measure(extract, pages)
+        print(f"{name}: {results[name]['pages_per_second']:.1f} pages/s, "
+              f"{results[name]['retained_blocks']} retained blocks, peak {results[name]['peak_kib']:.0f} KiB")
+    for workload in ("scrape", "listing"):
+        speedup = results[f"{workload}/lxml"]["pages_per_second"] / results[f"{workload}/beautifulsoup"]["pages_per_second"]
+        print(f"{workload} speedup: {speedup:.1f}x")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
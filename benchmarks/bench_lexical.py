@@ -0,0 +1,82 @@
+"""
+Lexical index benchmark: BM25 query latency on a synthetic corpus, before and after compaction.
+
+Chunks mix the immigration vocabulary of fixtures.py (where form numbers such as
+n-400 and every topic word occur in most chunks) with Zipf-distributed filler
+words, which mimics the long tail of a real corpus. Cold is the first run of each
+query, warm is the median of later runs.
+
+    python benchmarks/bench_lexical.py --docs 100000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.fixtures import synthetic_text
+from benchmarks.run import QUERIES
+from src.lexical_index import LexicalIndex
+
+IDENTIFIER_QUERIES = ["N-400", "I-485", "form I-130 fee", "H-1B cap"]
+
+
+def corpus(size: int, seed: int = 0) -> list[str]:
+    """Chunks of 40 vocabulary words and 80 Zipf-distributed filler words."""
+    rng = random.Random(seed)
+    filler = [f"w{rank}" for rank in range(20_000)]
+    weights = [1 / (rank + 1) for rank in range(len(filler))]
+    return [synthetic_text(i, 40) + " " + " ".join(rng.choices(filler, weights, k=80)) for i in range(size)]
+
+
+def measure(index: LexicalIndex, queries: list[str], repeat: int = 5) -> dict:
+    """Cold and warm latency of the queries in milliseconds."""
+    cold, warm = [], []
+    for query in queries:
+        for run in range(repeat):
+            started = time.perf_counter()
+            index.search(query, k=20)
+            (cold if run == 0 else warm).append((time.perf_counter() - started) * 1000)
+    return {"cold_p50_ms": statistics.median(cold), "cold_max_ms": max(cold),
+            "warm_p50_ms": statistics.median(warm), "warm_max_ms": max(warm)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure BM25 query latency of the lexical index.")
+    parser.add_argument("--docs", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=256, help="Documents per add call, i.e. per segment")
+    parser.add_argument("--output", help="Write the results JSON to this path")
+    args = parser.parse_args()
+
+    texts = corpus(args.docs)
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        index = LexicalIndex(os.path.join(workdir, "lexical_index.db"))
+        started = time.perf_counter()
+        for start in range(0, len(texts), args.batch_size):
+            batch = texts[start:start + args.batch_size]
+            index.add([f"doc-{start + i}" for i in range(len(batch))], batch)
+        print(f"Indexed {len(texts)} documents in {time.perf_counter() - started:.1f} s")
+
+        for phase in ("segmented", "compacted"):
+            if phase == "compacted":
+                index.compact()
+            for name, queries in (("topic", QUERIES), ("identifier", IDENTIFIER_QUERIES)):
+                results[f"{phase}/{name}"] = result = measure(index, queries)
+                print(f"{phase}/{name}: cold p50 {result['cold_p50_ms']:.1f} ms (max {result['cold_max_ms']:.1f}), "
+                      f"warm p50 {result['warm_p50_ms']:.1f} ms (max {result['warm_max_ms']:.1f})")
+        index.close()
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Startup benchmark: import time of src.database, cold first-query latency in a fresh
+process, and query latency against a warm resident QueryService.
+
+"import_eager" imports the module and builds a loaded ChromaDBHandler, which is the cost
+every process paid when src.database loaded chromadb and the embedding model at import
+time. The snippets only use what both revisions have, so running this script from a
+checkout of the revision before lazy loading gives the "before" numbers; the warm
+service is skipped there since src.service does not exist yet.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+QUERY = "I-485 processing time"
+
+SNIPPETS = {
+    "import": "import src.database",
+    # Before lazy loading the constructor itself loaded everything and there was no warmup()
+    "import_eager": "import src.database; handler = src.database.ChromaDBHandler(); "
+                    "getattr(handler, 'warmup', lambda: handler)()",
+    "cold_first_query": f"import src.database; src.database.ChromaDBHandler().search({QUERY!r}, k=5)",
+}
+
+
+def time_snippet(snippet: str, repeat: int) -> list[float]:
+    """Runs the snippet in fresh interpreters and returns its wall time in each, or raises RuntimeError."""
+    code = f"import time; t = time.perf_counter(); {snippet}; print(time.perf_counter() - t)"
+    timings = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", code], cwd=ROOT_DIR, capture_output=True, text=True)
+        if output.returncode != 0:
+            raise RuntimeError(output.stderr.strip().splitlines()[-1] if output.stderr.strip() else "failed")
+        timings.append(float(output.stdout.strip().splitlines()[-1]))
+    return timings
+
+
+def time_warm_service(repeat: int) -> tuple[float, list[float]]:
+    """Starts an in-process QueryService on a free port and times retrieval requests against it."""
+    from src.service import QueryService, QueryServiceClient
+
+    service = QueryService(port=0)
+    warmup_seconds = service.warmup()
+    threading.Thread(target=service.serve_forever, daemon=True).start()
+    client = QueryServiceClient(service.url)
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        client.retrieve(QUERY)
+        timings.append(time.perf_counter() - started)
+    service.server.shutdown()
+    return warmup_seconds, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time and first-query latency.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Write the results JSON to this path")
+    args = parser.parse_args()
+
+    results = {}
+    for name, snippet in SNIPPETS.items():
+        try:
+            timings = time_snippet(snippet, args.repeat)
+        except RuntimeError as e:
+            results[name] = {"error": str(e)}
+            continue
+        results[name] = {"median_s": statistics.median(timings), "min_s": min(timings)}
+
+    try:
+        warmup_seconds, timings = time_warm_service(args.repeat)
+    except ImportError as e:
+        results["warm_service_query"] = {"error": str(e)}
+    else:
+        results["service_warmup"] = {"seconds": warmup_seconds}
+        results["warm_service_query"] = {"median_s": statistics.median(timings), "min_s": min(timings)}
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""Local HTTP stand-ins for uscis.gov, travel.state.gov and the Groq chat API, serving synthetic, deterministic content."""
+import hashlib
+import json
+import random
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import fitz
+
+from src.boilerplate import USCIS_HEADER, USCIS_FOOTER
+
+VOCABULARY = (
+    "petition applicant beneficiary green card adjustment of status employment authorization "
+    "naturalization priority date visa bulletin form i-485 i-130 i-765 n-400 h-1b cap fiscal year "
+    "filing fee biometrics appointment interview uscis field office request for evidence approval "
+    "denial appeal motion to reopen travel document advance parole consular processing"
+).split()
+
+LISTING_PAGE_SIZE = 10
+
+
+def synthetic_text(seed: int, words: int) -> str:
+    """Returns deterministic immigration-flavoured filler text."""
+    rng = random.Random(seed)
+    sentences = []
+    while words > 0:
+        length = min(words, rng.randint(8, 20))
+        sentences.append(" ".join(rng.choice(VOCABULARY) for _ in range(length)).capitalize() + ".")
+        words -= length
+    return " ".join(sentences)
+
+
+def html_page(page_id: int, words: int = 600) -> str:
+    """A USCIS-style HTML page: real navigation header and footer around a generated article."""
+    paragraphs = "".join(
+        f"<p>{synthetic_text(page_id * 100 + i, words // 6)}</p>\n" for i in range(6)
+    )
+    return (
+        f"<!DOCTYPE html><html lang=\"en\"><head><title>Policy page {page_id} | USCIS</title>"
+        f"<meta name=\"description\" content=\"Synthetic page {page_id}\"></head><body>"
+        f"<header><nav>{USCIS_HEADER}</nav></header>"
+        f"<main><article><h1>Policy page {page_id}</h1>\n{paragraphs}</article></main>"
+        f"<footer>{USCIS_FOOTER}</footer></body></html>"
+    )
+
+
+def pdf_document(doc_id: int, pages: int) -> bytes:
+    """A multi-page PDF with a few hundred words per page."""
+    pdf = fitz.open()
+    for page_num in range(pages):
+        page = pdf.new_page()
+        page.insert_textbox(fitz.Rect(50, 50, 550, 800), synthetic_text(doc_id * 1000 + page_num, 300), fontsize=9)
+    data = pdf.tobytes()
+    pdf.close()
+    return data
+
+
+def listing_page(section: str, page: int, total_items: int) -> str:
+    """A newsroom listing page linking LISTING_PAGE_SIZE items, with a rel=next pagination link."""
+    start = page * LISTING_PAGE_SIZE
+    items = "".join(
+        f"<li><a href=\"/newsroom/news-releases/{section}-item-{item}\">Item {item}</a></li>"
+        for item in range(start, min(start + LISTING_PAGE_SIZE, total_items))
+    )
+    next_link = ""
+    if start + LISTING_PAGE_SIZE < total_items:
+        next_link = f"<a rel=\"next\" href=\"?page={page + 1}\">Next</a>"
+    return (
+        f"<html><body><header><nav>{USCIS_HEADER}</nav></header>"
+        f"<main><ul>{items}</ul>{next_link}</main><footer>{USCIS_FOOTER}</footer></body></html>"
+    )
+
+
+class FixtureServer:
+    """
+    Serves /web/<n>.html pages, /pdf/<n>.pdf documents and /newsroom/<section> listings.
+
+    Responses carry ETag and Last-Modified headers and honour If-None-Match, so the
+    conditional-request paths of the scrapers and the tracker are exercised too.
+    """
+
+    def __init__(self, pdf_pages: int = 20, listing_items: int = 50):
+        self.pdf_pages = pdf_pages
+        self.listing_items = listing_items
+        self._pdfs = {}
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self) -> "FixtureServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def pdf(self, doc_id: int) -> bytes:
+        """Returns (and caches) the bytes of a synthetic PDF."""
+        with self._lock:
+            if doc_id not in self._pdfs:
+                self._pdfs[doc_id] = pdf_document(doc_id, self.pdf_pages)
+            return self._pdfs[doc_id]
+
+    def _handler(self):
+        fixtures = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; with Nagle on, the body of every
+            # pooled keep-alive response waits ~40 ms for the client's delayed ACK.
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                parts = parsed.path.strip("/").split("/")
+                try:
+                    if parts[0] == "web":
+                        body, content_type = html_page(int(parts[1].split(".")[0])).encode(), "text/html"
+                    elif parts[0] == "pdf":
+                        body, content_type = fixtures.pdf(int(parts[1].split(".")[0])), "application/pdf"
+                    elif parts[0] == "newsroom":
+                        page = int(parse_qs(parsed.query).get("page", ["0"])[0])
+                        body = listing_page(parts[1], page, fixtures.listing_items).encode()
+                        content_type = "text/html"
+                    else:
+                        raise ValueError(parsed.path)
+                except (ValueError, IndexError):
+                    self.send_error(404)
+                    return
+
+                etag = '"' + hashlib.md5(body).hexdigest() + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.send_header("Last-Modified", formatdate(0, usegmt=True))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+class FakeChatServer:
+    """
+    Local stand-in for Groq's OpenAI-compatible chat completions endpoint.
+
+    Answers every request with deterministic filler text, streamed as server-sent
+    events when asked, emitting one token every `token_delay` seconds after a
+    `first_token_delay`. Every `rate_limit_every`-th request is refused with a 429
+    so that retry and backoff paths run too. Point a ChatModel at it with
+    `ChatModel(api_key="fake", base_url=server.base_url)`.
+    """
+
+    def __init__(self, answer_tokens: int = 120, first_token_delay: float = 0.2, token_delay: float = 0.005,
+                 rate_limit_every: int = 0):
+        self.answer_tokens = answer_tokens
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.rate_limit_every = rate_limit_every
+        self.requests = 0
+        self.rate_limited = 0
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self) -> "FakeChatServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; with Nagle on, the body of every
+            # pooled keep-alive response waits ~40 ms for the client's delayed ACK.
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if not self.path.endswith("/chat/completions"):
+                    self.send_error(404)
+                    return
+                with fake._lock:
+                    fake.requests += 1
+                    refuse = fake.rate_limit_every and fake.requests % fake.rate_limit_every == 0
+                    fake.rate_limited += bool(refuse)
+                if refuse:
+                    self._send_json(429, {"error": {"message": "Rate limit reached", "type": "tokens"}},
+                                    {"Retry-After": "0.05"})
+                    return
+
+                prompt = " ".join(str(message.get("content", "")) for message in request.get("messages", []))
+                count = min(fake.answer_tokens, request.get("max_tokens") or fake.answer_tokens)
+                tokens = [f" {word}" for word in synthetic_text(len(prompt), count).split()][:count]
+                usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(tokens),
+                         "total_tokens": len(prompt) // 4 + len(tokens)}
+                completion = {"id": f"chatcmpl-{fake.requests}", "created": int(time.time()),
+                              "model": request.get("model", "fake")}
+
+                if not request.get("stream"):
+                    time.sleep(fake.first_token_delay + fake.token_delay * len(tokens))
+                    self._send_json(200, {**completion, "object": "chat.completion", "usage": usage, "choices": [{
+                        "index": 0, "finish_reason": "stop", "logprobs": None,
+                        "message": {"role": "assistant", "content": "".join(tokens).strip()},
+                    }]})
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                time.sleep(fake.first_token_delay)
+                for i, token in enumerate(tokens):
+                    delta = {"role": "assistant", "content": token} if i == 0 else {"content": token}
+                    self._send_event({**completion, "object": "chat.completion.chunk", "choices": [
+                        {"index": 0, "delta": delta, "finish_reason": None, "logprobs": None}
+                    ]})
+                    time.sleep(fake.token_delay)
+                self._send_event({**completion, "object": "chat.completion.chunk", "x_groq": {"usage": usage},
+                                  "choices": [{"index": 0, "delta": {}, "finish_reason": "stop", "logprobs": None}]})
+                self._send_chunk(b"data: [DONE]\n\n")
+                self._send_chunk(b"")
+
+            def _send_event(self, payload: dict):
+                self._send_chunk(f"data: {json.dumps(payload)}\n\n".encode())
+
+            def _send_chunk(self, data: bytes):
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def _send_json(self, status: int, payload: dict, headers: dict = None):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
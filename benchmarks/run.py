@@ -0,0 +1,199 @@
+"""
+Offline end-to-end benchmark of the ingestion and query paths.
+
+Starts a local stand-in for uscis.gov (see fixtures.py) and drives the scrapers,
+clean_text, ChromaDBHandler and URLTracker against it. Every stage reports
+throughput, p50/p95/p99 latency and the process's RSS high-water mark after the
+stage. The high-water mark is cumulative: it covers every stage run so far, so only
+an increase over the previous stage is attributable to the stage itself.
+Results are written as JSON and can be compared against a stored baseline:
+
+    python benchmarks/run.py --output bench.json --baseline benchmarks/baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.fixtures import FixtureServer
+
+STAGES = ["scrape_web", "scrape_pdf", "clean_text", "add_documents", "search", "search_many", "track_new_urls"]
+
+QUERIES = [
+    "I-485 processing time", "H-1B cap", "how do I apply for naturalization", "N-400 filing fee",
+    "employment authorization renewal", "visa bulletin priority date", "advance parole travel document",
+    "request for evidence response", "biometrics appointment", "consular processing interview",
+]
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of the values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def rss_high_water_mb() -> float:
+    """Peak resident set size of this process since it started, in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def measure(items: list, func) -> tuple[list, dict]:
+    """Calls func on every item, returning the results and the latency/throughput summary."""
+    results, latencies = [], []
+    started = time.perf_counter()
+    for item in items:
+        call_started = time.perf_counter()
+        results.append(func(item))
+        latencies.append(time.perf_counter() - call_started)
+    elapsed = time.perf_counter() - started
+    return results, {
+        "items": len(items),
+        "seconds": elapsed,
+        "throughput": len(items) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "rss_high_water_mb": rss_high_water_mb(),
+    }
+
+
+def run(args) -> dict:
+    """Runs the selected stages and returns the results document."""
+    results = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "params": {"pages": args.pages, "pdfs": args.pdfs, "pdf_pages": args.pdf_pages, "queries": args.queries},
+        "stages": {},
+    }
+    stages = results["stages"]
+
+    with FixtureServer(pdf_pages=args.pdf_pages, listing_items=args.listing_items) as server, \
+            tempfile.TemporaryDirectory() as workdir:
+        # The vector store, caches and manifests use relative paths; keep them out of the repo
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            run_stages(args, server, workdir, stages)
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+def run_stages(args, server: FixtureServer, workdir: str, stages: dict):
+    """Runs the selected stages against the fixture server from inside workdir, filling in stages."""
+    from src.http_client import get_session
+    from src.scraper import PDFScraper, WebScraper
+    from utils import clean_text
+
+    documents = []
+    session = get_session()
+
+    if "scrape_web" in args.stages:
+        urls = [f"{server.base_url}/web/{i}.html" for i in range(args.pages)]
+        pages, stages["scrape_web"] = measure(urls, WebScraper(session=session).scrape)
+        documents.extend(doc for page in pages for doc in page)
+
+    if "scrape_pdf" in args.stages:
+        for i in range(args.pdfs):
+            server.pdf(i)  # Generate outside the timed region
+        urls = [f"{server.base_url}/pdf/{i}.pdf" for i in range(args.pdfs)]
+        pdfs, stages["scrape_pdf"] = measure(urls, PDFScraper(session=session).scrape)
+        documents.extend(doc for pdf in pdfs for doc in pdf)
+
+    if "clean_text" in args.stages:
+        def clean(doc):
+            doc.page_content = clean_text(doc.page_content, domain="uscis.gov")
+        _, stages["clean_text"] = measure(documents, clean)
+
+    if {"add_documents", "search", "search_many"} & set(args.stages):
+        from src.database import ChromaDBHandler
+        chroma_db = ChromaDBHandler()
+
+    if "add_documents" in args.stages:
+        batches = [documents[i:i + args.batch_size] for i in range(0, len(documents), args.batch_size)]
+        _, stages["add_documents"] = measure(batches, chroma_db.add_documents)
+        stages["add_documents"]["documents_per_second"] = len(documents) / stages["add_documents"]["seconds"]
+
+    queries = [QUERIES[i % len(QUERIES)] + f" {i}" for i in range(args.queries)]
+    if "search" in args.stages:
+        _, stages["search"] = measure(queries, lambda query: chroma_db.search(query, k=5))
+
+    if "search_many" in args.stages:
+        # Distinct suffixes so the batched stage does not hit queries cached by the "search" stage
+        batches = [[f"{query} batched" for query in queries[i:i + 16]] for i in range(0, len(queries), 16)]
+        _, stages["search_many"] = measure(batches, lambda batch: chroma_db.search_many(batch, k=5))
+        stages["search_many"]["queries_per_second"] = len(queries) / stages["search_many"]["seconds"]
+
+    if "track_new_urls" in args.stages:
+        from batch.url_tracker import URLTracker
+
+        def track(run_num):
+            # A fresh index per run, so every run crawls the whole listing
+            tracker = URLTracker(
+                server.base_url,
+                [f"{server.base_url}/newsroom/{section}" for section in ("alerts", "news-releases", "all-news")],
+                os.path.join(workdir, "uscis.txt"),
+                os.path.join(workdir, "uscis_untracked.txt"),
+                valid_url_prefixes={"/newsroom/news-releases/"},
+                name="bench",
+                store_path=os.path.join(workdir, f"url_index_{run_num}.db"),
+                follow_pagination=True,
+            )
+            tracker.rate_limiter.host_rates = {}
+            tracker.track_new_urls()
+        _, stages["track_new_urls"] = measure(list(range(args.tracker_runs)), track)
+
+
+def compare(results: dict, baseline: dict):
+    """Prints the change of throughput and p95 latency of every stage against the baseline."""
+    print(f"\n{'stage':<16}{'throughput':>14}{'vs base':>10}{'p95 ms':>12}{'vs base':>10}")
+    for stage, current in results["stages"].items():
+        base = baseline.get("stages", {}).get(stage)
+        throughput_change = p95_change = ""
+        if base:
+            if base["throughput"]:
+                throughput_change = f"{(current['throughput'] / base['throughput'] - 1) * 100:+.1f}%"
+            if base["p95_ms"]:
+                p95_change = f"{(current['p95_ms'] / base['p95_ms'] - 1) * 100:+.1f}%"
+        print(f"{stage:<16}{current['throughput']:>14.1f}{throughput_change:>10}{current['p95_ms']:>12.2f}{p95_change:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark against a local USCIS stand-in.")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES, help="Stages to run")
+    parser.add_argument("--pages", type=int, default=200, help="Number of HTML pages to scrape")
+    parser.add_argument("--pdfs", type=int, default=10, help="Number of PDFs to scrape")
+    parser.add_argument("--pdf-pages", type=int, default=20, help="Pages per PDF")
+    parser.add_argument("--queries", type=int, default=100, help="Number of search queries")
+    parser.add_argument("--batch-size", type=int, default=64, help="Documents per add_documents call")
+    parser.add_argument("--listing-items", type=int, default=50, help="Items per newsroom listing")
+    parser.add_argument("--tracker-runs", type=int, default=5, help="Number of track_new_urls runs")
+    parser.add_argument("--output", help="Write the results JSON to this path")
+    parser.add_argument("--baseline", help="Compare against a previously saved results JSON")
+    args = parser.parse_args()
+
+    results = run(args)
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    if args.baseline:
+        with open(args.baseline, "r") as file:
+            compare(results, json.load(file))
+
+
+if __name__ == "__main__":
+    main()
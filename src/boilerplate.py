@@ -0,0 +1,123 @@
+import json
+import math
+import os
+import re
+from collections import Counter
+from functools import lru_cache
+from html import unescape
+from urllib.parse import urlparse
+from src.trie import trie_pattern
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "resources", "boilerplate")
+
+# Navigation and footer of uscis.gov pages, used until a model has been learned for the domain
+USCIS_HEADER = "uscis skip to main content an official website of the united states government here's how you know español multilingual resources official websites use .gov a .gov website belongs to an official government organization in the united states. secure .gov websites use https a lock ( a locked padlock ) or https:// means you've safely connected to the .gov website. share sensitive information only on official, secure websites. sign in access uscis online services. sign in create account menu sign in create account topics topics family family of green card holders (permanent residents) family of refugees and asylees family of u.s. citizens adoption before you start immigration through adoption military citizenship for military family members naturalization through military service humanitarian humanitarian parole refugees and asylum temporary protected status visit the u.s. change my nonimmigrant status extend your stay working in the united states permanent workers temporary (nonimmigrant) workers e-verify i-9 central avoid scams common scams find legal services report immigration scams careers at uscis career opportunities special hiring programs forms forms most accessed forms i-9, employment eligibility verification i-485, application to register permanent residence or adjust status i-765, application for employment authorization i-90, application to replace permanent resident card (green card) n-400, application for naturalization family based forms i-129f, petition for alien fiancé(e) i-130, petition for alien relative i-360, petition for amerasian, widow(er), or special immigrant i-600, petition to classify orphan as an immediate relative i-751, petition to remove conditions on residence all forms file online employment based forms i-129, petition for a nonimmigrant worker i-140, immigrant petition for alien workers i-526, immigrant petition by standalone investor i-539, application to extend/change nonimmigrant status humanitarian based forms i-589, application for asylum and for withholding of removal i-730, refugee/asylee relative petition i-821, application for temporary protected status newsroom newsroom all news alerts fact sheets news releases stakeholder messages media contacts multimedia gallery social media directory speeches, statements, testimony citizenship citizenship learners apply for citizenship learn about citizenship naturalization test and study resources educators educational products for educators resources for educational programs teacher training sessions organizations outreach tools civic integration naturalization-related data and statistics grants success stories from grant recipients green card green card green card processes and procedures adjustment of status after we grant your green card employment authorization document visa availability and priority dates green card eligibility categories how to apply for a green card replace your green card while your green card application is pending with uscis laws laws legislation immigration and nationality act class action, settlement notices and agreements unlawful presence and inadmissibility policy manual regulations administrative appeals tools tools self-help tools check case processing times case status online change of address e-request password resets and technical support website resources archive a-z index website policies additional resources explore my options immigration and citizenship data multilingual resource center uscis tools and resources"
+USCIS_FOOTER = "previouspreviousnextnext return to top topics forms newsroom citizenship green card laws tools contact uscis agency description uscis.gov an official website of the u.s. department of homeland security important links about uscis accessibility budget and performance dhs components freedom of information act no fear act data privacy and legal disclaimers site map office of the inspector general the white house usa.gov looking for u.s. government information and services? visit usa.gov"
+
+SEED_PHRASES = {
+    "uscis.gov": [USCIS_HEADER, USCIS_FOOTER],
+}
+
+
+def normalize_domain(domain_or_url: str) -> str:
+    """Reduces a URL or hostname to the domain key used for boilerplate models."""
+    if domain_or_url and "://" in domain_or_url:
+        domain_or_url = urlparse(domain_or_url).hostname or ""
+    domain = (domain_or_url or "").lower()
+    return domain[4:] if domain.startswith("www.") else domain
+
+
+class BoilerplateModel:
+    """
+    Per-domain set of boilerplate phrases compiled into a single-pass cleaner.
+
+    Phrases are learned from a sample of pages: word shingles that occur on a large
+    share of the pages are marked, and the maximal runs of marked words become the
+    phrases. All phrases are compiled into one trie-shaped regex, so `clean` removes
+    every phrase in a single pass instead of one `str.replace` per phrase.
+    """
+
+    def __init__(self, domain: str, phrases: list[str]):
+        self.domain = normalize_domain(domain)
+        self.phrases = sorted(set(phrases), key=lambda phrase: (-len(phrase), phrase))
+        self.pattern = self.compile(self.phrases)
+
+    @staticmethod
+    def compile(phrases: list[str]) -> re.Pattern:
+        """Builds one trie-shaped pattern matching any phrase on word boundaries."""
+        sequences = [[re.escape(char) for char in " " + " ".join(phrase.split())] for phrase in phrases if phrase.strip()]
+        if not sequences:
+            return None
+        # Every alternative starts with the space before the phrase, which gives the regex
+        # engine a literal prefix to scan for
+        return re.compile(trie_pattern(sequences) + r"(?= |$)")
+
+    def clean(self, text: str) -> str:
+        """Collapses whitespace, then removes every boilerplate phrase in a single regex pass."""
+        text = " ".join(text.split())
+        if self.pattern is None:
+            return text
+        # The leading space lets a phrase at the very start of the text match as well
+        return self.pattern.sub("", " " + text).strip()
+
+    @classmethod
+    def learn(cls, domain: str, pages: list[str], shingle_size: int = 8,
+              min_page_fraction: float = 0.5, min_pages: int = 3) -> "BoilerplateModel":
+        """
+        Learns the boilerplate of a domain from a sample of its pages.
+
+        :param domain: Domain the pages were sampled from
+        :param pages: Raw page texts
+        :param shingle_size: Number of words per shingle
+        :param min_page_fraction: Share of pages a shingle must appear on to count as boilerplate
+        :param min_pages: Minimum number of pages a shingle must appear on
+        """
+        documents = [unescape(page).lower().split() for page in pages]
+        threshold = max(min_pages, math.ceil(min_page_fraction * len(documents)))
+
+        page_counts = Counter()
+        for words in documents:
+            page_counts.update({tuple(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)})
+        common = {shingle for shingle, count in page_counts.items() if count >= threshold}
+
+        phrases = set()
+        for words in documents:
+            covered = [False] * len(words)
+            for i in range(len(words) - shingle_size + 1):
+                if tuple(words[i:i + shingle_size]) in common:
+                    covered[i:i + shingle_size] = [True] * shingle_size
+
+            start = None
+            for i, is_covered in enumerate(covered + [False]):
+                if is_covered and start is None:
+                    start = i
+                elif not is_covered and start is not None:
+                    phrases.add(" ".join(words[start:i]))
+                    start = None
+
+        return cls(domain, list(phrases))
+
+    def save(self, model_dir: str = MODEL_DIR) -> str:
+        """Writes the model to `<model_dir>/<domain>.json` and returns the path."""
+        os.makedirs(model_dir, exist_ok=True)
+        path = os.path.join(model_dir, f"{self.domain}.json")
+        with open(path, "w") as file:
+            json.dump({"domain": self.domain, "phrases": self.phrases}, file, indent=2)
+        for_domain.cache_clear()
+        return path
+
+    @classmethod
+    def load(cls, domain: str, model_dir: str = MODEL_DIR) -> "BoilerplateModel":
+        """Loads the learned model of a domain, falling back to its seed phrases."""
+        domain = normalize_domain(domain)
+        try:
+            with open(os.path.join(model_dir, f"{domain}.json"), "r") as file:
+                return cls(domain, json.load(file)["phrases"])
+        except FileNotFoundError:
+            return cls(domain, SEED_PHRASES.get(domain, []))
+
+
+@lru_cache(maxsize=None)
+def for_domain(domain: str) -> BoilerplateModel:
+    """Returns the (cached) boilerplate model for a domain."""
+    return BoilerplateModel.load(domain)
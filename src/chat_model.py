@@ -1,43 +1,237 @@
-from langchain_groq import ChatGroq
+from langchain.schema import Document
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
+from src.context_packer import ContextPacker
+from src.errors import ConfigurationError
+from src.metrics import instrument, metrics
 import os
+import random
+import threading
+import time
+
+SYSTEM_PROMPT = (
+    "You are Immigo, an assistant for U.S. immigration questions. Answer using only the "
+    "USCIS and Department of State excerpts provided. If they do not contain the answer, "
+    "say so. Cite the source URLs you relied on."
+)
+
+# HTTP statuses worth retrying: rate limited, and Groq's over-capacity responses
+RETRYABLE_STATUSES = {429, 498, 503}
 
 class ChatModel:
     """
     A wrapper class around the `ChatGroq` model, allowing interaction with the Groq AI model for generating responses.
 
+    Answers are streamed token by token. The retrieved documents are packed into a
+    token budget before prompting, at most `max_concurrency` requests wait for their
+    first token at a time, and rate limited requests are retried with exponential backoff.
+
     Attributes:
     -----------
     groq : ChatGroq
         The instance of the `ChatGroq` class used for generating responses from the Groq model.
         The model is initialized with specific configuration parameters like temperature, API key, and model type.
+    packer : ContextPacker
+        Packs the retrieved documents into the context token budget.
+    stats : dict
+        Totals over all completed requests: requests, retries, output tokens, time to first token and generation time.
     """
-    
-    def __init__(self):
+
+    def __init__(self, model: str = "llama3-70b-8192", api_key: str = None, base_url: str = None,
+                 context_budget: int = 6000, max_output_tokens: int = 1024, max_concurrency: int = 4,
+                 max_retries: int = 5, backoff_base: float = 1.0, backoff_max: float = 30.0):
         """
         Initializes the ChatModel class and sets up the ChatGroq instance for communication with the Groq model.
 
         The constructor sets up the model configuration, including:
         - `temperature`: Controls the randomness of the model's responses. Lower values (e.g., 0) make the output more deterministic.
         - `api_key`: The API key required to authenticate requests to the Groq model, fetched from the environment variables.
-        - `model`: The specific Groq model to use. In this case, it uses the "deepseek-r1-distill-llama-70b" model.
+        - `model`: The specific Groq model to use, by default "llama3-70b-8192" with an 8k context window.
 
         The API key is fetched securely from the environment variables, ensuring that sensitive information is not hardcoded.
 
+        Parameters:
+        -----------
+        model : str
+            The Groq model name.
+        api_key : str
+            Overrides the GROQ_API_KEY environment variable.
+        base_url : str
+            Overrides the Groq API URL, e.g. to point at the local fake endpoint in benchmarks/fixtures.py.
+            Defaults to the GROQ_BASE_URL environment variable, then to Groq itself.
+        context_budget : int
+            Tokens of retrieved context per prompt; the 8k window also holds the prompt, question and answer.
+        max_output_tokens : int
+            Upper bound on the generated answer length.
+        max_concurrency : int
+            Requests waiting for their first token at once across all threads.
+        max_retries : int
+            Retries of a rate limited request before giving up.
+        backoff_base, backoff_max : float
+            First and largest backoff delay in seconds; delays double per retry, with jitter.
+
         Raises:
         -------
-        EnvironmentError:
+        ConfigurationError:
             If the API key is not set in the environment variables, an exception will be raised.
         """
-        
-        api_key = os.getenv("GROQ_API_KEY")
-        
+
+        api_key = api_key or os.getenv("GROQ_API_KEY")
+
         # Raise an error if the API key is not found in the environment
         if not api_key:
-            raise EnvironmentError("GROQ_API_KEY environment variable not set.")
-        
-        # Initialize the Groq model with the given configuration
+            raise ConfigurationError("GROQ_API_KEY environment variable not set.")
+
+        from langchain_groq import ChatGroq
+
+        # Initialize the Groq model with the given configuration. Retries are handled
+        # here rather than in the client so that they respect the concurrency bound.
         self.groq = ChatGroq(
-            temperature=0, 
-            api_key=api_key, 
-            model="llama3-70b-8192"
-        )
\ No newline at end of file
+            temperature=0,
+            api_key=api_key,
+            model=model,
+            base_url=base_url or os.getenv("GROQ_BASE_URL"),
+            max_tokens=max_output_tokens,
+            max_retries=0,
+            streaming=True,
+        )
+        self.packer = ContextPacker(budget_tokens=context_budget)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.stats = {"requests": 0, "retries": 0, "output_tokens": 0, "ttft_seconds": 0.0, "generation_seconds": 0.0}
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._stats_lock = threading.Lock()
+
+    @instrument("llm_generate")
+    def answer(self, question: str, documents: list[Document]) -> str:
+        """
+        Generates an answer to the question grounded in the retrieved documents.
+
+        Parameters:
+        -----------
+        question : str
+            The user's question.
+        documents : list[Document]
+            The retrieved context documents, best first, each carrying its `source` URL in the metadata.
+
+        Returns:
+        --------
+        str
+            The model's answer.
+        """
+        return "".join(self.stream(question, documents))
+
+    def answer_many(self, requests: list[tuple[str, list[Document]]]) -> list[str]:
+        """
+        Answers several (question, documents) pairs concurrently, at most `max_concurrency` at a time.
+
+        Returns:
+        --------
+        list[str]
+            The answers, in the order of the requests.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            return list(executor.map(lambda request: self.answer(*request), requests))
+
+    def stream(self, question: str, documents: list[Document], stats: dict = None) -> Iterator[str]:
+        """
+        Generates an answer, yielding text as the model produces it.
+
+        Parameters:
+        -----------
+        question : str
+            The user's question.
+        documents : list[Document]
+            The retrieved context documents, best first.
+        stats : dict
+            If given, filled in with `ttft_seconds`, `output_tokens`, `seconds`, `tokens_per_second`
+            and `retries` once the stream is exhausted.
+
+        Yields:
+        -------
+        str
+            Successive pieces of the answer.
+        """
+        messages = self.build_messages(question, self.packer.pack(documents))
+        stats = {} if stats is None else stats
+        started = time.perf_counter()
+        first_token_at = None
+        output_tokens = chunks = 0
+        for attempt in range(self.max_retries + 1):
+            # A slot is held from sending the request until its first token: neither the
+            # backoff sleep nor a caller reading the stream slowly blocks other requests
+            self._slots.acquire()
+            holding_slot = True
+            try:
+                for chunk in self.groq.stream(messages):
+                    usage = getattr(chunk, "usage_metadata", None)
+                    if usage:
+                        output_tokens = usage.get("output_tokens", output_tokens)
+                    if not chunk.content:
+                        continue
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                        self._slots.release()
+                        holding_slot = False
+                    chunks += 1
+                    yield chunk.content
+                break
+            except Exception as e:
+                # Only a request that has not streamed anything yet can be retried transparently
+                if first_token_at is not None or attempt == self.max_retries or not self._retryable(e):
+                    raise
+                metrics.increment("immigo_llm_retries_total")
+                stats["retries"] = stats.get("retries", 0) + 1
+                delay = self._backoff(attempt, e)
+            finally:
+                if holding_slot:
+                    self._slots.release()
+            time.sleep(delay)
+        finished = time.perf_counter()
+
+        self._record(stats, started, first_token_at or finished, finished, output_tokens or chunks)
+
+    def _record(self, stats: dict, started: float, first_token_at: float, finished: float, output_tokens: int):
+        generation_seconds = finished - first_token_at
+        stats.update({
+            "ttft_seconds": first_token_at - started,
+            "output_tokens": output_tokens,
+            "seconds": finished - started,
+            "tokens_per_second": output_tokens / generation_seconds if generation_seconds > 0 else 0.0,
+        })
+        stats.setdefault("retries", 0)
+        with self._stats_lock:
+            self.stats["requests"] += 1
+            self.stats["retries"] += stats["retries"]
+            self.stats["output_tokens"] += output_tokens
+            self.stats["ttft_seconds"] += stats["ttft_seconds"]
+            self.stats["generation_seconds"] += generation_seconds
+        metrics.observe("immigo_stage_seconds", stats["ttft_seconds"], stage="llm_ttft")
+        metrics.increment("immigo_llm_output_tokens_total", output_tokens)
+
+    @staticmethod
+    def _retryable(error: Exception) -> bool:
+        status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+        return status in RETRYABLE_STATUSES
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        """Seconds to wait before the next attempt: Retry-After if the server sent one, else jittered doubling."""
+        headers = getattr(getattr(error, "response", None), "headers", None) or {}
+        try:
+            return min(float(headers["retry-after"]), self.backoff_max)
+        except (KeyError, TypeError, ValueError):
+            delay = min(self.backoff_base * 2 ** attempt, self.backoff_max)
+            return delay * random.uniform(0.5, 1.0)
+
+    @staticmethod
+    def build_messages(question: str, documents: list[Document]) -> list[tuple[str, str]]:
+        """Builds the system and user messages for a question and its context documents."""
+        context = "\n\n".join(
+            f"[{doc.metadata.get('source', 'unknown')}]\n{doc.page_content}" for doc in documents
+        )
+        return [
+            ("system", SYSTEM_PROMPT),
+            ("human", f"Context:\n{context}\n\nQuestion: {question}"),
+        ]
@@ -0,0 +1,110 @@
+from typing import Callable, Iterable, Iterator
+from langchain.schema import Document
+from src.database import ChromaDBHandler, EMBEDDING_MODEL_NAME
+
+
+class TokenChunker:
+    """Splits documents into overlapping windows measured in embedding-model tokens."""
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL_NAME, chunk_tokens: int = 250, overlap_tokens: int = 40):
+        """
+        :param model_name: Model whose tokenizer defines the token count
+        :param chunk_tokens: Maximum tokens per chunk; all-MiniLM-L6-v2 truncates input at 256
+        :param overlap_tokens: Tokens shared between consecutive chunks
+        """
+        if not 0 <= overlap_tokens < chunk_tokens:
+            raise ValueError("overlap_tokens must be smaller than chunk_tokens.")
+
+        from transformers import AutoTokenizer
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = overlap_tokens
+
+    def split_text(self, text: str) -> Iterator[str]:
+        """Yields token windows of the text, sliced from the original string by character offsets."""
+        offsets = self.tokenizer(
+            text, add_special_tokens=False, return_offsets_mapping=True, verbose=False
+        )["offset_mapping"]
+        if not offsets:
+            return
+
+        step = self.chunk_tokens - self.overlap_tokens
+        for start in range(0, len(offsets), step):
+            end = min(start + self.chunk_tokens, len(offsets))
+            yield text[offsets[start][0]:offsets[end - 1][1]]
+            if end == len(offsets):
+                break
+
+    def split_documents(self, documents: Iterable[Document]) -> Iterator[Document]:
+        """Lazily yields chunk Documents, tagging each with its chunk index within the page."""
+        for doc in documents:
+            for chunk_num, text in enumerate(self.split_text(doc.page_content)):
+                yield Document(page_content=text, metadata={**doc.metadata, "chunk": chunk_num})
+
+
+class ChunkBatcher:
+    """
+    Gathers chunks from many sources into fixed-size batches for the vector store.
+
+    Every full batch costs one embedding call and one bulk upsert. Once all chunks of
+    a source have been written, `on_complete(key, ids)` is called with their IDs; if a
+    batch fails, `on_error(key, error)` is called once for every source it contained.
+    """
+
+    def __init__(self, chroma_db: ChromaDBHandler, batch_size: int = 256,
+                 on_complete: Callable[[str, list[str]], None] = None,
+                 on_error: Callable[[str, Exception], None] = None):
+        self.chroma_db = chroma_db
+        self.batch_size = batch_size
+        self.on_complete = on_complete
+        self.on_error = on_error
+        self._batch = []
+        self._pending = {}
+
+    def add(self, key: str, chunks: Iterable[Document]):
+        """Streams the chunks of one source into the batch, flushing whenever it fills up."""
+        state = self._pending[key] = {"remaining": 0, "ids": [], "closed": False, "failed": False}
+        try:
+            for chunk in chunks:
+                if state["failed"]:
+                    break
+                state["remaining"] += 1
+                self._batch.append((key, chunk))
+                if len(self._batch) >= self.batch_size:
+                    self.flush()
+        except Exception:
+            state["failed"] = True  # The caller handles the error
+            raise
+        finally:
+            state["closed"] = True
+            self._complete_if_done(key)
+
+    def flush(self):
+        """Embeds and upserts the current batch."""
+        if not self._batch:
+            return
+        batch, self._batch = self._batch, []
+        keys = list(dict.fromkeys(key for key, _ in batch))
+        try:
+            ids = self.chroma_db.add_documents([chunk for _, chunk in batch])
+        except Exception as e:
+            for key in keys:
+                if not self._pending[key]["failed"]:
+                    self._pending[key]["failed"] = True
+                    if self.on_error:
+                        self.on_error(key, e)
+            ids = [None] * len(batch)
+
+        for (key, _), doc_id in zip(batch, ids):
+            self._pending[key]["ids"].append(doc_id)
+            self._pending[key]["remaining"] -= 1
+        for key in keys:
+            self._complete_if_done(key)
+
+    def _complete_if_done(self, key: str):
+        state = self._pending.get(key)
+        if state and state["closed"] and state["remaining"] == 0:
+            del self._pending[key]
+            if self.on_complete and not state["failed"]:
+                self.on_complete(key, state["ids"])
@@ -0,0 +1,75 @@
+from typing import Callable
+from langchain.schema import Document
+
+
+def approximate_tokens(text: str) -> int:
+    """Cheap token estimate for Llama 3 on English text, about four characters per token."""
+    return (len(text) + 3) // 4
+
+
+class ContextPacker:
+    """
+    Packs retrieved chunks into a fixed prompt token budget.
+
+    Documents are taken in retrieval order (best first). Exact duplicate chunks are
+    dropped, each source contributes at most `max_chunks_per_source` chunks, and the
+    chunks of one source are merged under a single source header. The last chunk that
+    does not fit whole is truncated at a word boundary.
+    """
+
+    def __init__(self, budget_tokens: int = 6000, max_chunks_per_source: int = 3,
+                 count_tokens: Callable[[str], int] = approximate_tokens):
+        """
+        :param budget_tokens: Tokens available for the context, excluding the system prompt and question
+        :param max_chunks_per_source: Chunks kept per source URL, so one long PDF cannot crowd out the rest
+        :param count_tokens: Token counter for the chat model
+        """
+        self.budget_tokens = budget_tokens
+        self.max_chunks_per_source = max_chunks_per_source
+        self.count_tokens = count_tokens
+
+    def pack(self, documents: list[Document]) -> list[Document]:
+        """Returns one Document per source, in order of each source's best rank, within the budget."""
+        by_source = {}
+        seen = set()
+        remaining = self.budget_tokens
+        for doc in documents:
+            source = doc.metadata.get("source", "unknown")
+            text = " ".join(doc.page_content.split())
+            chunks = by_source.get(source, [])
+            if not text or text in seen or len(chunks) >= self.max_chunks_per_source:
+                continue
+
+            # A new source costs its header line, a further chunk the separator
+            overhead = 2 if chunks else self.count_tokens(f"[{source}]\n") + 1
+            tokens = self.count_tokens(text) + overhead
+            if tokens > remaining:
+                text = self._truncate(text, remaining - overhead)
+                if not text:
+                    break
+                tokens = self.count_tokens(text) + overhead
+
+            seen.add(text)
+            by_source[source] = chunks + [text]
+            remaining -= tokens
+            if remaining <= 0:
+                break
+
+        return [
+            Document(page_content="\n...\n".join(chunks), metadata={"source": source})
+            for source, chunks in by_source.items()
+        ]
+
+    def _truncate(self, text: str, budget: int) -> str:
+        """Cuts text down to the budget at a word boundary."""
+        if budget <= 0:
+            return ""
+        words = text.split()
+        low, high = 0, len(words)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.count_tokens(" ".join(words[:middle])) <= budget:
+                low = middle
+            else:
+                high = middle - 1
+        return " ".join(words[:low])
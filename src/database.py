@@ -1,36 +1,408 @@
-import chromadb
-from langchain_chroma import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain.schema import Document
-from langchain_core.vectorstores.base import VectorStoreRetriever
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Iterator
+from src.lexical_index import LexicalIndex, is_identifier_query
+from src.metrics import instrument, metrics
+from src.partitions import ARCHIVE_PREFIX, classify, is_partition, partition_name, route as route_query, select_partitions
+from src.query_batcher import QueryBatcher
+
+# chromadb and sentence-transformers take seconds to import, so they
+# are imported on first use of the vector store rather than when this module loads
+if TYPE_CHECKING:
+    from langchain.schema import Document
+    from langchain_core.retrievers import BaseRetriever
+
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+DEFAULT_PATH = "chroma_db_test"
+# The single collection every document went into before partitioning
+LEGACY_COLLECTION_NAME = "scraped_docs_test"
+# Seconds the partition list is reused before the collections are listed again, so a
+# long-running process picks up partitions created by a separate ingestion run
+PARTITIONS_TTL = 30.0
+
+def document_id(doc: Document) -> str:
+    """Builds a deterministic vector store ID from a document's (source, page, chunk)."""
+    return _metadata_id(doc.metadata)
+
+def _metadata_id(metadata: dict) -> str:
+    key = f"{metadata.get('source', '')}#{metadata.get('page', 0)}#{metadata.get('chunk', 0)}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+def _chroma_metadata(metadata: dict) -> dict:
+    """Chroma only stores scalar metadata values."""
+    return {
+        key: value if isinstance(value, (str, int, float, bool)) else str(value)
+        for key, value in metadata.items() if value is not None
+    }
+
+def _residual_filter(where: dict) -> dict:
+    """Drops the domain/content_type constraints that partition selection already applied."""
+    if not where:
+        return None
+    if "$or" in where:
+        return where
+    if "$and" in where:
+        clauses = [clause for clause in map(_residual_filter, where["$and"]) if clause]
+    else:
+        clauses = [{field: condition} for field, condition in where.items() if field not in ("domain", "content_type")]
+    # Chroma wants exactly one field or operator per filter
+    if len(clauses) > 1:
+        return {"$and": clauses}
+    return clauses[0] if clauses else None
 
 class ChromaDBHandler:
-    """Handles ChromaDB operations using Singleton Pattern."""
+    """
+    Handles ChromaDB operations using Singleton Pattern, one instance per persistent path.
+
+    Documents are partitioned into one collection per (source domain, content type),
+    e.g. "uscis_gov__forms" or "travel_state_gov__visa_bulletin", and tagged with
+    `domain` and `content_type` metadata. Searches are routed only to the partitions
+    that can match their metadata filter; without an explicit filter the filter is
+    derived from the query (see `src.partitions.route`).
+
+    The Chroma client and the embedding model are created lazily on first access;
+    call `warmup()` to load them up front. A BM25 lexical index is kept in step with
+    the collections for identifier lookups and hybrid search.
+    """
+
+    _instances = {}
+
+    def __new__(cls, path: str = DEFAULT_PATH):
+        if path not in cls._instances:
+            instance = super().__new__(cls)
+            instance.path = path
+            instance._client = None
+            instance._embeddings = None
+            instance._collections = {}
+            instance._partitions = None
+            instance._partitions_listed_at = 0.0
+            instance._lexical_index = None
+            instance._batcher = None
+            instance._lock = threading.RLock()
+            cls._instances[path] = instance
+        return cls._instances[path]
+
+    @property
+    def client(self):
+        """The persistent Chroma client."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    import chromadb
+
+                    self._client = chromadb.PersistentClient(path=self.path)
+        return self._client
 
-    _instance = None
+    @property
+    def embeddings(self):
+        """The cached embeddings of the configured backend (see `create_embeddings`); loads the model on first access."""
+        if self._embeddings is None:
+            with self._lock:
+                if self._embeddings is None:
+                    from src.embedding_cache import CachedEmbeddings
+                    from src.embeddings import create_embeddings
 
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance.client = chromadb.PersistentClient(path="chroma_db_test")
+                    backend = create_embeddings()
+                    self._embeddings = CachedEmbeddings(backend, model_name=backend.cache_name)
+        return self._embeddings
 
-            cls._instance.embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+    def collection(self, name: str):
+        """The chromadb collection of a partition (or archive), created if missing."""
+        if name not in self._collections:
+            with self._lock:
+                if name not in self._collections:
+                    self._collections[name] = self.client.get_or_create_collection(name)
+                    self._partitions = None
+        return self._collections[name]
 
-            cls._instance.collection = Chroma(
-                collection_name="scraped_docs_test",
-                embedding_function=cls._instance.embeddings,
-                client=cls._instance.client,
+    def collection_names(self) -> list[str]:
+        """Names of all collections in the store, including archives and the legacy collection."""
+        # chromadb >= 0.6 lists names, older versions Collection objects
+        return sorted(getattr(collection, "name", collection) for collection in self.client.list_collections())
+
+    def partitions(self) -> list[str]:
+        """Names of the searchable partitions, re-listed at most every PARTITIONS_TTL seconds."""
+        partitions = self._partitions
+        if partitions is None or time.monotonic() - self._partitions_listed_at > PARTITIONS_TTL:
+            with self._lock:
+                partitions = self._partitions = [name for name in self.collection_names() if is_partition(name)]
+                self._partitions_listed_at = time.monotonic()
+        return partitions
+
+    @property
+    def batcher(self) -> QueryBatcher:
+        """Micro-batcher merging concurrent `search_batched`/`asearch` calls into `search_many` calls."""
+        if self._batcher is None:
+            with self._lock:
+                if self._batcher is None:
+                    self._batcher = QueryBatcher(self.search_many)
+        return self._batcher
+
+    @property
+    def lexical_index(self) -> LexicalIndex:
+        """The BM25 index over all partitions; backfilled from the collections if it starts out empty."""
+        if self._lexical_index is None:
+            with self._lock:
+                if self._lexical_index is None:
+                    os.makedirs(self.path, exist_ok=True)
+                    index = LexicalIndex(os.path.join(self.path, "lexical_index.db"))
+                    if index.count() == 0 and any(self.collection(name).count() for name in self.partitions()):
+                        self.rebuild_lexical_index(index)
+                    self._lexical_index = index
+        return self._lexical_index
+
+    def rebuild_lexical_index(self, index: LexicalIndex = None, page_size: int = 1000):
+        """Re-indexes every document of every partition into the lexical index."""
+        index = index or self.lexical_index
+        index.clear()
+        for name in self.partitions():
+            for page in self.iter_collection(name, include=["documents"], page_size=page_size):
+                index.add(page["ids"], page["documents"], [name] * len(page["ids"]))
+
+    def iter_collection(self, name: str, include: list[str], page_size: int = 1000) -> Iterator[dict]:
+        """Yields a collection's contents page by page, as returned by `Collection.get`."""
+        collection = self.collection(name)
+        offset = 0
+        while True:
+            page = collection.get(limit=page_size, offset=offset, include=include)
+            if not page["ids"]:
+                break
+            yield page
+            offset += len(page["ids"])
+
+    def migrate_legacy_collection(self, page_size: int = 500) -> int:
+        """
+        Moves the documents of the pre-partitioning single collection into partitions,
+        reusing their stored embeddings, and drops it. Returns the number of documents moved.
+
+        The legacy random IDs are replaced by the deterministic (source, page, chunk) IDs,
+        so re-ingesting a page overwrites its migrated copy; legacy duplicates of the same
+        page collapse into one document.
+        """
+        if LEGACY_COLLECTION_NAME not in self.collection_names():
+            return 0
+        moved = 0
+        for page in self.iter_collection(LEGACY_COLLECTION_NAME, ["documents", "metadatas", "embeddings"], page_size):
+            documents = {}
+            for text, metadata, vector in zip(page["documents"], page["metadatas"], page["embeddings"]):
+                metadata = metadata or {}
+                documents[_metadata_id(metadata)] = (text, metadata, vector)
+            ids = list(documents)
+            texts, metadatas, vectors = (list(column) for column in zip(*documents.values()))
+            self._upsert(ids, texts, metadatas, vectors)
+            moved += len(page["ids"])
+        self.client.delete_collection(LEGACY_COLLECTION_NAME)
+        self._collections.pop(LEGACY_COLLECTION_NAME, None)
+        return moved
+
+    def warmup(self) -> ChromaDBHandler:
+        """Loads the client, the embedding model and the partitions, and runs one search."""
+        self.search("warmup", k=1)
+        return self
+
+    @instrument("vector_add")
+    def add_documents(self, documents: list[Document], ids: list[str] = None) -> list[str]:
+        """Embeds and upserts documents into their partitions under deterministic IDs and returns the IDs."""
+        ids = ids or [document_id(doc) for doc in documents]
+        texts = [doc.page_content for doc in documents]
+        self._upsert(ids, texts, [doc.metadata for doc in documents], self.embeddings.embed_documents(texts))
+        return ids
+
+    def _upsert(self, ids: list[str], texts: list[str], metadatas: list[dict], vectors: list):
+        """Writes documents with precomputed embeddings to their partitions and the lexical index."""
+        groups = {}
+        for i, metadata in enumerate(metadatas):
+            domain, content_type = classify(metadata.get("source", ""))
+            metadata.update(domain=domain, content_type=content_type)
+            groups.setdefault(partition_name(domain, content_type), []).append(i)
+
+        partitions = [None] * len(ids)
+        for name, indices in groups.items():
+            self.collection(name).upsert(
+                ids=[ids[i] for i in indices],
+                embeddings=[vectors[i] for i in indices],
+                documents=[texts[i] for i in indices],
+                metadatas=[_chroma_metadata(metadatas[i]) for i in indices],
             )
-        return cls._instance
-
-    def add_documents(self, documents: list[Document]):
-        """Adds documents to the vector store."""
-        self.collection.add_documents(documents)
-
-    def search(self, query: str, k: 5):
-        """Performs a search on the vector store."""
-        return self.collection.similarity_search(query, k=k)
-    
-    def get_retriever(self) -> VectorStoreRetriever:
-        """Returns a retriever for LangChain."""
-        return self.collection.as_retriever(search_kwargs={"k": 5})
+            for i in indices:
+                partitions[i] = name
+        self.lexical_index.add(ids, texts, partitions)
+
+    def delete_documents(self, ids: list[str]):
+        """Removes documents from the vector store by ID."""
+        if not ids:
+            return
+        for name, group in self._locate(ids).items():
+            self.collection(name).delete(ids=group)
+        self.lexical_index.delete(ids)
+
+    def archive_documents(self, ids: list[str]):
+        """Moves documents, with their embeddings, from their partitions to the partitions' archive collections."""
+        for name, group in self._locate(ids).items():
+            page = self.collection(name).get(ids=group, include=["documents", "metadatas", "embeddings"])
+            if page["ids"]:
+                self.collection(ARCHIVE_PREFIX + name).upsert(
+                    ids=page["ids"], documents=page["documents"], metadatas=page["metadatas"],
+                    embeddings=list(page["embeddings"]),
+                )
+        self.delete_documents(ids)
+
+    def get_documents(self, ids: list[str]) -> list[Document]:
+        """Fetches documents by ID, preserving the order of the IDs. Does not load the embedding model."""
+        from langchain.schema import Document
+
+        found = {}
+        for name, group in self._locate(ids).items():
+            result = self.collection(name).get(ids=group, include=["documents", "metadatas"])
+            found.update(
+                (doc_id, Document(id=doc_id, page_content=text, metadata=metadata or {}))
+                for doc_id, text, metadata in zip(result["ids"], result["documents"], result["metadatas"])
+            )
+        return [found[doc_id] for doc_id in ids if doc_id in found]
+
+    def _locate(self, ids: list[str]) -> dict[str, list[str]]:
+        """Groups IDs by the partition holding them; IDs the lexical index does not know go to every partition."""
+        groups = {}
+        unknown = []
+        for doc_id, partition in zip(ids, map(self.lexical_index.locate(ids).get, ids)):
+            if partition:
+                groups.setdefault(partition, []).append(doc_id)
+            else:
+                unknown.append(doc_id)
+        if unknown:
+            for name in self.partitions():
+                groups.setdefault(name, []).extend(unknown)
+        return groups
+
+    @instrument("vector_search")
+    def search(self, query: str, k: int = 5, where: dict = None) -> list[Document]:
+        """
+        Performs a dense similarity search on the partitions matching the metadata filter.
+        Without a filter the query is routed by `src.partitions.route`; pass `where={}`
+        to search every partition.
+        """
+        return self._query([query], self.embeddings.embed_queries([query]), k, [where])[0]
+
+    @instrument("vector_search_many")
+    def search_many(self, queries: list[str], k: int = 5, where: dict = None) -> list[list[Document]]:
+        """Embeds all queries in one batch and looks them up with one vector query per partition."""
+        if not queries:
+            return []
+        return self._query(queries, self.embeddings.embed_queries(queries), k, [where] * len(queries))
+
+    def _query(self, queries: list[str], vectors: list, k: int, wheres: list[dict]) -> list[list[Document]]:
+        from langchain.schema import Document
+
+        routed = [where is None for where in wheres]
+        wheres = [route_query(query) if where is None else where for query, where in zip(queries, wheres)]
+        results = self._query_partitions(vectors, k, wheres)
+
+        # A query routed by its wording that found too little falls back to every partition
+        retry = [i for i, found in enumerate(results) if routed[i] and wheres[i] and len(found) < k]
+        if retry:
+            for i, found in zip(retry, self._query_partitions([vectors[i] for i in retry], k, [{}] * len(retry))):
+                results[i] = found
+        for where in wheres:
+            metrics.increment("immigo_partition_route_total", routed=str(bool(where)).lower())
+
+        return [
+            [Document(id=doc_id, page_content=text, metadata=metadata or {}) for _, doc_id, text, metadata in found]
+            for found in results
+        ]
+
+    def _query_partitions(self, vectors: list, k: int, wheres: list[dict]) -> list[list[tuple]]:
+        """Returns the k nearest (distance, id, text, metadata) per vector across its selected partitions."""
+        targets = {}
+        for i, where in enumerate(wheres):
+            for name in select_partitions(self.partitions(), where):
+                targets.setdefault((name, json.dumps(where, sort_keys=True)), []).append(i)
+
+        found = [[] for _ in vectors]
+        for (name, where), indices in targets.items():
+            result = self.collection(name).query(
+                query_embeddings=[vectors[i] for i in indices], n_results=k,
+                where=_residual_filter(json.loads(where)), include=["documents", "metadatas", "distances"],
+            )
+            for i, ids, texts, metadatas, distances in zip(
+                indices, result["ids"], result["documents"], result["metadatas"], result["distances"]
+            ):
+                found[i].extend(zip(distances, ids, texts, metadatas))
+        return [sorted(candidates, key=lambda candidate: candidate[0])[:k] for candidates in found]
+
+    def search_batched(self, query: str, k: int = 5) -> list[Document]:
+        """Like `search`, but micro-batched with concurrent callers; for threaded servers."""
+        return self.batcher.submit(query, k).result()
+
+    async def asearch(self, query: str, k: int = 5) -> list[Document]:
+        """Async `search`; concurrent calls within the batching window share one embedding and lookup."""
+        return await asyncio.wrap_future(self.batcher.submit(query, k))
+
+    async def asearch_many(self, queries: list[str], k: int = 5) -> list[list[Document]]:
+        """Async `search_many`."""
+        return await asyncio.to_thread(self.search_many, queries, k)
+
+    @instrument("hybrid_search")
+    def hybrid_search(self, query: str, k: int = 5, route: str = "auto", rrf_k: int = 60,
+                      lexical_weight: float = 1.0, vector_weight: float = 1.0, fetch_k: int = None,
+                      where: dict = None, batched: bool = False) -> list[Document]:
+        """
+        Retrieves documents with BM25, dense search or a reciprocal-rank fusion of both.
+
+        :param query: The user query
+        :param k: Number of documents returned
+        :param route: "lexical", "vector", "hybrid", or "auto" to answer identifier lookups
+                      such as "I-129F" from the lexical index alone, without embedding the query
+        :param rrf_k: Rank constant of the fusion; a document ranked r scores weight / (rrf_k + r)
+        :param lexical_weight: Weight of the BM25 ranking in the fusion
+        :param vector_weight: Weight of the dense ranking in the fusion
+        :param fetch_k: Candidates taken from each ranking before fusion, defaults to max(4k, 20)
+        :param where: Metadata filter selecting the partitions searched, routed from the query if not given
+        :param batched: Micro-batch the dense lookup with concurrent callers; ignored with an explicit filter
+        """
+        if route not in ("auto", "lexical", "vector", "hybrid"):
+            raise ValueError(f"Unknown route {route!r}.")
+        fetch_k = fetch_k or max(4 * k, 20)
+
+        lexical_ids = []
+        if route != "vector":
+            scope = route_query(query) if where is None else where
+            partitions = select_partitions(self.partitions(), scope) if scope else None
+            lexical_ids = [doc_id for doc_id, _ in self.lexical_index.search(query, k=fetch_k, partitions=partitions)]
+        if route == "auto":
+            route = "lexical" if lexical_ids and is_identifier_query(query) else "hybrid"
+        metrics.increment("immigo_retrieval_route_total", route=route)
+
+        if route == "lexical":
+            return self.get_documents(lexical_ids[:k])
+        if batched and where is None:
+            vector_docs = self.search_batched(query, k=fetch_k if route == "hybrid" else k)
+        else:
+            vector_docs = self.search(query, k=fetch_k if route == "hybrid" else k, where=where)
+        if route == "vector":
+            return vector_docs
+
+        documents = {doc.id or document_id(doc): doc for doc in vector_docs}
+        scores = {}
+        for weight, ranking in ((lexical_weight, lexical_ids), (vector_weight, list(documents))):
+            for rank, doc_id in enumerate(ranking, start=1):
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight / (rrf_k + rank)
+
+        best = sorted(scores, key=scores.get, reverse=True)[:k]
+        documents.update((doc.id, doc) for doc in self.get_documents([doc_id for doc_id in best if doc_id not in documents]))
+        return [documents[doc_id] for doc_id in best if doc_id in documents]
+
+    async def ahybrid_search(self, query: str, **kwargs) -> list[Document]:
+        """Async `hybrid_search` with the dense lookup micro-batched; takes the same keyword arguments."""
+        return await asyncio.to_thread(self.hybrid_search, query, **{"batched": True, **kwargs})
+
+    def get_retriever(self, k: int = 5, **search_kwargs) -> BaseRetriever:
+        """Returns a LangChain retriever over `hybrid_search`; keyword arguments configure the fusion."""
+        from src.retriever import HybridRetriever
+
+        return HybridRetriever(chroma_db=self, k=k, search_kwargs=search_kwargs)
@@ -0,0 +1,170 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from langchain_core.embeddings import Embeddings
+from src.metrics import metrics
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Content-addressed cache in front of another Embeddings implementation.
+
+    Vectors are keyed by a hash of the model name and the whitespace-normalized text and
+    are kept in two tiers: an in-memory LRU and an on-disk SQLite store of float32 blobs.
+    The disk store is bounded by evicting the least recently used entries.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str, path: str = "embedding_cache.db",
+                 memory_entries: int = 10_000, max_disk_entries: int = 1_000_000, symmetric: bool = True):
+        """
+        :param embeddings: The underlying embeddings used on a cache miss
+        :param model_name: Name of the underlying model, part of every cache key
+        :param path: SQLite file holding the on-disk tier
+        :param memory_entries: Capacity of the in-memory LRU tier
+        :param max_disk_entries: Number of vectors kept on disk before eviction
+        :param symmetric: The model embeds queries and documents identically (true for all-MiniLM-L6-v2),
+                          so several uncached queries can be encoded with one `embed_documents` call
+        """
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.memory_entries = memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.symmetric = symmetric
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+        self._disk_entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def key(self, text: str, kind: str = "document") -> str:
+        """Returns the cache key for a text; documents and queries are cached separately."""
+        normalized = " ".join(text.split())
+        return hashlib.sha256(f"{self.model_name}\0{kind}\0{normalized}".encode("utf-8")).hexdigest()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embeds texts, encoding only those not already cached, in a single batch."""
+        return self._embed(texts, "document")
+
+    def embed_query(self, text: str) -> list[float]:
+        """Embeds a query string, served from the cache when possible."""
+        return self._embed([text], "query")[0]
+
+    def embed_queries(self, texts: list[str]) -> list[list[float]]:
+        """Embeds several query strings, encoding the uncached ones in a single batch."""
+        return self._embed(texts, "query")
+
+    def stats(self) -> dict:
+        """Returns hit/miss counters and tier sizes."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "memory_entries": len(self._memory),
+            "disk_entries": self._disk_entries,
+        }
+
+    def _embed(self, texts: list[str], kind: str) -> list[list[float]]:
+        keys = [self.key(text, kind) for text in texts]
+        vectors = dict(zip(keys, self._lookup(keys)))
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if vectors[key] is None:
+                missing.setdefault(key, text)
+        misses = sum(1 for key in keys if key in missing)
+        with self._lock:
+            self.hits += len(keys) - misses
+            self.misses += misses
+        metrics.increment("immigo_embedding_cache_hits_total", len(keys) - misses)
+        metrics.increment("immigo_embedding_cache_misses_total", misses)
+
+        if missing:
+            with metrics.timer("embed", kind=kind):
+                if kind == "query" and (len(missing) == 1 or not self.symmetric):
+                    encoded = [self.embeddings.embed_query(text) for text in missing.values()]
+                else:
+                    encoded = self.embeddings.embed_documents(list(missing.values()))
+            # Returned as stored, so a text embeds identically whether or not it was cached
+            vectors.update(self._store(dict(zip(missing, encoded))))
+
+        return [list(vectors[key]) for key in keys]
+
+    def _lookup(self, keys: list[str]) -> list:
+        """Returns cached vectors (or None) for the keys, checking memory before disk."""
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+
+            on_disk = [key for key in dict.fromkeys(keys) if key not in found]
+            for start in range(0, len(on_disk), 500):
+                batch = on_disk[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[key] = vector
+                    self._remember(key, vector)
+                if rows:
+                    self._conn.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE key = ?", [(time.time(), key) for key, _ in rows]
+                    )
+            self._conn.commit()
+        return [found.get(key) for key in keys]
+
+    def _store(self, encoded: dict) -> dict:
+        """Caches the vectors in both tiers and returns them as the stored float32 arrays."""
+        now = time.time()
+        stored = {}
+        with self._lock:
+            rows = []
+            for key, vector in encoded.items():
+                vector = stored[key] = array("f", vector)
+                self._remember(key, vector)
+                rows.append((key, vector.tobytes(), now))
+            # Another thread may have stored the same key since the lookup; replacing it adds no entry
+            existing = len(self._on_disk(list(encoded)))
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)", rows)
+            self._disk_entries += len(rows) - existing
+
+            if self._disk_entries > self.max_disk_entries:
+                # Evict down to 90% of capacity so eviction runs in occasional bulk deletes
+                excess = self._disk_entries - int(self.max_disk_entries * 0.9)
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                    (excess,),
+                )
+                self._disk_entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            self._conn.commit()
+        return stored
+
+    def _on_disk(self, keys: list[str]) -> set[str]:
+        """Returns the keys that already have a row in the disk tier."""
+        found = set()
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            rows = self._conn.execute(
+                f"SELECT key FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch
+            )
+            found.update(row[0] for row in rows)
+        return found
+
+    def _remember(self, key: str, vector: array):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
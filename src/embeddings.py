@@ -0,0 +1,165 @@
+import atexit
+import os
+import threading
+from typing import Iterator
+from langchain_core.embeddings import Embeddings
+from src.database import EMBEDDING_MODEL_NAME
+from src.errors import ConfigurationError
+
+BACKENDS = ("sentence-transformers", "onnx")
+
+
+def length_sorted_batches(texts: list[str], batch_size: int) -> Iterator[tuple[list[int], list[str]]]:
+    """
+    Yields (indices, texts) batches ordered by text length, longest first, so each
+    batch pads to a similar length instead of to the longest text in a random mix.
+    """
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+    for start in range(0, len(order), batch_size):
+        indices = order[start:start + batch_size]
+        yield indices, [texts[i] for i in indices]
+
+
+class SentenceTransformerEmbeddings(Embeddings):
+    """
+    sentence-transformers encoder for CPU boxes, optionally fanned out over a pool of
+    worker processes for large `embed_documents` calls.
+    """
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL_NAME, batch_size: int = 32, processes: int = 0,
+                 pool_min_texts: int = 256):
+        """
+        :param model_name: sentence-transformers model to load
+        :param batch_size: Texts encoded per forward pass
+        :param processes: Worker processes for document encoding; 0 or 1 encodes in this process
+        :param pool_min_texts: Smaller calls are encoded in this process, where they are cheaper than a pool round trip
+        """
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.batch_size = batch_size
+        self.processes = processes
+        self.pool_min_texts = pool_min_texts
+        self.cache_name = model_name
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embeds texts, using the process pool for large calls."""
+        if self.processes > 1 and len(texts) >= self.pool_min_texts:
+            # The pool splits its input into contiguous chunks, one per task, so sort
+            # globally first to keep the texts of each chunk close in length
+            vectors = [None] * len(texts)
+            order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+            encoded = self.model.encode_multi_process(
+                [texts[i] for i in order], self._get_pool(), batch_size=self.batch_size
+            )
+            for i, vector in zip(order, encoded):
+                vectors[i] = vector.tolist()
+            return vectors
+        # SentenceTransformer.encode already length-sorts within the call
+        return self.model.encode(texts, batch_size=self.batch_size, convert_to_numpy=True).tolist()
+
+    def embed_query(self, text: str) -> list[float]:
+        """Embeds a query in this process."""
+        return self.model.encode([text], batch_size=1, convert_to_numpy=True)[0].tolist()
+
+    def close(self):
+        """Stops the worker processes."""
+        with self._lock:
+            if self._pool is not None:
+                self.model.stop_multi_process_pool(self._pool)
+                self._pool = None
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = self.model.start_multi_process_pool(["cpu"] * self.processes)
+                atexit.register(self.close)
+            return self._pool
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    ONNX Runtime encoder for a locally exported all-MiniLM-L6-v2, optionally int8-quantized.
+
+    `model_path` is a directory holding the tokenizer files and `model.onnx` (or
+    `model_quantized.onnx` when `quantized` is set), as written by batch/export_onnx.py.
+    Outputs are mean-pooled and L2-normalized like the sentence-transformers pipeline.
+    """
+
+    def __init__(self, model_path: str, quantized: bool = False, batch_size: int = 32, threads: int = None,
+                 max_length: int = 256):
+        """
+        :param model_path: Directory of the exported model and tokenizer
+        :param quantized: Load the int8-quantized model
+        :param batch_size: Texts encoded per forward pass
+        :param threads: ONNX Runtime intra-op threads, defaults to all cores
+        :param max_length: Token length texts are truncated to
+        """
+        import onnxruntime
+        from transformers import AutoTokenizer
+
+        model_file = "model_quantized.onnx" if quantized else "model.onnx"
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(
+            os.path.join(model_path, model_file), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {node.name for node in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(model_path)
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.cache_name = f"{EMBEDDING_MODEL_NAME}:onnx{'-int8' if quantized else ''}"
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embeds texts in length-sorted batches."""
+        vectors = [None] * len(texts)
+        for indices, batch in length_sorted_batches(texts, self.batch_size):
+            for i, vector in zip(indices, self._encode(batch)):
+                vectors[i] = vector.tolist()
+        return vectors
+
+    def embed_query(self, text: str) -> list[float]:
+        """Embeds a query string."""
+        return self._encode([text])[0].tolist()
+
+    def _encode(self, texts: list[str]):
+        import numpy as np
+
+        inputs = self.tokenizer(texts, padding=True, truncation=True, max_length=self.max_length, return_tensors="np")
+        feed = {name: value.astype(np.int64) for name, value in inputs.items() if name in self.input_names}
+        token_embeddings = self.session.run(None, feed)[0]
+        mask = inputs["attention_mask"][..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+
+def create_embeddings(backend: str = None, **options) -> Embeddings:
+    """
+    Builds the configured embedding backend. Without arguments the configuration is
+    read from the environment:
+
+    - IMMIGO_EMBEDDING_BACKEND: "sentence-transformers" (default) or "onnx"
+    - IMMIGO_EMBEDDING_BATCH_SIZE: texts per forward pass, default 32
+    - IMMIGO_EMBEDDING_PROCESSES: encode worker processes for sentence-transformers, default 0
+    - IMMIGO_ONNX_MODEL_PATH: exported model directory for the onnx backend
+    - IMMIGO_ONNX_QUANTIZED: set to 1 to load the int8 model
+
+    The returned embeddings have a `cache_name` that differs per backend and precision,
+    so vectors from different backends never share embedding cache entries.
+    """
+    backend = backend or os.getenv("IMMIGO_EMBEDDING_BACKEND", "sentence-transformers")
+    options.setdefault("batch_size", int(os.getenv("IMMIGO_EMBEDDING_BATCH_SIZE", "32")))
+
+    if backend == "sentence-transformers":
+        options.setdefault("processes", int(os.getenv("IMMIGO_EMBEDDING_PROCESSES", "0")))
+        return SentenceTransformerEmbeddings(**options)
+    if backend == "onnx":
+        options.setdefault("model_path", os.getenv("IMMIGO_ONNX_MODEL_PATH"))
+        options.setdefault("quantized", os.getenv("IMMIGO_ONNX_QUANTIZED", "") not in ("", "0"))
+        if not options["model_path"]:
+            raise ConfigurationError("IMMIGO_ONNX_MODEL_PATH must point at an exported model for the onnx backend.")
+        return OnnxEmbeddings(**options)
+    raise ValueError(f"Unknown embedding backend {backend!r}, expected one of {BACKENDS}.")
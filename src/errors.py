@@ -0,0 +1,2 @@
+class ConfigurationError(EnvironmentError):
+    """Raised when a required setting, such as an API key or a model path, is missing or invalid."""
@@ -0,0 +1,113 @@
+import re
+from urllib.parse import urljoin
+import lxml.html
+from lxml import etree
+from src.trie import literal_tokens, trie_pattern
+
+# Page chrome dropped before extracting the main content. <form> is kept: ASP.NET-style
+# pages wrap their whole body in one
+BOILERPLATE_TAGS = ("script", "style", "noscript", "template", "svg", "nav", "aside")
+# Page-level <header>/<footer> only; those of an article or section carry its title and notes
+PAGE_CHROME_XPATH = etree.XPath(
+    "//header[not(ancestor::main or ancestor::article or ancestor::section or ancestor::*[@role='main'])]"
+    "|//footer[not(ancestor::main or ancestor::article or ancestor::section or ancestor::*[@role='main'])]"
+)
+BOILERPLATE_ROLES = ("navigation", "banner", "contentinfo", "search", "complementary")
+MAIN_REGION_XPATHS = ("//main", "//*[@role='main']", "//article", "//*[@id='main-content']", "//body")
+HEADING_TAGS = ("h1", "h2", "h3")
+# Elements whose text should not run into the next block's text
+BLOCK_TAGS = frozenset(
+    "p div section article main li ul ol dl dt dd table tr td th br h1 h2 h3 h4 h5 h6 blockquote pre".split()
+)
+
+NEXT_LINK_XPATH = etree.XPath(
+    "(//a|//link)[@href][contains(concat(' ', normalize-space(@rel), ' '), ' next ')]"
+)
+
+
+class PrefixMatcher:
+    """Tests URLs against a set of prefixes with one trie-shaped regex instead of a startswith per prefix."""
+
+    def __init__(self, prefixes: list[str]):
+        self.prefixes = sorted(set(prefixes))
+        pattern = trie_pattern([literal_tokens(prefix) for prefix in self.prefixes])
+        self._pattern = re.compile(pattern) if self.prefixes else None
+
+    def matches(self, url: str) -> bool:
+        """True if the URL starts with one of the prefixes."""
+        return self._pattern is not None and self._pattern.match(url) is not None
+
+
+class HTMLPage:
+    """
+    A page parsed once with lxml's C parser, from which the main content, the
+    WebBaseLoader-style metadata and the links can all be extracted.
+    """
+
+    def __init__(self, markup, url: str):
+        """
+        :param markup: The page as text, or as bytes to let lxml pick up the declared charset
+        :param url: The page URL, used to resolve relative links
+        """
+        self.url = url
+        try:
+            self.root = lxml.html.document_fromstring(markup)
+        except ValueError:
+            # lxml rejects str input that carries an XML encoding declaration
+            self.root = lxml.html.document_fromstring(markup.encode("utf-8"))
+        except etree.ParserError:
+            # Empty document
+            self.root = lxml.html.document_fromstring("<html></html>")
+
+    def metadata(self) -> dict:
+        """Returns source, title, description and language, as LangChain's WebBaseLoader does."""
+        metadata = {"source": self.url}
+        if (title := self.root.find(".//title")) is not None:
+            metadata["title"] = title.text_content()
+        if description := self.root.xpath("//meta[@name='description']"):
+            metadata["description"] = description[0].get("content", "No description found.")
+        metadata["language"] = self.root.get("lang", "No language found.")
+        return metadata
+
+    def main_text(self) -> str:
+        """
+        Returns the text of the main content region (<main>, role=main or <article>,
+        else <body>) with navigation, the page header and footer and scripts dropped.
+        Headings outside the region, such as a page title above <main>, are kept in front.
+
+        The chrome is stripped from the parsed tree in place, so extract links first
+        when both are needed.
+        """
+        root = self.root
+        etree.strip_elements(root, etree.Comment, *BOILERPLATE_TAGS, with_tail=False)
+        chrome = PAGE_CHROME_XPATH(root)
+        chrome += [element for element in root.xpath("//*[@role]") if element.get("role") in BOILERPLATE_ROLES]
+        for element in chrome:
+            if element.getparent() is not None:
+                element.drop_tree()
+
+        region = next((found[0] for xpath in MAIN_REGION_XPATHS if (found := root.xpath(xpath))), root)
+        headings = [heading for heading in root.iter(*HEADING_TAGS) if region not in heading.iterancestors()]
+        for element in region.iter(*BLOCK_TAGS):
+            # Keep block elements on their own lines instead of running their text together
+            element.tail = "\n" + (element.tail or "")
+        return "\n".join(filter(None, [*map(self._text, headings), self._text(region)]))
+
+    def links(self, base_url: str = None, matcher: PrefixMatcher = None) -> set[str]:
+        """Returns the absolute URLs of all anchors, resolved against base_url (default: the page URL)."""
+        base_url = base_url or self.url
+        urls = set()
+        for href in self.root.xpath("//a/@href"):
+            url = urljoin(base_url, href.strip())
+            if matcher is None or matcher.matches(url):
+                urls.add(url)
+        return urls
+
+    def next_url(self) -> str:
+        """Returns the absolute URL of the rel="next" pagination link, if any."""
+        found = NEXT_LINK_XPATH(self.root)
+        return urljoin(self.url, found[0].get("href")) if found else None
+
+    @staticmethod
+    def _text(element) -> str:
+        return re.sub(r"\s*\n\s*", "\n", "".join(element.itertext())).strip()
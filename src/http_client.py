@@ -0,0 +1,58 @@
+import threading
+import time
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# Requests per second allowed against each government host.
+DEFAULT_HOST_RATES = {
+    "www.uscis.gov": 4.0,
+    "uscis.gov": 4.0,
+    "travel.state.gov": 2.0,
+}
+
+_local = threading.local()
+
+
+def get_session(pool_size: int = 16) -> requests.Session:
+    """Returns a pooled requests.Session bound to the calling thread."""
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=2)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers["User-Agent"] = USER_AGENT
+        _local.session = session
+    return session
+
+
+class HostRateLimiter:
+    """Spaces out requests so that each host never sees more than its configured rate."""
+
+    def __init__(self, host_rates: dict = None, default_rate: float = None):
+        """
+        :param host_rates: Mapping of hostname to allowed requests per second
+        :param default_rate: Rate for hosts not listed in host_rates, None for unlimited
+        """
+        self.host_rates = DEFAULT_HOST_RATES if host_rates is None else host_rates
+        self.default_rate = default_rate
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url: str):
+        """Blocks until a request to the URL's host is allowed."""
+        host = urlparse(url).hostname or ""
+        rate = self.host_rates.get(host, self.default_rate)
+        if not rate:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + 1.0 / rate
+
+        if slot > now:
+            time.sleep(slot - now)
@@ -0,0 +1,218 @@
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src.scraper import ScraperFactory, NotModifiedError
+from src.manifest import IngestionManifest
+from src.chunker import TokenChunker, ChunkBatcher
+from src.http_client import HostRateLimiter, get_session
+from src.database import ChromaDBHandler
+from utils import clean_text
+
+
+class IngestionCheckpoint:
+    """Append-only record of URLs that finished ingesting, so an interrupted run can resume."""
+
+    def __init__(self, path: str = "ingestion_checkpoint.jsonl"):
+        self.path = path
+
+    def load(self) -> set:
+        """Returns the URLs completed by the current (unfinished) run."""
+        done = set()
+        try:
+            with open(self.path, "r") as file:
+                for line in file:
+                    try:
+                        done.add(json.loads(line)["url"])
+                    except (ValueError, KeyError):
+                        continue  # A torn last line from a crash is simply ignored
+        except FileNotFoundError:
+            pass
+        return done
+
+    def mark_done(self, url: str, num_documents: int):
+        """Records a URL as fully indexed."""
+        with open(self.path, "a") as file:
+            file.write(json.dumps({"url": url, "documents": num_documents, "ts": time.time()}) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+
+    def clear(self):
+        """Forgets all progress once a run has completed."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class IngestionEngine:
+    """
+    Two-stage ingestion pipeline.
+
+    A bounded thread pool fetches URLs over pooled HTTP sessions, respecting per-host
+    rate limits, and hands the scraped documents to a bounded queue. The calling thread
+    drains the queue, cleaning each URL's documents and splitting them into token
+    chunks that are gathered across URLs into fixed-size batches, each embedded and
+    upserted in one call. A URL is recorded in the checkpoint once all of its chunks
+    have been written.
+
+    Fetches are conditional on the validators stored in the ingestion manifest, and
+    pages whose cleaned content hash is unchanged are not re-embedded. Changed pages
+    are upserted under deterministic IDs and their stale chunks are deleted. URLs
+    tombstoned by compaction stay removed while they redirect elsewhere or their
+    validators are unchanged.
+    """
+
+    def __init__(self, chroma_db: ChromaDBHandler = None, max_workers: int = 8, queue_size: int = 32,
+                 rate_limiter: HostRateLimiter = None, checkpoint: IngestionCheckpoint = None,
+                 manifest: IngestionManifest = None, chunker: TokenChunker = None, batch_size: int = 256):
+        """
+        :param chroma_db: Vector store handler, defaults to the ChromaDBHandler singleton
+        :param max_workers: Number of concurrent fetch threads
+        :param queue_size: Maximum number of scraped URLs waiting to be indexed
+        :param rate_limiter: Per-host rate limiter shared by all fetch threads
+        :param checkpoint: Checkpoint used to resume interrupted runs
+        :param manifest: Per-URL record of validators, content hashes and chunk IDs
+        :param chunker: Token-based splitter applied between cleaning and indexing
+        :param batch_size: Number of chunks embedded and upserted per vector store call
+        """
+        self.chroma_db = chroma_db or ChromaDBHandler()
+        self.max_workers = max_workers
+        self.queue_size = queue_size
+        self.rate_limiter = rate_limiter or HostRateLimiter()
+        self.checkpoint = checkpoint or IngestionCheckpoint()
+        self.manifest = manifest or IngestionManifest()
+        self.chunker = chunker or TokenChunker()
+        self.batcher = ChunkBatcher(self.chroma_db, batch_size, on_complete=self._on_indexed, on_error=self._on_failed)
+        self._in_flight = {}
+        self._stats = {}
+        # Set when a run is aborted, so fetch threads stop waiting for room in the queue
+        self._stop = threading.Event()
+
+    def fetch(self, url: str, headers: dict, results: queue.Queue):
+        """Fetch stage: scrapes a URL (conditionally) and queues the result for indexing."""
+        try:
+            self.rate_limiter.wait(url)
+            scraper = ScraperFactory.get_scraper(ScraperFactory.get_file_type(url), session=get_session())
+            documents = scraper.scrape(url, headers=headers)
+            self._put(results, (url, documents, scraper.validators, scraper.final_url, None))
+        except Exception as e:
+            self._put(results, (url, None, None, None, e))
+
+    def _put(self, results: queue.Queue, item: tuple):
+        """Queues a fetch result, giving up once the run has been aborted."""
+        while not self._stop.is_set():
+            try:
+                results.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def still_removed(self, url: str, validators: dict, final_url: str) -> bool:
+        """
+        True if compaction removed the URL and the fetch shows no new version of it: it
+        redirected elsewhere (the target is ingested under its own URL) or its
+        validators are the ones it had when it was removed.
+        """
+        entry = self.manifest.get(url)
+        if not entry or not entry["removed_reason"]:
+            return False
+        if final_url and final_url != url:
+            return True
+        return (validators.get("etag"), validators.get("last_modified")) == (entry["etag"], entry["last_modified"])
+
+    def index(self, url: str, documents: list, validators: dict) -> bool:
+        """
+        Index stage: cleans the documents of one URL and streams their chunks into the batcher.
+
+        Returns False if the cleaned content is unchanged since the last ingestion.
+        """
+        for doc in documents:
+            doc.page_content = clean_text(doc.page_content, domain=url)
+        documents = [doc for doc in documents if doc.page_content]
+        if not documents:
+            # Treated as a failure so the URL's existing chunks are kept
+            raise ValueError("no content left after cleaning")
+
+        content_hash = self.manifest.content_hash([doc.page_content for doc in documents])
+        entry = self.manifest.get(url)
+        if entry and entry["content_hash"] == content_hash:
+            self.manifest.touch(url, validators)
+            return False
+
+        self._in_flight[url] = (entry, validators, content_hash)
+        self.batcher.add(url, self.chunker.split_documents(documents))
+        return True
+
+    def _on_indexed(self, url: str, ids: list[str]):
+        """Called by the batcher once every chunk of a URL has been upserted."""
+        entry, validators, content_hash = self._in_flight.pop(url)
+        if entry:
+            self.chroma_db.delete_documents(sorted(set(entry["chunk_ids"]) - set(ids)))
+        self.manifest.record(url, validators, content_hash, ids)
+        self.checkpoint.mark_done(url, len(ids))
+        self._stats["indexed"] += 1
+        self._stats["documents"] += len(ids)
+        print(f"Successfully added {len(ids)} chunk(s) from {url}")
+
+    def _on_failed(self, url: str, error: Exception):
+        """Called by the batcher when a batch holding chunks of a URL could not be written."""
+        self._in_flight.pop(url, None)
+        self._stats["failed"] += 1
+        print(f"Failed to process {url}: {str(error)}")
+
+    def run(self, urls: list) -> dict:
+        """Ingests the URLs, skipping any already completed by an interrupted earlier run."""
+        done = self.checkpoint.load()
+        pending = [url for url in dict.fromkeys(urls) if url not in done]
+        stats = self._stats = {"skipped": len(done), "indexed": 0, "unchanged": 0, "removed": 0, "failed": 0,
+                               "documents": 0}
+        if done:
+            print(f"Resuming ingestion: {len(done)} URL(s) already done, {len(pending)} remaining")
+
+        results = queue.Queue(maxsize=self.queue_size)
+        self._stop.clear()
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            for url in pending:
+                executor.submit(self.fetch, url, self.manifest.conditional_headers(url), results)
+
+            for _ in range(len(pending)):
+                url, documents, validators, final_url, error = results.get()
+                if isinstance(error, NotModifiedError):
+                    self.manifest.touch(url)
+                    self.checkpoint.mark_done(url, 0)
+                    stats["unchanged"] += 1
+                    continue
+                if error is not None or not documents:
+                    stats["failed"] += 1
+                    print(f"Failed to process {url}: {error or 'no documents'}")
+                    continue
+                if self.still_removed(url, validators, final_url):
+                    self.manifest.touch(url)
+                    self.checkpoint.mark_done(url, 0)
+                    stats["removed"] += 1
+                    continue
+                try:
+                    changed = self.index(url, documents, validators)
+                except Exception as e:
+                    self._in_flight.pop(url, None)
+                    stats["failed"] += 1
+                    print(f"Failed to process {url}: {str(e)}")
+                    continue
+                if not changed:
+                    self.checkpoint.mark_done(url, 0)
+                    stats["unchanged"] += 1
+
+            self.batcher.flush()
+        except BaseException:
+            # Leave the checkpoint in place so the next run resumes from here; fetch threads
+            # blocked on the full queue must be released or the interpreter cannot exit
+            self._stop.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown()
+
+        # The run reached the end, so the next one starts a fresh pass
+        self.checkpoint.clear()
+        return stats
@@ -0,0 +1,318 @@
+import heapq
+import math
+import re
+import sqlite3
+import threading
+from collections import Counter, OrderedDict
+from src.metrics import instrument
+
+# Form numbers (I-129F, N-400, DS-160, H-1B), fiscal years (FY25) and statute
+# citations (245(k), 212(a)(9)(B)) are kept whole; everything else splits on non-alphanumerics
+FISCAL_YEAR = r"fy\d{2}(?:\d{2})?"
+FORM_NUMBER = r"[a-z]{1,3}-?\d+[a-z]*"
+CITATION = r"\d+[a-z]?(?:\([a-z0-9]+\))+"
+TOKEN_PATTERN = re.compile(rf"\b(?:{FISCAL_YEAR}|{FORM_NUMBER}|{CITATION})(?![\w-])|[a-z0-9]+")
+IDENTIFIER_PATTERN = re.compile(rf"(?:{FISCAL_YEAR}|{FORM_NUMBER}|{CITATION})")
+FORM_PARTS = re.compile(r"([a-z]{1,3})-?(\d+[a-z]*)")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it of on or the to what when where which who "
+    "with my me form forms".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercases and tokenizes text, normalizing form numbers so "I129F" and "I-129F" match."""
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if not re.fullmatch(FISCAL_YEAR, token):
+            token = FORM_PARTS.sub(r"\1-\2", token) if re.fullmatch(FORM_NUMBER, token) else token
+        tokens.append(token)
+    return tokens
+
+
+def is_identifier(token: str) -> bool:
+    """True for form numbers, fiscal years and statute citations."""
+    return IDENTIFIER_PATTERN.fullmatch(token) is not None
+
+
+def is_identifier_query(query: str) -> bool:
+    """
+    True if the query is essentially an exact identifier lookup, e.g. "I-129F",
+    "FY25 cap" or "INA 245(k)": at least one identifier and at most one other word.
+    """
+    terms = [token for token in tokenize(query) if token not in STOPWORDS]
+    identifiers = sum(1 for token in terms if is_identifier(token))
+    return identifiers > 0 and len(terms) - identifiers <= 1
+
+
+def encode_postings(postings: list[tuple[int, int]]) -> bytes:
+    """Encodes sorted (doc_no, term_frequency) pairs as delta-encoded varints."""
+    out = bytearray()
+    previous = 0
+    for doc_no, tf in postings:
+        for value in (doc_no - previous, tf):
+            while value >= 0x80:
+                out.append((value & 0x7F) | 0x80)
+                value >>= 7
+            out.append(value)
+        previous = doc_no
+    return bytes(out)
+
+
+# Bytes with the continuation bit set; every other byte ends a varint
+CONTINUATION_BYTES = bytes(range(0x80, 0x100))
+
+
+def count_postings(data: bytes) -> int:
+    """Number of (doc_no, term_frequency) pairs in an encoded blob, counted without decoding it."""
+    return len(data.translate(None, CONTINUATION_BYTES)) // 2
+
+
+def decode_postings(data: bytes) -> list[tuple[int, int]]:
+    """Inverse of `encode_postings`."""
+    values = []
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value = shift = 0
+
+    postings = []
+    doc_no = 0
+    for i in range(0, len(values), 2):
+        doc_no += values[i]
+        postings.append((doc_no, values[i + 1]))
+    return postings
+
+
+class LexicalIndex:
+    """
+    Incremental BM25 inverted index stored in SQLite next to the vector store.
+
+    Every `add` call writes one posting segment per term, a varint blob of
+    (doc_no, tf) pairs, so indexing a batch never rewrites existing postings.
+    Deleted or replaced documents drop out of the docs table and their stale
+    postings are skipped at query time until `compact()` merges the segments.
+
+    Queries run from memory: the docs table is mirrored in a dict, and each term's
+    segments are decoded once into an impact-ordered list (highest BM25 contribution
+    first) kept in an LRU cache. Terms found in more than `max_df_ratio` of the
+    documents are skipped, without being decoded, when the query has rarer terms, and
+    scoring stops after the `max_postings` highest-impact postings of a term.
+    """
+
+    def __init__(self, path: str = "lexical_index.db", k1: float = 1.5, b: float = 0.75,
+                 max_df_ratio: float = 0.2, max_postings: int = 5000, cache_postings: int = 4_000_000):
+        """
+        :param path: SQLite file holding the index
+        :param k1: BM25 term-frequency saturation
+        :param b: BM25 document-length normalization
+        :param max_df_ratio: Document frequency ratio above which a term is skipped if the query has rarer terms
+        :param max_postings: Postings scored per term, taken in impact order
+        :param cache_postings: Number of decoded postings kept in memory across terms
+        """
+        self.k1 = k1
+        self.b = b
+        self.max_df_ratio = max_df_ratio
+        self.max_postings = max_postings
+        self.cache_postings = cache_postings
+        self._lock = threading.Lock()
+        self._corpus_stats = None
+        self._docs = None
+        self._postings = OrderedDict()
+        self._cached_postings = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS docs (
+                doc_no INTEGER PRIMARY KEY AUTOINCREMENT,
+                id TEXT NOT NULL UNIQUE,
+                length INTEGER NOT NULL,
+                partition TEXT
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                segment INTEGER NOT NULL,
+                data BLOB NOT NULL,
+                PRIMARY KEY (term, segment)
+            ) WITHOUT ROWID;
+            """
+        )
+        if "partition" not in {row[1] for row in self._conn.execute("PRAGMA table_info(docs)")}:
+            self._conn.execute("ALTER TABLE docs ADD COLUMN partition TEXT")
+        self._conn.commit()
+
+    def add(self, ids: list[str], texts: list[str], partitions: list[str] = None):
+        """Indexes the texts under the given document IDs, replacing any previous version."""
+        with self._lock:
+            self._conn.executemany("DELETE FROM docs WHERE id = ?", [(doc_id,) for doc_id in ids])
+            segment = self._conn.execute("SELECT COALESCE(MAX(segment), 0) + 1 FROM postings").fetchone()[0]
+
+            postings = {}
+            for doc_id, text, partition in zip(ids, texts, partitions or [None] * len(ids)):
+                terms = Counter(tokenize(text))
+                doc_no = self._conn.execute(
+                    "INSERT INTO docs (id, length, partition) VALUES (?, ?, ?)",
+                    (doc_id, sum(terms.values()), partition),
+                ).lastrowid
+                for term, tf in terms.items():
+                    postings.setdefault(term, []).append((doc_no, tf))
+
+            self._conn.executemany(
+                "INSERT INTO postings (term, segment, data) VALUES (?, ?, ?)",
+                [(term, segment, encode_postings(pairs)) for term, pairs in postings.items()],
+            )
+            self._conn.commit()
+            self._corpus_stats = self._docs = None
+            for term in postings:
+                self._evict(term)
+
+    def delete(self, ids: list[str]):
+        """Removes documents from the index."""
+        with self._lock:
+            self._conn.executemany("DELETE FROM docs WHERE id = ?", [(doc_id,) for doc_id in ids])
+            self._conn.commit()
+            self._corpus_stats = self._docs = None
+
+    def clear(self):
+        """Drops every document and posting."""
+        with self._lock:
+            self._conn.execute("DELETE FROM docs")
+            self._conn.execute("DELETE FROM postings")
+            self._conn.commit()
+            self._corpus_stats = self._docs = None
+            self._evict_all()
+
+    def count(self) -> int:
+        """Number of indexed documents."""
+        return self._stats()[0]
+
+    def locate(self, ids: list[str]) -> dict[str, str]:
+        """Maps the indexed document IDs to the partition they were added to."""
+        found = {}
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT id, partition FROM docs WHERE id IN ({','.join('?' * len(batch))})", batch
+                )
+                found.update(rows)
+        return found
+
+    @instrument("lexical_search")
+    def search(self, query: str, k: int = 5, partitions: list[str] = None) -> list[tuple[str, float]]:
+        """Returns up to k (document ID, BM25 score) pairs, best first, optionally only from some partitions."""
+        terms = set(token for token in tokenize(query) if token not in STOPWORDS) or set(tokenize(query))
+        if not terms:
+            return []
+
+        total_docs, average_length = self._stats()
+        with self._lock:
+            docs = self._live_docs()
+            frequencies = {term: self._document_frequency(term) for term in terms}
+            frequencies = {term: df for term, df in frequencies.items() if df}
+            # Very common terms barely move BM25 scores but dominate its cost, so they are
+            # dropped before their postings are decoded
+            kept = [term for term, df in frequencies.items()
+                    if is_identifier(term) or df <= self.max_df_ratio * total_docs]
+            if not kept and frequencies:
+                kept = [min(frequencies, key=frequencies.get)]
+            postings = {term: self._term_postings(term, docs, average_length) for term in kept}
+
+        partitions = set(partitions) if partitions is not None else None
+        scores = {}
+        for term, pairs in postings.items():
+            idf = math.log(1 + (total_docs - len(pairs) + 0.5) / (len(pairs) + 0.5))
+            scored = 0
+            for doc_no, tf in pairs:
+                doc = docs.get(doc_no)
+                if doc is None or (partitions is not None and doc[2] not in partitions):
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * doc[1] / average_length)
+                scores[doc_no] = scores.get(doc_no, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+                scored += 1
+                if scored >= self.max_postings:
+                    break
+
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(docs[doc_no][0], score) for doc_no, score in best]
+
+    def compact(self):
+        """Merges each term's segments into one and drops postings of deleted documents."""
+        with self._lock:
+            live = {row[0] for row in self._conn.execute("SELECT doc_no FROM docs")}
+            merged = {}
+            for term, data in self._conn.execute("SELECT term, data FROM postings ORDER BY term, segment"):
+                merged.setdefault(term, []).extend(pair for pair in decode_postings(data) if pair[0] in live)
+            self._conn.execute("DELETE FROM postings")
+            self._conn.executemany(
+                "INSERT INTO postings (term, segment, data) VALUES (?, 0, ?)",
+                [(term, encode_postings(sorted(pairs))) for term, pairs in merged.items() if pairs],
+            )
+            self._conn.commit()
+            self._evict_all()
+        self._conn.execute("VACUUM")
+
+    def close(self):
+        self._conn.close()
+
+    def _live_docs(self) -> dict[int, tuple[str, int, str]]:
+        """Maps every indexed doc_no to its (id, length, partition); reloaded after writes."""
+        if self._docs is None:
+            self._docs = {
+                doc_no: (doc_id, length, partition)
+                for doc_no, doc_id, length, partition in self._conn.execute("SELECT doc_no, id, length, partition FROM docs")
+            }
+        return self._docs
+
+    def _document_frequency(self, term: str) -> int:
+        """Postings of a term; until compaction, those of deleted documents are counted too."""
+        pairs = self._postings.get(term)
+        if pairs is not None:
+            return len(pairs)
+        return sum(count_postings(data) for (data,) in
+                   self._conn.execute("SELECT data FROM postings WHERE term = ?", (term,)))
+
+    def _term_postings(self, term: str, docs: dict, average_length: float) -> list[tuple[int, int]]:
+        """A term's live postings across all segments, highest BM25 contribution first; cached."""
+        pairs = self._postings.get(term)
+        if pairs is not None:
+            self._postings.move_to_end(term)
+            return pairs
+
+        pairs = []
+        for (data,) in self._conn.execute("SELECT data FROM postings WHERE term = ? ORDER BY segment", (term,)):
+            pairs.extend(pair for pair in decode_postings(data) if pair[0] in docs)
+
+        def impact(pair):
+            tf = pair[1]
+            return tf / (tf + self.k1 * (1 - self.b + self.b * docs[pair[0]][1] / average_length))
+
+        pairs.sort(key=impact, reverse=True)
+        self._postings[term] = pairs
+        self._cached_postings += len(pairs)
+        while self._cached_postings > self.cache_postings and len(self._postings) > 1:
+            _, evicted = self._postings.popitem(last=False)
+            self._cached_postings -= len(evicted)
+        return pairs
+
+    def _evict(self, term: str):
+        pairs = self._postings.pop(term, None)
+        if pairs is not None:
+            self._cached_postings -= len(pairs)
+
+    def _evict_all(self):
+        self._postings.clear()
+        self._cached_postings = 0
+
+    def _stats(self) -> tuple[int, float]:
+        """Returns (document count, average document length), cached until the next write."""
+        if self._corpus_stats is None:
+            with self._lock:
+                count, average = self._conn.execute("SELECT COUNT(*), AVG(length) FROM docs").fetchone()
+                self._corpus_stats = (count, average or 1.0)
+        return self._corpus_stats
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+
+class IngestionManifest:
+    """
+    SQLite-backed record of what has been ingested, keyed by URL.
+
+    For every URL it keeps the HTTP validators from the last fetch, a hash of the
+    cleaned content and the IDs of the chunks written to the vector store, so that
+    unchanged pages can be skipped and changed pages can replace their old chunks.
+    URLs whose documents were removed by compaction keep a tombstone with the reason,
+    so ingestion does not bring them back while they are unchanged.
+    """
+
+    def __init__(self, path: str = "ingestion_manifest.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS manifest (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT,
+                chunk_ids TEXT NOT NULL DEFAULT '[]',
+                fetched_at REAL,
+                updated_at REAL,
+                removed_reason TEXT
+            )
+            """
+        )
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(manifest)")]
+        if "removed_reason" not in columns:
+            self._conn.execute("ALTER TABLE manifest ADD COLUMN removed_reason TEXT")
+        self._conn.commit()
+
+    @staticmethod
+    def content_hash(texts: list[str]) -> str:
+        """Returns a stable hash over the cleaned texts of a URL."""
+        digest = hashlib.sha256()
+        for text in texts:
+            digest.update(text.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, url: str) -> dict:
+        """Returns the manifest entry for a URL, or None if it was never ingested."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, content_hash, chunk_ids, fetched_at, updated_at, removed_reason "
+                "FROM manifest WHERE url = ?",
+                (url,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "url": url,
+            "etag": row[0],
+            "last_modified": row[1],
+            "content_hash": row[2],
+            "chunk_ids": json.loads(row[3]),
+            "fetched_at": row[4],
+            "updated_at": row[5],
+            "removed_reason": row[6],
+        }
+
+    def conditional_headers(self, url: str) -> dict:
+        """Builds If-None-Match / If-Modified-Since headers from the stored validators."""
+        entry = self.get(url)
+        headers = {}
+        if entry:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def touch(self, url: str, validators: dict = None):
+        """Records that a URL was fetched and found unchanged."""
+        validators = validators or {}
+        with self._lock:
+            self._conn.execute(
+                """
+                UPDATE manifest SET fetched_at = ?,
+                    etag = COALESCE(?, etag),
+                    last_modified = COALESCE(?, last_modified)
+                WHERE url = ?
+                """,
+                (time.time(), validators.get("etag"), validators.get("last_modified"), url),
+            )
+            self._conn.commit()
+
+    def record(self, url: str, validators: dict, content_hash: str, chunk_ids: list[str]):
+        """Stores the result of (re-)indexing a URL."""
+        validators = validators or {}
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO manifest (url, etag, last_modified, content_hash, chunk_ids, fetched_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    etag = excluded.etag,
+                    last_modified = excluded.last_modified,
+                    content_hash = excluded.content_hash,
+                    chunk_ids = excluded.chunk_ids,
+                    fetched_at = excluded.fetched_at,
+                    updated_at = excluded.updated_at,
+                    removed_reason = NULL
+                """,
+                (url, validators.get("etag"), validators.get("last_modified"), content_hash,
+                 json.dumps(chunk_ids), now, now),
+            )
+            self._conn.commit()
+
+    def urls(self) -> list[str]:
+        """Returns every ingested URL that still has documents in the vector store."""
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT url FROM manifest WHERE removed_reason IS NULL")]
+
+    def forget(self, reasons: dict):
+        """
+        Tombstones URLs whose documents were removed, given as {url: reason}. Their hash
+        and chunk IDs are cleared and `updated_at` is bumped so cached answers citing them
+        are invalidated; the validators are kept, so ingestion can tell when they change.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                """
+                INSERT INTO manifest (url, chunk_ids, updated_at, removed_reason) VALUES (?, '[]', ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    content_hash = NULL,
+                    chunk_ids = '[]',
+                    updated_at = excluded.updated_at,
+                    removed_reason = excluded.removed_reason
+                """,
+                [(url, now, reason) for url, reason in reasons.items()],
+            )
+            self._conn.commit()
+
+    def last_updated(self, urls: list[str]) -> float:
+        """Returns the latest time any of the URLs was (re-)indexed or removed, or 0.0 if none were."""
+        urls = list(urls)
+        latest = 0.0
+        with self._lock:
+            for start in range(0, len(urls), 500):
+                batch = urls[start:start + 500]
+                row = self._conn.execute(
+                    f"SELECT MAX(updated_at) FROM manifest WHERE url IN ({','.join('?' * len(batch))})", batch
+                ).fetchone()
+                latest = max(latest, row[0] or 0.0)
+        return latest
+
+    def close(self):
+        """Closes the underlying database connection."""
+        self._conn.close()
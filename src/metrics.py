@@ -0,0 +1,209 @@
+import cProfile
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds, in seconds
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+logger = logging.getLogger("immigo.metrics")
+
+
+def escape_label(value) -> str:
+    """Escapes a label value for the Prometheus text format (backslash, double quote, newline)."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style."""
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """
+    Process-wide counters and latency histograms for the pipeline stages.
+
+    Disabled by default; set IMMIGO_METRICS=1 (or call `enable()`) to record. When
+    disabled, instrumented functions cost one attribute check per call. With
+    IMMIGO_METRICS_LOG=1 every timed call is also logged as a JSON line, and stages
+    listed in IMMIGO_PROFILE are profiled with cProfile on a sample of their calls.
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv("IMMIGO_METRICS", "") not in ("", "0")
+        self.json_logs = os.getenv("IMMIGO_METRICS_LOG", "") not in ("", "0")
+        self.profile_stages = {stage for stage in os.getenv("IMMIGO_PROFILE", "").split(",") if stage}
+        self.profile_every = int(os.getenv("IMMIGO_PROFILE_EVERY", "10"))
+        self.profile_dir = os.getenv("IMMIGO_PROFILE_DIR", os.path.join("logs", "profiles"))
+        self.counters = {}
+        self.histograms = {}
+        self._calls = {}
+        self._lock = threading.Lock()
+        # cProfile allows one active profiler per process, so sampled calls take turns
+        self._profile_lock = threading.Lock()
+
+    def enable(self, json_logs: bool = None):
+        """Turns recording on at runtime."""
+        self.enabled = True
+        if json_logs is not None:
+            self.json_logs = json_logs
+
+    def disable(self):
+        """Turns recording off."""
+        self.enabled = False
+
+    def reset(self):
+        """Drops all recorded values."""
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self._calls.clear()
+
+    def increment(self, name: str, value: float = 1, **labels):
+        """Adds to a counter."""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels):
+        """Records a duration in a histogram."""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+        if self.json_logs:
+            logger.info(json.dumps({"metric": name, "seconds": round(seconds, 6), **labels}))
+
+    @contextmanager
+    def timer(self, stage: str, **labels):
+        """Times a block as `immigo_stage_seconds{stage=...}` and counts errors."""
+        if not self.enabled:
+            yield
+            return
+        profiler = self._maybe_profiler(stage)
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.increment("immigo_stage_errors_total", stage=stage, **labels)
+            raise
+        finally:
+            if profiler:
+                profiler.disable()
+                self._profile_lock.release()
+                self._dump_profile(stage, profiler)
+            self.observe("immigo_stage_seconds", time.perf_counter() - started, stage=stage, **labels)
+
+    def _maybe_profiler(self, stage: str) -> cProfile.Profile:
+        """Returns an enabled profiler if this call is sampled and no other call is being profiled."""
+        if stage not in self.profile_stages:
+            return None
+        with self._lock:
+            calls = self._calls[stage] = self._calls.get(stage, 0) + 1
+        if calls % self.profile_every != 1 and self.profile_every != 1:
+            return None
+        # Concurrent sampled calls skip profiling rather than wait for the running one
+        if not self._profile_lock.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:
+            # Another profiler (e.g. python -m cProfile) is already active
+            self._profile_lock.release()
+            logger.debug(f"Skipped profiling {stage}: {e}")
+            return None
+        return profiler
+
+    def _dump_profile(self, stage: str, profiler: cProfile.Profile):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        profiler.dump_stats(os.path.join(self.profile_dir, f"{stage}-{os.getpid()}-{time.time_ns()}.prof"))
+
+    def snapshot(self) -> dict:
+        """Returns all counters and histogram summaries as plain data, e.g. for a JSON log."""
+        with self._lock:
+            return {
+                "counters": [{"name": name, "labels": dict(labels), "value": value}
+                             for (name, labels), value in self.counters.items()],
+                "histograms": [{"name": name, "labels": dict(labels), "count": h.count, "sum": h.sum,
+                                "buckets": dict(zip([*map(str, h.buckets), "+Inf"], h.counts))}
+                               for (name, labels), h in self.histograms.items()],
+            }
+
+    def log_snapshot(self):
+        """Writes the current snapshot as one structured JSON log line."""
+        logger.info(json.dumps({"metrics": self.snapshot()}))
+
+    def render_prometheus(self) -> str:
+        """Renders all metrics in the Prometheus text exposition format."""
+        def label_text(labels, extra=()):
+            pairs = [*labels, *extra]
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{key}="{escape_label(value)}"' for key, value in pairs) + "}"
+
+        lines = []
+        with self._lock:
+            for name in sorted({name for name, _ in self.counters}):
+                lines.append(f"# TYPE {name} counter")
+                for (metric, labels), value in sorted(self.counters.items()):
+                    if metric == name:
+                        lines.append(f"{name}{label_text(labels)} {value}")
+            for name in sorted({name for name, _ in self.histograms}):
+                lines.append(f"# TYPE {name} histogram")
+                for (metric, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0]):
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip([*map(str, histogram.buckets), "+Inf"], histogram.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{label_text(labels, [('le', bound)])} {cumulative}")
+                    lines.append(f"{name}_sum{label_text(labels)} {histogram.sum}")
+                    lines.append(f"{name}_count{label_text(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """Dumps the Prometheus text format to a file, e.g. for the node_exporter textfile collector."""
+        with open(path, "w") as file:
+            file.write(self.render_prometheus())
+
+
+metrics = MetricsRegistry()
+
+
+def instrument(stage: str):
+    """Decorator timing every call of a function as the given pipeline stage."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not metrics.enabled:
+                return func(*args, **kwargs)
+            with metrics.timer(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,110 @@
+import re
+from urllib.parse import urlparse
+from src.boilerplate import normalize_domain
+
+# (domain, path pattern, content type); the first match wins, unmatched URLs fall back to "pdf" or "web"
+CONTENT_TYPE_RULES = [
+    ("travel.state.gov", re.compile(r"/visa-bulletin"), "visa_bulletin"),
+    ("uscis.gov", re.compile(r"/newsroom/"), "newsroom"),
+    ("uscis.gov", re.compile(r"/forms/|^/[a-z]{1,3}-\d+[a-z]*/?$"), "forms"),
+    ("uscis.gov", re.compile(r"/policy-manual/|/legal-docs/|/policy-memoranda"), "policy"),
+]
+
+# Content types a query is sent to when it matches the pattern. Only unambiguous cues
+# route; anything else searches every partition. A bare "form" is not one: most
+# questions mention a form, and their answers are as likely on the web or policy pages.
+QUERY_ROUTES = [
+    (re.compile(r"visa bulletin|priority dates?|final action dates?|dates for filing|cut-?off dates?", re.I),
+     "visa_bulletin"),
+    (re.compile(r"\bnews\b|announce|press release|\balerts?\b", re.I), "newsroom"),
+    (re.compile(r"edition dates?|filing instructions", re.I), "forms"),
+    (re.compile(r"policy manual|policy memo", re.I), "policy"),
+]
+
+VISA_BULLETIN_PATTERN = re.compile(r"visa-bulletin-for-([a-z]+)-(\d{4})")
+MONTHS = ["january", "february", "march", "april", "may", "june", "july", "august", "september", "october",
+          "november", "december"]
+
+ARCHIVE_PREFIX = "archive__"
+
+
+def classify(source: str) -> tuple[str, str]:
+    """Returns the (domain, content type) of a source URL."""
+    domain = normalize_domain(source)
+    path = urlparse(source).path.lower()
+    for rule_domain, pattern, content_type in CONTENT_TYPE_RULES:
+        if (domain == rule_domain or domain.endswith("." + rule_domain)) and pattern.search(path):
+            return domain, content_type
+    return domain, "pdf" if path.endswith(".pdf") else "web"
+
+
+def partition_name(domain: str, content_type: str) -> str:
+    """Collection name of a partition, e.g. "uscis_gov__forms"."""
+    return f"{re.sub(r'[^a-z0-9]+', '_', domain.lower()).strip('_') or 'unknown'}__{content_type}"
+
+
+def parse_partition(name: str) -> tuple[str, str]:
+    """Inverse of `partition_name`, up to the domain's punctuation: returns (domain_key, content_type)."""
+    domain_key, _, content_type = name.partition("__")
+    return domain_key, content_type
+
+
+def is_partition(name: str) -> bool:
+    """True for partition collections, as opposed to archives or the legacy single collection."""
+    return "__" in name and not name.startswith(ARCHIVE_PREFIX)
+
+
+def route(query: str) -> dict:
+    """
+    Returns a Chroma metadata filter restricting the query to the content types it is
+    about, e.g. {"content_type": {"$in": ["visa_bulletin"]}}, or None to search everything.
+    """
+    content_types = [content_type for pattern, content_type in QUERY_ROUTES if pattern.search(query)]
+    if not content_types:
+        return None
+    return {"content_type": {"$in": content_types}}
+
+
+def select_partitions(partitions: list[str], where: dict = None) -> list[str]:
+    """
+    Prunes partitions that cannot match the metadata filter. Only constraints on
+    `domain` and `content_type` prune; other constraints are left to Chroma.
+    """
+    if not where:
+        return list(partitions)
+    return [name for name in partitions if _may_match(name, where)]
+
+
+def _may_match(name: str, where: dict) -> bool:
+    domain_key, content_type = parse_partition(name)
+    for field, condition in where.items():
+        if field == "$and":
+            if not all(_may_match(name, clause) for clause in condition):
+                return False
+        elif field == "$or":
+            if not any(_may_match(name, clause) for clause in condition):
+                return False
+        elif field in ("domain", "content_type"):
+            actual = domain_key if field == "domain" else content_type
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+            for operator, expected in condition.items():
+                expected = expected if isinstance(expected, list) else [expected]
+                if field == "domain":
+                    expected = [parse_partition(partition_name(normalize_domain(value), ""))[0] for value in expected]
+                if operator in ("$eq", "$in") and actual not in expected:
+                    return False
+                if operator in ("$ne", "$nin") and actual in expected:
+                    return False
+    return True
+
+
+def superseded_visa_bulletins(sources: list[str], keep: int = 2) -> list[str]:
+    """Returns the visa bulletin URLs older than the `keep` most recent months."""
+    dated = {}
+    for source in sources:
+        match = VISA_BULLETIN_PATTERN.search(source.lower())
+        if match and match.group(1) in MONTHS:
+            dated[source] = (int(match.group(2)), MONTHS.index(match.group(1)))
+    months = sorted(set(dated.values()), reverse=True)[:keep]
+    return sorted(source for source, month in dated.items() if month not in months)
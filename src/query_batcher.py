@@ -0,0 +1,64 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable
+from src.metrics import metrics
+
+
+class QueryBatcher:
+    """
+    Micro-batches concurrent searches into single `search_many` calls.
+
+    Callers submit one query and get a Future. A background thread takes the first
+    pending query, waits up to `window` seconds for more to arrive (or until
+    `max_batch` are queued), and answers them all with one batched embedding and
+    vector lookup, so throughput grows with load instead of queries serializing.
+    """
+
+    def __init__(self, search_many: Callable[[list[str], int], list], window: float = 0.005, max_batch: int = 64):
+        """
+        :param search_many: Function mapping (queries, k) to one result list per query
+        :param window: Seconds to wait for more queries after the first one arrives
+        :param max_batch: Maximum number of queries answered by one call
+        """
+        self.search_many = search_many
+        self.window = window
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="query-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, query: str, k: int = 5) -> Future:
+        """Queues a query; the Future resolves to its top-k documents."""
+        future = Future()
+        self._queue.put((query, k, future))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._answer(batch)
+
+    def _answer(self, batch: list):
+        metrics.increment("immigo_query_batches_total")
+        metrics.increment("immigo_batched_queries_total", len(batch))
+        # One call at the largest k, truncated per caller
+        k = max(k for _, k, _ in batch)
+        try:
+            results = self.search_many([query for query, _, _ in batch], k)
+        except Exception as e:
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, k, future), documents in zip(batch, results):
+            future.set_result(documents[:k])
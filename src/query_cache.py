@@ -0,0 +1,171 @@
+import math
+import operator
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+from src.lexical_index import is_identifier, tokenize
+from src.manifest import IngestionManifest
+
+
+def normalize_query(query: str) -> str:
+    """Normalizes a query for exact-match caching: case, whitespace and trailing punctuation."""
+    return " ".join(query.lower().split()).rstrip("?.! ")
+
+
+def identifier_tokens(query: str) -> frozenset:
+    """The form numbers, fiscal years and citations named in a query."""
+    return frozenset(token for token in tokenize(query) if is_identifier(token))
+
+
+def _unit(vector: list[float]) -> list[float]:
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+class QueryCache:
+    """
+    Two-tier cache for the query path.
+
+    The retrieval tier maps an exactly normalized query to the IDs of the documents
+    it retrieved. The answer tier stores ChatModel answers together with the query
+    embedding and returns one for the same normalized query, or when a new query's
+    cosine similarity to a cached query naming the same identifiers reaches the
+    threshold. Both tiers use TTL and LRU eviction, and an entry is dropped once any
+    source it was built from has been re-indexed or removed after the entry was
+    created, as recorded in the ingestion manifest.
+    """
+
+    def __init__(self, manifest: IngestionManifest = None, similarity_threshold: float = 0.92,
+                 retrieval_ttl: float = 3600, answer_ttl: float = 86400,
+                 max_retrievals: int = 10_000, max_answers: int = 1_000):
+        """
+        :param manifest: Ingestion manifest used to detect re-indexed sources, None to disable
+        :param similarity_threshold: Minimum cosine similarity for a semantic answer hit
+        :param retrieval_ttl: Seconds a retrieval entry stays valid
+        :param answer_ttl: Seconds an answer entry stays valid
+        :param max_retrievals: Capacity of the retrieval tier
+        :param max_answers: Capacity of the answer tier
+        """
+        self.manifest = manifest
+        self.similarity_threshold = similarity_threshold
+        self.retrieval_ttl = retrieval_ttl
+        self.answer_ttl = answer_ttl
+        self.max_retrievals = max_retrievals
+        self.max_answers = max_answers
+        self.stats = {"retrieval_hits": 0, "retrieval_misses": 0, "answer_hits": 0, "answer_misses": 0}
+        self._retrievals = OrderedDict()
+        self._answers = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_retrieval(self, query: str) -> list[str]:
+        """Returns the cached document IDs for the query, or None."""
+        key = normalize_query(query)
+        with self._lock:
+            entry = self._retrievals.get(key)
+            if entry and not self._expired(entry, self.retrieval_ttl):
+                self._retrievals.move_to_end(key)
+            else:
+                self._retrievals.pop(key, None)
+                entry = None
+        if entry and self._stale(entry):
+            with self._lock:
+                self._retrievals.pop(key, None)
+            entry = None
+
+        self.stats["retrieval_hits" if entry else "retrieval_misses"] += 1
+        return list(entry["doc_ids"]) if entry else None
+
+    def put_retrieval(self, query: str, doc_ids: list[str], sources: list[str]):
+        """Caches the document IDs retrieved for the query."""
+        key = normalize_query(query)
+        with self._lock:
+            self._retrievals[key] = {"doc_ids": list(doc_ids), "sources": set(sources), "created_at": time.time()}
+            self._retrievals.move_to_end(key)
+            while len(self._retrievals) > self.max_retrievals:
+                self._retrievals.popitem(last=False)
+
+    def get_answer(self, query: str, embed: Callable[[str], list[float]] = None) -> str:
+        """
+        Returns the cached answer of the same normalized query or, failing that, of the
+        most similar cached query above the threshold that names the same identifiers
+        (form numbers, fiscal years, citations), or None.
+
+        :param query: The user query
+        :param embed: Returns the query's embedding; only called when there is no exact
+                      match. None to use exact matches only.
+        """
+        key = normalize_query(query)
+        with self._lock:
+            entry = self._answers.get(key)
+            if entry and self._expired(entry, self.answer_ttl):
+                del self._answers[key]
+                entry = None
+            best_key = key if entry else None
+
+        if entry is None and embed is not None:
+            embedding = _unit(embed(query))
+            identifiers = identifier_tokens(query)
+            best_score = self.similarity_threshold
+            with self._lock:
+                for candidate, entry in list(self._answers.items()):
+                    if self._expired(entry, self.answer_ttl):
+                        del self._answers[candidate]
+                        continue
+                    # "I-130 processing time" and "I-485 processing time" embed almost identically
+                    if entry["embedding"] is None or entry["identifiers"] != identifiers:
+                        continue
+                    score = sum(map(operator.mul, embedding, entry["embedding"]))
+                    if score >= best_score:
+                        best_key, best_score = candidate, score
+            entry = self._answers.get(best_key)
+
+        if entry:
+            with self._lock:
+                if best_key in self._answers:
+                    self._answers.move_to_end(best_key)
+            if self._stale(entry):
+                with self._lock:
+                    self._answers.pop(best_key, None)
+                entry = None
+
+        self.stats["answer_hits" if entry else "answer_misses"] += 1
+        return entry["answer"] if entry else None
+
+    def put_answer(self, query: str, embedding: list[float], answer: str, sources: list[str]):
+        """Caches an answer under the query and its embedding; without an embedding only exact matches hit it."""
+        key = normalize_query(query)
+        with self._lock:
+            self._answers[key] = {
+                "embedding": _unit(embedding) if embedding is not None else None,
+                "identifiers": identifier_tokens(query),
+                "answer": answer,
+                "sources": set(sources),
+                "created_at": time.time(),
+            }
+            self._answers.move_to_end(key)
+            while len(self._answers) > self.max_answers:
+                self._answers.popitem(last=False)
+
+    def invalidate_sources(self, sources: list[str]):
+        """Drops every entry that depended on any of the sources."""
+        sources = set(sources)
+        with self._lock:
+            for tier in (self._retrievals, self._answers):
+                for key in [key for key, entry in tier.items() if entry["sources"] & sources]:
+                    del tier[key]
+
+    def clear(self):
+        """Empties both tiers."""
+        with self._lock:
+            self._retrievals.clear()
+            self._answers.clear()
+
+    @staticmethod
+    def _expired(entry: dict, ttl: float) -> bool:
+        return time.time() - entry["created_at"] > ttl
+
+    def _stale(self, entry: dict) -> bool:
+        """True if one of the entry's sources was re-indexed or removed after the entry was cached."""
+        return bool(self.manifest and entry["sources"]
+                    and self.manifest.last_updated(entry["sources"]) > entry["created_at"])
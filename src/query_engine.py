@@ -0,0 +1,96 @@
+from typing import Iterator
+from langchain.schema import Document
+from src.database import ChromaDBHandler, document_id
+from src.lexical_index import is_identifier_query
+from src.chat_model import ChatModel
+from src.manifest import IngestionManifest
+from src.query_cache import QueryCache
+from src.metrics import instrument, metrics
+
+
+class QueryEngine:
+    """Answers questions with retrieval and the ChatModel, going through the query cache."""
+
+    def __init__(self, chroma_db: ChromaDBHandler = None, chat_model: ChatModel = None,
+                 cache: QueryCache = None, k: int = 5, search_kwargs: dict = None):
+        """
+        :param chroma_db: Vector store handler, defaults to the ChromaDBHandler singleton
+        :param chat_model: Chat model used to generate answers, created on first use if not given
+        :param cache: Retrieval and answer cache, defaults to one backed by the ingestion manifest
+        :param k: Number of documents retrieved per query
+        :param search_kwargs: Routing and fusion options passed to `ChromaDBHandler.hybrid_search`
+        """
+        self.chroma_db = chroma_db or ChromaDBHandler()
+        self._chat_model = chat_model
+        self.cache = cache or QueryCache(manifest=IngestionManifest())
+        self.k = k
+        self.search_kwargs = search_kwargs or {}
+
+    @property
+    def chat_model(self) -> ChatModel:
+        """The chat model; created lazily so retrieval works without a GROQ_API_KEY."""
+        if self._chat_model is None:
+            self._chat_model = ChatModel()
+        return self._chat_model
+
+    def warmup(self) -> "QueryEngine":
+        """Loads the vector store and embedding model ahead of the first query."""
+        self.chroma_db.warmup()
+        return self
+
+    @instrument("retrieve")
+    def retrieve(self, query: str) -> list[Document]:
+        """Returns the top-k documents for the query, served from the retrieval cache when possible."""
+        doc_ids = self.cache.get_retrieval(query)
+        if doc_ids is not None:
+            documents = self.chroma_db.get_documents(doc_ids)
+            if len(documents) == len(doc_ids):
+                return documents
+
+        documents = self.chroma_db.hybrid_search(query, k=self.k, **self.search_kwargs)
+        self.cache.put_retrieval(
+            query,
+            [doc.id or document_id(doc) for doc in documents],
+            [doc.metadata.get("source") for doc in documents],
+        )
+        return documents
+
+    def answer(self, query: str) -> str:
+        """Answers the query, reusing a cached answer for a semantically equivalent question."""
+        answer = self._cached_answer(query)
+        if answer is not None:
+            return answer
+
+        documents = self.retrieve(query)
+        answer = self.chat_model.answer(query, documents)
+        self._cache_answer(query, answer, documents)
+        return answer
+
+    def stream_answer(self, query: str) -> Iterator[str]:
+        """Like `answer`, but yields the answer as it is generated; a cached answer is yielded whole."""
+        answer = self._cached_answer(query)
+        if answer is not None:
+            yield answer
+            return
+
+        documents = self.retrieve(query)
+        pieces = []
+        for piece in self.chat_model.stream(query, documents):
+            pieces.append(piece)
+            yield piece
+        self._cache_answer(query, "".join(pieces), documents)
+
+    def _cached_answer(self, query: str) -> str:
+        """
+        Looks the query up in the answer cache. Identifier lookups such as "I-129F" are
+        answered from the lexical index without an embedding, so they only match exactly.
+        """
+        embed = None if is_identifier_query(query) else self.chroma_db.embeddings.embed_query
+        answer = self.cache.get_answer(query, embed)
+        metrics.increment("immigo_answer_cache_hits_total" if answer is not None else "immigo_answer_cache_misses_total")
+        return answer
+
+    def _cache_answer(self, query: str, answer: str, documents: list[Document]):
+        # The embedding was computed by the lookup and comes from the embedding cache
+        embedding = None if is_identifier_query(query) else self.chroma_db.embeddings.embed_query(query)
+        self.cache.put_answer(query, embedding, answer, [doc.metadata.get("source") for doc in documents])
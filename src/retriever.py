@@ -1,10 +1,39 @@
+from langchain.schema import Document
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.retrievers import BaseRetriever
 from src.database import ChromaDBHandler
+from src.metrics import instrument
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    LangChain retriever over `ChromaDBHandler.hybrid_search`; `invoke` accepts per-call overrides.
+    `ainvoke` micro-batches the dense lookup with other concurrent callers.
+    """
+
+    chroma_db: ChromaDBHandler
+    k: int = 5
+    search_kwargs: dict = {}
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun,
+                                **kwargs) -> list[Document]:
+        options = {"k": self.k, **self.search_kwargs, **kwargs}
+        return self.chroma_db.hybrid_search(query, **options)
+
+    async def _aget_relevant_documents(self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun,
+                                       **kwargs) -> list[Document]:
+        options = {"k": self.k, **self.search_kwargs, **kwargs}
+        return await self.chroma_db.ahybrid_search(query, **options)
+
 
 class RetrieverFactory:
     """Factory for creating retrievers."""
-    
+
     @staticmethod
-    def get_retriever():
-        """Returns a retriever instance."""
+    @instrument("get_retriever")
+    def get_retriever(k: int = 5, **search_kwargs):
+        """Returns a retriever instance; keyword arguments configure the lexical/vector fusion."""
         chroma_db = ChromaDBHandler()
-        return chroma_db.get_retriever()
+        return chroma_db.get_retriever(k=k, **search_kwargs)
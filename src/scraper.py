@@ -1,43 +1,109 @@
 from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterator
+import multiprocessing
+import tempfile
+import threading
+import time
 import requests
 import fitz
 from langchain.schema import Document
-from langchain_community.document_loaders import WebBaseLoader
+from src.html_extract import HTMLPage
+from src.http_client import get_session
+from src.metrics import instrument, metrics
 import os
 
 os.environ["USER_AGENT"] = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
 
+class NotModifiedError(Exception):
+    """Raised when a conditional GET reports that the resource has not changed (HTTP 304)."""
+
 class Scraper(ABC):
     """Abstract Class for Scrapers"""
 
+    def __init__(self, session: requests.Session = None):
+        self.session = session or get_session()
+        # HTTP validators (ETag / Last-Modified) and final URL, after redirects, of the last successful fetch
+        self.validators = {}
+        self.final_url = None
+
     @abstractmethod
-    def scrape(self, url: str) -> list[Document]:
+    def scrape(self, url: str, headers: dict = None) -> list[Document]:
         """Method to be implemented by subclasses for scraping data."""
         pass
 
+    @instrument("http_fetch")
+    def fetch(self, url: str, headers: dict = None, stream: bool = False) -> requests.Response:
+        """Performs a (possibly conditional) GET and records the response validators."""
+        response = self.session.get(url, headers=headers, stream=stream)
+        if response.status_code == 304:
+            raise NotModifiedError(url)
+        response.raise_for_status()  # Raise HTTP errors if any
+
+        self.validators = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+        self.final_url = response.url
+        return response
+
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+
+def _get_pdf_pool(max_workers: int) -> ProcessPoolExecutor:
+    """Returns the process pool shared by all PDFScrapers, creating it on first use."""
+    global _pdf_pool
+    # Scrapers run inside the ingestion thread pool, so two threads can get here at once
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            # Spawn rather than fork for the same reason
+            _pdf_pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+        return _pdf_pool
+
+def _discard_pdf_pool(pool: ProcessPoolExecutor):
+    """Drops a broken pool so that the next document gets a fresh one; its workers are already gone."""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is pool:
+            _pdf_pool = None
+
+def _extract_page_range(path: str, start: int, end: int) -> list[str]:
+    """Extracts the text of pages [start, end) of a PDF file; runs in a worker process."""
+    with fitz.open(path) as pdf:
+        return [pdf[page_num].get_text() for page_num in range(start, end)]
+
 class PDFScraper(Scraper):
     """Scraper for extracting text from PDFs."""
 
-    def scrape(self, url: str) -> list[Document]:
-        """Fetches a PDF from the URL and extracts text as LangChain Document objects."""
+    def __init__(self, session: requests.Session = None, parallel_min_pages: int = 64,
+                 pages_per_task: int = 16, max_workers: int = None):
+        """
+        :param session: HTTP session used for downloads
+        :param parallel_min_pages: Documents with at least this many pages are extracted in the process pool
+        :param pages_per_task: Number of pages extracted by one pool task
+        :param max_workers: Size of the shared process pool, defaults to the CPU count
+        """
+        super().__init__(session)
+        self.parallel_min_pages = parallel_min_pages
+        self.pages_per_task = pages_per_task
+        self.max_workers = max_workers or os.cpu_count()
+        # Page count, downloaded bytes, download seconds and extraction seconds of the last document
+        self.stats = {}
+
+    @instrument("scrape_pdf")
+    def scrape(self, url: str, headers: dict = None) -> list[Document]:
+        """
+        Fetches a PDF from the URL and extracts text as LangChain Document objects.
+
+        The download is streamed to disk, but all pages are returned at once: ingestion
+        hashes a URL's whole content before deciding whether to re-index it.
+        """
         try:
-            response = requests.get(url)
-            response.raise_for_status()  # Raise HTTP errors if any
-
-            # Iterate through the headers
-            for header, value in response.headers.items():
-                print(f"{header}: {value}")
-            
-            pdf = fitz.open(stream=response.content, filetype='pdf')
-            documents = [
-                Document(
-                    page_content=page.get_text(),
-                    metadata={"source": url, "page": page_num + 1}
-                )
-                for page_num, page in enumerate(pdf)
-            ]
-            return documents
+            return list(self.iter_pages(url, headers))
 
+        except NotModifiedError:
+            raise
         except requests.exceptions.RequestException as e:
             print(f"Error fetching PDF from {url}: {e}")
             return []
@@ -45,31 +111,107 @@ class PDFScraper(Scraper):
             print(f"Error processing PDF from {url}: {e}")
             return []
 
+    def iter_pages(self, url: str, headers: dict = None) -> Iterator[Document]:
+        """
+        Streams the PDF to a temporary file and lazily yields one Document per page.
+
+        Large documents are split into page ranges extracted in parallel by the process
+        pool; pages are still yielded in order.
+        """
+        started = time.perf_counter()
+        response = self.fetch(url, headers, stream=True)
+        with tempfile.NamedTemporaryFile(suffix=".pdf") as file:
+            num_bytes = 0
+            with metrics.timer("http_download"):
+                for block in response.iter_content(chunk_size=1 << 20):
+                    file.write(block)
+                    num_bytes += len(block)
+                file.flush()
+                response.close()
+            metrics.increment("immigo_pdf_bytes_total", num_bytes)
+            extract_started = time.perf_counter()
+            download_seconds = extract_started - started
+
+            with fitz.open(file.name) as pdf:
+                page_count = pdf.page_count
+                self.stats = {"pages": page_count, "bytes": num_bytes, "download_seconds": download_seconds,
+                              "seconds": 0.0}
+
+                if page_count < self.parallel_min_pages:
+                    texts = (page.get_text() for page in pdf)
+                else:
+                    texts = self._extract_parallel(file.name, page_count)
+
+                for page_num, text in enumerate(texts):
+                    yield Document(page_content=text, metadata={"source": url, "page": page_num + 1})
+
+            self.stats["seconds"] = time.perf_counter() - extract_started
+            metrics.observe("immigo_stage_seconds", self.stats["seconds"], stage="pdf_extract")
+            metrics.increment("immigo_pdf_pages_total", page_count)
+
+    def _extract_parallel(self, path: str, page_count: int) -> Iterator[str]:
+        ranges = [(start, min(start + self.pages_per_task, page_count))
+                  for start in range(0, page_count, self.pages_per_task)]
+        pool = _get_pdf_pool(self.max_workers)
+        futures = []
+        done = 0
+        try:
+            futures = [pool.submit(_extract_page_range, path, start, end) for start, end in ranges]
+            for future in futures:
+                yield from future.result()
+                done += 1
+        except BrokenProcessPool as e:
+            # A worker died (e.g. killed for memory): finish this document in-process
+            print(f"PDF extraction pool broke, extracting {path} in-process: {e}")
+            metrics.increment("immigo_pdf_pool_failures_total")
+            _discard_pdf_pool(pool)
+            for start, end in ranges[done:]:
+                yield from _extract_page_range(path, start, end)
+        finally:
+            for future in futures:
+                future.cancel()
+
 class WebScraper(Scraper):
     """Scraper for extracting text from webpages."""
 
-    def scrape(self, url: str) -> list[Document]:
-        """Fetches and parses a webpage using LangChain's WebBaseLoader."""
+    @instrument("scrape_web")
+    def scrape(self, url: str, headers: dict = None) -> list[Document]:
+        """
+        Fetches a webpage and returns its main content (navigation, header and footer
+        dropped) with the metadata LangChain's WebBaseLoader would record.
+        """
         try:
-            loader = WebBaseLoader([url])
-            return loader.load()
+            response = self.fetch(url, headers)
+            page = HTMLPage(response.text, url)
+            text = page.main_text()
+            if not text.strip():
+                # Indexing an empty page would replace the URL's chunks with nothing
+                raise ValueError("no main content found")
+            return [Document(page_content=text, metadata=page.metadata())]
+        except NotModifiedError:
+            raise
         except Exception as e:
             print(f"Error fetching webpage from {url}: {e}")
             return []
-    
+
 class ScraperFactory:
     """Factory class to get the appropriate scraper based on the file type."""
 
     @classmethod
-    def get_scraper(cls, file_type: str) -> Scraper:
-        """Returns the appropriate scraper based on file type."""
+    def get_scraper(cls, file_type: str, session: requests.Session = None) -> Scraper:
+        """Returns the appropriate scraper based on file type, optionally sharing a pooled session."""
         scrapers = {
-            "pdf": PDFScraper(),
-            "web": WebScraper(),
+            "pdf": PDFScraper,
+            "web": WebScraper,
         }
-        return scrapers.get(file_type, WebScraper())  # Default to WebScraper
+        return scrapers.get(file_type, WebScraper)(session=session)  # Default to WebScraper
+
+    @staticmethod
+    def get_file_type(url: str) -> str:
+        """Infers the scraper file type from a URL."""
+        return "pdf" if url.lower().endswith(".pdf") else "web"
+
 
-    
 
 
 
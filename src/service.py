@@ -0,0 +1,208 @@
+"""
+Resident query service.
+
+Keeps the embedding model, the Chroma client and the ChatModel loaded in one
+long-lived process and serves retrieval and (optionally streamed) answers over localhost HTTP, so CLI
+invocations and workers skip the multi-second cold start:
+
+    python -m src.service --port 8765
+
+Streamed answers are server-sent events: one `data:` event per JSON-encoded piece
+of text, and an `error` event if generation fails after the response has started.
+"""
+import argparse
+import itertools
+import json
+import logging
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator
+from src.errors import ConfigurationError
+from src.metrics import metrics
+from src.query_engine import QueryEngine
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+class QueryService:
+    """Threaded localhost HTTP server around a warmed-up QueryEngine."""
+
+    def __init__(self, engine: QueryEngine = None, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        # Request threads share one batched embedding and vector lookup per batching window
+        self.engine = engine or QueryEngine(search_kwargs={"batched": True})
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.started_at = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def warmup(self) -> float:
+        """Loads the models and vector store; returns the seconds it took."""
+        started = time.perf_counter()
+        self.engine.warmup()
+        return time.perf_counter() - started
+
+    def serve_forever(self):
+        """Serves requests until interrupted."""
+        self.started_at = time.time()
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+
+    def _handler(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/health":
+                    self._send_json(200, {"status": "ok", "started_at": service.started_at})
+                elif self.path == "/metrics":
+                    self._send(200, metrics.render_prometheus().encode(), "text/plain; version=0.0.4")
+                else:
+                    self._send_json(404, {"error": f"Unknown path {self.path}"})
+
+            def do_POST(self):
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                    request = json.loads(self.rfile.read(length) or b"{}")
+                    query = request["query"]
+                except (ValueError, KeyError):
+                    self._send_json(400, {"error": "Expected a JSON body with a 'query' field."})
+                    return
+
+                try:
+                    if self.path == "/retrieve":
+                        documents = service.engine.retrieve(query)
+                        self._send_json(200, {"documents": [
+                            {"page_content": doc.page_content, "metadata": doc.metadata} for doc in documents
+                        ]})
+                    elif self.path == "/answer":
+                        self._send_json(200, {"answer": service.engine.answer(query)})
+                    elif self.path == "/answer/stream":
+                        self._stream(service.engine.stream_answer(query))
+                    else:
+                        self._send_json(404, {"error": f"Unknown path {self.path}"})
+                except ConfigurationError as e:
+                    logging.error(f"Query service is not configured: {e}")
+                    self._send_json(503, {"error": str(e)})
+                except Exception as e:
+                    logging.exception("Query service request failed")
+                    self._send_json(500, {"error": str(e)})
+
+            def _stream(self, pieces):
+                # Pull the first piece before sending headers so setup errors still get a status code
+                pieces = iter(pieces)
+                first = next(pieces, "")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                # The body runs until the connection closes, so it can never be followed by another response
+                self.close_connection = True
+                try:
+                    for piece in itertools.chain([first], pieces):
+                        self._send_event(json.dumps(piece))
+                except OSError:
+                    logging.info("Query service client disconnected during a streamed answer")
+                except Exception as e:
+                    # The status line is already out; report the failure in-band and end the stream
+                    logging.exception("Query service stream failed")
+                    try:
+                        self._send_event(json.dumps({"error": str(e)}), event="error")
+                    except OSError:
+                        pass
+
+            def _send_event(self, data: str, event: str = None):
+                self.wfile.write((f"event: {event}\n" if event else "").encode() + f"data: {data}\n\n".encode())
+                self.wfile.flush()
+
+            def _send_json(self, status: int, payload: dict):
+                self._send(status, json.dumps(payload).encode(), "application/json")
+
+            def _send(self, status: int, body: bytes, content_type: str):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logging.debug(format, *args)
+
+        return Handler
+
+
+class QueryServiceClient:
+    """Minimal client for a running QueryService."""
+
+    def __init__(self, url: str = f"http://{DEFAULT_HOST}:{DEFAULT_PORT}", timeout: float = 120.0):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def retrieve(self, query: str) -> list[dict]:
+        """Returns the retrieved documents as dicts with page_content and metadata."""
+        return self._post("/retrieve", {"query": query})["documents"]
+
+    def answer(self, query: str) -> str:
+        """Returns the generated answer."""
+        return self._post("/answer", {"query": query})["answer"]
+
+    def stream_answer(self, query: str) -> Iterator[str]:
+        """
+        Yields the answer as the service generates it.
+
+        :raises RuntimeError: If the service reports an error after the stream has started
+        """
+        request = urllib.request.Request(
+            self.url + "/answer/stream", data=json.dumps({"query": query}).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            event = None
+            for line in response:
+                line = line.decode("utf-8").rstrip("\r\n")
+                if line.startswith("event: "):
+                    event = line[len("event: "):]
+                elif line.startswith("data: "):
+                    data = json.loads(line[len("data: "):])
+                    if event == "error":
+                        raise RuntimeError(f"Query service failed mid-answer: {data['error']}")
+                    yield data
+                elif not line:
+                    event = None
+
+    def healthy(self) -> bool:
+        """True if the service is up."""
+        try:
+            with urllib.request.urlopen(self.url + "/health", timeout=self.timeout) as response:
+                return response.status == 200
+        except OSError:
+            return False
+
+    def _post(self, path: str, payload: dict) -> dict:
+        request = urllib.request.Request(
+            self.url + path, data=json.dumps(payload).encode(), headers={"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the resident Immigo query service.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    service = QueryService(host=args.host, port=args.port)
+    logging.info(f"Warmed up in {service.warmup():.2f}s, serving on {service.url}")
+    service.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
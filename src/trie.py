@@ -0,0 +1,44 @@
+import re
+
+
+def trie_pattern(sequences: list[list[str]]) -> str:
+    """
+    Compiles alternatives into a single regex shaped like a prefix trie.
+
+    Each alternative is a sequence of regex tokens (usually escaped characters). Shared
+    prefixes are factored out, so the regex engine walks the alternatives character by
+    character instead of retrying every alternative at every position.
+    """
+    root = {}
+    for sequence in sequences:
+        node = root
+        for token in sequence:
+            node = node.setdefault(token, {})
+        node[""] = None  # End-of-alternative marker; "" is never a token
+
+    def emit(node: dict) -> str:
+        branches = []
+        for token in sorted(key for key in node if key):
+            # Walk straight through single-child chains so recursion only happens at branches
+            parts = [token]
+            child = node[token]
+            while len(child) == 1 and "" not in child:
+                (token, child), = child.items()
+                parts.append(token)
+            parts.append(emit(child))
+            branches.append("".join(parts))
+
+        if not branches:
+            return ""
+        if "" in node:
+            return "(?:" + "|".join(branches) + ")?"
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
+
+    return emit(root)
+
+
+def literal_tokens(text: str) -> list[str]:
+    """Splits a literal string into escaped single-character regex tokens."""
+    return [re.escape(char) for char in text]
@@ -0,0 +1,154 @@
+import json
+import re
+from collections import Counter
+from typing import Iterable, Iterator
+from src.trie import trie_pattern, literal_tokens
+
+# Declarative rule set shared by batch/url_filter.py and utils.load_urls. Extensions,
+# substrings and URL prefixes are matched case-insensitively.
+DEFAULT_RULES = {
+    "extensions": [".xlsx", ".mp3", ".mp4", ".doc", ".csv", ".docx", ".pptx"],
+    "substrings": [
+        "/es", "pashto", "dari", "korean",
+        "chinese", "spanish", "tagalog", "vietnamese", "amharic", "arabic",
+        "hindi", "creole", "farsi", "french", "polish", "punjabi", "russian",
+        "somali", "urdu", "portugese", "portuguese", "kor", "viet", "arab",
+        "nepali", "/contracts", "foia", "posters/", "outreach-engagements/",
+        "website-metrics/", "outreach/", "save/", "lesson-plans/", "memos/",
+        "presentations/", "notices/", "brochures/", "flash-cards/",
+        "injunctions/", "flyers/", "legal-docs/", "checklists/", "charts/",
+        "aao-decisions/", "outstanding-americans-by-choice/", "reports/", "tip-sheets",
+        "uscis-facilities-dedicated-to-the-memory-of-immigrant-medal-of-honor-recipients/",
+    ],
+    # Full URL prefixes, so that a rule for one host does not reject the same path on another
+    "url_prefixes": ["https://www.uscis.gov/archive"],
+    # Any 4-digit number in this range rejects the URL
+    "year_range": [1990, 2020],
+    # FYxx markers in this range (FY01 to FY20) reject the URL
+    "fiscal_year_range": [1, 20],
+}
+
+
+class URLFilter:
+    """
+    Compiled URL filter.
+
+    Extensions and URL prefixes are checked with tuple `endswith` / `startswith`. The
+    substring, year and fiscal-year rules are compiled into one trie-shaped regex that
+    is run per path segment (with its neighbouring slashes, since rule substrings only
+    carry slashes at their ends). Segment verdicts are memoized, so the directory parts
+    shared by most sitemap URLs are only scanned once. The first rule that rejects a URL
+    is reported, which also drives the per-rule rejection counts.
+    """
+
+    def __init__(self, rules: dict = None, cache_size: int = 100_000):
+        """
+        :param rules: Rule overrides; missing keys fall back to DEFAULT_RULES
+        :param cache_size: Number of memoized segment verdicts before the memo is reset
+        """
+        self.rules = {**DEFAULT_RULES, **(rules or {})}
+        self.stats = Counter()
+        self.extensions = tuple(ext.lower() for ext in self.rules.get("extensions") or ())
+        self.url_prefixes = tuple(prefix.lower() for prefix in self.rules.get("url_prefixes") or ())
+        self.year_range = tuple(self.rules["year_range"]) if self.rules.get("year_range") else None
+        self.fiscal_year_range = tuple(self.rules["fiscal_year_range"]) if self.rules.get("fiscal_year_range") else None
+        self.pattern = self.compile(self.rules)
+        self.cache_size = cache_size
+        self._segments = {}
+
+    @classmethod
+    def from_json(cls, path: str) -> "URLFilter":
+        """Loads a rule set from a JSON file; missing keys fall back to DEFAULT_RULES."""
+        with open(path, "r") as file:
+            return cls(json.load(file))
+
+    @staticmethod
+    def compile(rules: dict) -> re.Pattern:
+        """Builds the combined segment pattern; each alternative is a named group identifying its rule kind."""
+        for substring in rules.get("substrings") or ():
+            if "/" in substring.strip("/"):
+                raise ValueError(f"Substring rule {substring!r} may only contain slashes at its ends.")
+
+        alternatives = []
+        if rules.get("substrings"):
+            substrings = trie_pattern([literal_tokens(sub.lower()) for sub in rules["substrings"]])
+            alternatives.append(f"(?P<substring>{substrings})")
+        if rules.get("fiscal_year_range"):
+            # Not preceded by a letter, so words such as "notify10" are not fiscal years
+            alternatives.append(r"(?<![a-z])fy(?P<fiscal_year>\d\d)")
+        if rules.get("year_range"):
+            alternatives.append(r"(?P<year>\d{4})")
+        return re.compile("|".join(alternatives) or r"(?!)")
+
+    def rejection_rule(self, url: str) -> str:
+        """Returns the name of the first rule that rejects the URL, or None if it is valid."""
+        url = url.lower()
+        if self.extensions and url.endswith(self.extensions):
+            return "extension:" + next(ext for ext in self.extensions if url.endswith(ext))
+
+        if self.url_prefixes and url.startswith(self.url_prefixes):
+            return "url_prefix:" + next(prefix for prefix in self.url_prefixes if url.startswith(prefix))
+
+        segments = url.split("/")
+        last = len(segments) - 1
+        for i, segment in enumerate(segments):
+            window = ("/" if i else "") + segment + ("/" if i < last else "")
+            try:
+                rule = self._segments[window]
+            except KeyError:
+                if len(self._segments) >= self.cache_size:
+                    self._segments.clear()
+                rule = self._segments[window] = self._scan(window)
+            if rule:
+                return rule
+        return None
+
+    def _scan(self, text: str) -> str:
+        for match in self.pattern.finditer(text):
+            kind = match.lastgroup
+            if kind == "year":
+                if self.year_range[0] <= int(match.group(kind)) <= self.year_range[1]:
+                    return "year"
+            elif kind == "fiscal_year":
+                if self.fiscal_year_range[0] <= int(match.group(kind)) <= self.fiscal_year_range[1]:
+                    return "fiscal_year"
+            else:
+                return f"{kind}:{match.group(kind)}"
+        return None
+
+    def is_valid(self, url: str) -> bool:
+        """Checks if a URL should be processed."""
+        return self.rejection_rule(url) is None
+
+    def filter(self, lines: Iterable[str]) -> Iterator[str]:
+        """
+        Streams valid, de-duplicated URLs from an iterable of lines, keeping the first occurrence.
+
+        Duplicates are detected by 64-bit string hash rather than by keeping the URLs, so
+        memory per distinct URL stays small and independent of URL length. Counts are
+        accumulated in `stats`.
+        """
+        seen = set()
+        for line in lines:
+            url = line.strip()
+            if not url:
+                continue
+            digest = hash(url)
+            if digest in seen:
+                self.stats["duplicate"] += 1
+                continue
+            seen.add(digest)
+
+            rule = self.rejection_rule(url)
+            if rule:
+                self.stats[rule] += 1
+                continue
+            self.stats["accepted"] += 1
+            yield url
+
+    def filter_file(self, file_path: str, dest_file_path: str) -> Counter:
+        """Filters a URL file line by line into dest_file_path and returns the counts."""
+        with open(file_path, "r") as source, open(dest_file_path, "w") as dest:
+            for url in self.filter(source):
+                dest.write(url + "\n")
+        return self.stats
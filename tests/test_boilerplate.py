@@ -0,0 +1,48 @@
+import re
+
+from src.boilerplate import BoilerplateModel, USCIS_FOOTER, normalize_domain
+from src.trie import literal_tokens, trie_pattern
+
+HEADER = "skip to main content an official website of the united states government"
+FOOTER = "return to top contact us privacy policy accessibility site map"
+
+
+def test_trie_pattern_matches_like_plain_alternation():
+    words = ["i-130", "i-131", "i-130a", "i-485", "n-400"]
+    trie = re.compile(trie_pattern([literal_tokens(word) for word in words]))
+
+    for text in words + ["i-13", "i-4850", "n-40"]:
+        expected = max((word for word in words if text.startswith(word)), key=len, default=None)
+        match = trie.match(text)
+        assert (match.group() if match else None) == expected
+
+
+def test_learned_model_removes_shared_header_and_footer():
+    bodies = ["one page explains filing.", "fees are covered here.", "this lists the forms.", "news for today."]
+    pages = [f"{HEADER} {body} {FOOTER}" for body in bodies]
+    model = BoilerplateModel.learn("https://www.example.gov/news", pages, shingle_size=4)
+
+    assert model.domain == "example.gov"
+    # Pages are cleaned lowercased, as utils.clean_text does
+    assert [model.clean(page.lower()) for page in pages] == bodies
+
+
+def test_phrases_only_match_whole_words():
+    model = BoilerplateModel("example.gov", ["site map"])
+
+    assert model.clean("See the site map.") == "See the site map."
+    assert model.clean("See the site map") == "See the"
+    assert model.clean("site map first") == "first"
+
+
+def test_load_falls_back_to_seed_phrases(tmp_path):
+    model = BoilerplateModel.load("www.uscis.gov", model_dir=str(tmp_path))
+
+    assert model.clean(f"Policy text. {USCIS_FOOTER}") == "Policy text."
+    assert BoilerplateModel.load("example.gov", model_dir=str(tmp_path)).clean(" a  b ") == "a b"
+
+
+def test_saved_model_round_trips(tmp_path):
+    BoilerplateModel("Example.gov", [HEADER]).save(str(tmp_path))
+
+    assert BoilerplateModel.load(normalize_domain("https://example.gov/x"), model_dir=str(tmp_path)).phrases == [HEADER]
@@ -0,0 +1,126 @@
+import sys
+import threading
+import types
+
+import pytest
+from langchain.schema import Document
+
+from src import chat_model
+from src.chat_model import ChatModel
+
+
+class Chunk:
+    def __init__(self, content, usage_metadata=None):
+        self.content = content
+        self.usage_metadata = usage_metadata
+
+
+class RateLimited(Exception):
+    def __init__(self, retry_after=None):
+        super().__init__("Rate limit reached")
+        self.status_code = 429
+        self.response = types.SimpleNamespace(status_code=429,
+                                              headers={"retry-after": retry_after} if retry_after else {})
+
+
+class FakeGroq:
+    """Streams the given answers, raising the queued errors before the first token of the first attempts."""
+
+    def __init__(self, tokens=("Hello", " world"), errors=()):
+        self.tokens = tokens
+        self.errors = list(errors)
+        self.calls = 0
+
+    def stream(self, messages):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        for token in self.tokens:
+            yield Chunk(token)
+        yield Chunk("", usage_metadata={"output_tokens": len(self.tokens)})
+
+
+@pytest.fixture
+def make_model(monkeypatch):
+    monkeypatch.setitem(sys.modules, "langchain_groq", types.SimpleNamespace(ChatGroq=lambda **kwargs: None))
+
+    def make(groq, **kwargs):
+        model = ChatModel(api_key="test", **kwargs)
+        model.groq = groq
+        return model
+
+    return make
+
+
+def test_missing_api_key_is_a_configuration_error(monkeypatch):
+    monkeypatch.delenv("GROQ_API_KEY", raising=False)
+    from src.errors import ConfigurationError
+
+    with pytest.raises(ConfigurationError):
+        ChatModel()
+
+
+def test_rate_limited_request_backs_off_without_holding_a_slot(make_model, monkeypatch):
+    model = make_model(FakeGroq(errors=[RateLimited(retry_after="0.25"), RateLimited()]), max_concurrency=1,
+                       backoff_base=1.0, backoff_max=4.0)
+    sleeps = []
+
+    def sleep(seconds):
+        # Another request can take the only slot while this one waits
+        assert model._slots.acquire(blocking=False)
+        model._slots.release()
+        sleeps.append(seconds)
+
+    monkeypatch.setattr(chat_model.time, "sleep", sleep)
+    stats = {}
+    assert "".join(model.stream("question", [], stats)) == "Hello world"
+
+    # Retry-After is honoured; without it the delay doubles per attempt, with jitter
+    assert sleeps[0] == 0.25 and 1.0 <= sleeps[1] <= 2.0
+    assert stats["retries"] == 2 and stats["output_tokens"] == 2
+    assert model.stats["requests"] == 1 and model.stats["retries"] == 2
+
+
+def test_gives_up_after_max_retries(make_model, monkeypatch):
+    groq = FakeGroq(errors=[RateLimited() for _ in range(3)])
+    model = make_model(groq, max_retries=2)
+    monkeypatch.setattr(chat_model.time, "sleep", lambda seconds: None)
+
+    with pytest.raises(RateLimited):
+        list(model.stream("question", []))
+    assert groq.calls == 3
+    assert model._slots.acquire(blocking=False)
+
+
+def test_errors_that_are_not_retryable_are_raised_at_once(make_model):
+    groq = FakeGroq(errors=[ValueError("bad request")])
+
+    with pytest.raises(ValueError):
+        list(make_model(groq).stream("question", []))
+    assert groq.calls == 1
+
+
+def test_slow_reader_does_not_hold_a_slot(make_model):
+    model = make_model(FakeGroq(), max_concurrency=1)
+
+    first = model.stream("first", [])
+    assert next(first) == "Hello"
+    # The first answer is still being read, yet a second request can start and finish
+    answered = []
+    thread = threading.Thread(target=lambda: answered.append(model.answer("second", [])))
+    thread.start()
+    thread.join(timeout=5)
+
+    assert answered == ["Hello world"]
+    assert "".join(first) == " world"
+
+
+def test_prompt_carries_the_packed_context(make_model):
+    model = make_model(FakeGroq(), context_budget=50)
+    documents = [Document(page_content="word " * 500, metadata={"source": "https://www.uscis.gov/i-130"})]
+
+    (_, system), (_, human) = model.build_messages("How long?", model.packer.pack(documents))
+    assert "Immigo" in system
+    assert human.startswith("Context:\n[https://www.uscis.gov/i-130]\n")
+    assert human.endswith("Question: How long?")
+    assert human.count("word") < 50 * 4
@@ -0,0 +1,98 @@
+import re
+import sys
+import types
+
+import pytest
+from langchain.schema import Document
+
+from src.chunker import ChunkBatcher, TokenChunker
+
+
+class WhitespaceTokenizer:
+    """Stands in for the model tokenizer: one token per whitespace-separated word."""
+
+    @classmethod
+    def from_pretrained(cls, model_name):
+        return cls()
+
+    def __call__(self, text, **kwargs):
+        return {"offset_mapping": [match.span() for match in re.finditer(r"\S+", text)]}
+
+
+@pytest.fixture
+def chunker(monkeypatch):
+    monkeypatch.setitem(sys.modules, "transformers", types.SimpleNamespace(AutoTokenizer=WhitespaceTokenizer))
+    return TokenChunker()
+
+
+class FakeStore:
+    """Records add_documents batches and fails the ones listed in `fail_batches`."""
+
+    def __init__(self, fail_batches=()):
+        self.batches = []
+        self.fail_batches = set(fail_batches)
+
+    def add_documents(self, documents):
+        self.batches.append(documents)
+        if len(self.batches) - 1 in self.fail_batches:
+            raise RuntimeError("upsert failed")
+        return [f"{doc.metadata['source']}#{doc.metadata['chunk']}" for doc in documents]
+
+
+def words(start: int, end: int) -> str:
+    return " ".join(f"w{i}" for i in range(start, end))
+
+
+def test_chunks_are_250_tokens_with_40_overlap(chunker):
+    chunks = [chunk.split() for chunk in chunker.split_text(words(0, 600))]
+
+    # Windows start every 210 tokens; the last one ends at the final token
+    assert [(chunk[0], chunk[-1], len(chunk)) for chunk in chunks] == [
+        ("w0", "w249", 250), ("w210", "w459", 250), ("w420", "w599", 180),
+    ]
+    assert chunks[0][-40:] == chunks[1][:40]
+
+
+def test_text_that_fits_one_window_is_one_chunk(chunker):
+    assert list(chunker.split_text(words(0, 250))) == [words(0, 250)]
+    assert len(list(chunker.split_text(words(0, 251)))) == 2
+    assert list(chunker.split_text("   ")) == []
+
+
+def test_overlap_must_be_smaller_than_the_chunk():
+    with pytest.raises(ValueError):
+        TokenChunker(chunk_tokens=40, overlap_tokens=40)
+
+
+def chunks_of(source: str, count: int) -> list[Document]:
+    return [Document(page_content=f"{source} {i}", metadata={"source": source, "chunk": i}) for i in range(count)]
+
+
+def test_on_complete_fires_after_the_last_batch_of_a_url():
+    completed = []
+    batcher = ChunkBatcher(FakeStore(), batch_size=4, on_complete=lambda key, ids: completed.append((key, ids)))
+
+    batcher.add("a", chunks_of("a", 6))
+    # a's last two chunks are still waiting in the unflushed batch
+    assert completed == []
+    batcher.add("b", chunks_of("b", 1))
+    assert completed == []
+    batcher.flush()
+
+    assert completed == [("a", [f"a#{i}" for i in range(6)]), ("b", ["b#0"])]
+
+
+def test_on_error_fires_once_per_url_in_a_failed_batch():
+    completed, failed = [], []
+    batcher = ChunkBatcher(FakeStore(fail_batches={1}), batch_size=3,
+                           on_complete=lambda key, ids: completed.append(key),
+                           on_error=lambda key, error: failed.append((key, str(error))))
+
+    batcher.add("a", chunks_of("a", 2))
+    batcher.add("b", chunks_of("b", 2))  # batch 0: a0 a1 b0
+    batcher.add("c", chunks_of("c", 2))  # batch 1 fails: b1 c0 c1
+    batcher.add("d", chunks_of("d", 1))
+    batcher.flush()
+
+    assert completed == ["a", "d"]
+    assert failed == [("b", "upsert failed"), ("c", "upsert failed")]
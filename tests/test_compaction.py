@@ -0,0 +1,107 @@
+import os
+
+from batch.compact_index import IndexCompactor
+from src import ingestion
+from src.database import document_id
+from src.http_client import HostRateLimiter
+from src.ingestion import IngestionCheckpoint, IngestionEngine
+from src.manifest import IngestionManifest
+from src.partitions import classify, partition_name
+from langchain.schema import Document
+
+BULLETIN = "https://travel.state.gov/content/travel/en/legal/visa-law0/visa-bulletin/2024/visa-bulletin-for-{}-2024.html"
+OLD_PAGE = "https://www.uscis.gov/old-page"
+NEW_PAGE = "https://www.uscis.gov/new-page"
+GREEN_CARD = "https://www.uscis.gov/green-card"
+URLS = [BULLETIN.format(month) for month in ("january", "february", "march")] + [OLD_PAGE, GREEN_CARD]
+
+
+class FakeStore:
+    """The parts of ChromaDBHandler used by ingestion and compaction, over plain dicts."""
+
+    def __init__(self, path):
+        self.path = path
+        self.collections = {}
+        self.embeddings = self
+        self.lexical_index = self
+
+    def add_documents(self, documents):
+        ids = [document_id(doc) for doc in documents]
+        for doc_id, doc in zip(ids, documents):
+            name = partition_name(*classify(doc.metadata["source"]))
+            self.collections.setdefault(name, {})[doc_id] = doc
+        return ids
+
+    def delete_documents(self, ids):
+        for collection in self.collections.values():
+            for doc_id in ids:
+                collection.pop(doc_id, None)
+
+    def sources(self):
+        return {doc.metadata["source"] for collection in self.collections.values() for doc in collection.values()}
+
+    def partitions(self):
+        return sorted(self.collections)
+
+    def iter_collection(self, name, include):
+        docs = self.collections[name]
+        yield {"ids": list(docs), "documents": [doc.page_content for doc in docs.values()],
+               "metadatas": [doc.metadata for doc in docs.values()]}
+
+    def migrate_legacy_collection(self):
+        return 0
+
+    def embed_queries(self, queries):
+        return [[0.0] for _ in queries]
+
+    def search(self, query, k, where=None):
+        return []
+
+    def compact(self):
+        open(os.path.join(self.path, "lexical_index.db"), "w").close()
+
+
+class FakeChunker:
+    def split_documents(self, documents):
+        return [Document(page_content=doc.page_content, metadata={**doc.metadata, "chunk": 0}) for doc in documents]
+
+
+class FakeScraper:
+    """Serves every URL with etag "v1"; the old page redirects to the new one."""
+    etags = {}
+
+    def scrape(self, url, headers=None):
+        self.validators = {"etag": self.etags.get(url, '"v1"'), "last_modified": None}
+        self.final_url = NEW_PAGE if url == OLD_PAGE else url
+        return [Document(page_content=f"Content of {self.final_url}", metadata={"source": url})]
+
+
+def ingest(store, manifest, tmp_path):
+    engine = IngestionEngine(chroma_db=store, max_workers=2, chunker=FakeChunker(), manifest=manifest,
+                             rate_limiter=HostRateLimiter(host_rates={}),
+                             checkpoint=IngestionCheckpoint(str(tmp_path / "checkpoint.jsonl")))
+    return engine.run(URLS)
+
+
+def test_removed_documents_stay_removed_after_ingestion(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingestion.ScraperFactory, "get_scraper", lambda *args, **kwargs: FakeScraper())
+    store = FakeStore(str(tmp_path))
+    manifest = IngestionManifest(str(tmp_path / "manifest.db"))
+    assert ingest(store, manifest, tmp_path)["indexed"] == 5
+
+    compactor = IndexCompactor(store, manifest, keep_bulletins=2)
+    monkeypatch.setattr(compactor, "check_url", lambda url: "replaced" if url == OLD_PAGE else None)
+    compactor.run()
+    removed = {BULLETIN.format("january"), OLD_PAGE}
+    assert not store.sources() & removed
+
+    stats = ingest(store, manifest, tmp_path)
+    assert stats["removed"] == 2 and stats["indexed"] == 0
+    assert not store.sources() & removed
+    assert store.sources() == set(URLS) - removed
+
+    # A new version of a removed page (changed validators) is ingested again
+    monkeypatch.setattr(FakeScraper, "etags", {BULLETIN.format("january"): '"v2"'})
+    stats = ingest(store, manifest, tmp_path)
+    assert stats["indexed"] == 1 and BULLETIN.format("january") in store.sources()
+    assert manifest.get(BULLETIN.format("january"))["removed_reason"] is None
@@ -0,0 +1,63 @@
+from langchain.schema import Document
+
+from src.context_packer import ContextPacker, approximate_tokens
+
+
+def doc(source: str, text: str) -> Document:
+    return Document(page_content=text, metadata={"source": source})
+
+
+def packed_tokens(packed: list[Document]) -> int:
+    return sum(approximate_tokens(f"[{d.metadata['source']}]\n") + 1 + approximate_tokens(d.page_content)
+               for d in packed)
+
+
+def test_everything_fits_under_a_large_budget():
+    documents = [doc("a", "first chunk"), doc("b", "second chunk"), doc("a", "third chunk")]
+
+    packed = ContextPacker(budget_tokens=1000).pack(documents)
+
+    # Sources keep the order of their best-ranked chunk, with their chunks merged
+    assert [(d.metadata["source"], d.page_content) for d in packed] == [
+        ("a", "first chunk\n...\nthird chunk"), ("b", "second chunk"),
+    ]
+
+
+def test_last_chunk_is_truncated_at_a_word_boundary():
+    documents = [doc("a", " ".join(f"word{i}" for i in range(100))), doc("b", "never reached")]
+
+    packed = ContextPacker(budget_tokens=60).pack(documents)
+
+    assert [d.metadata["source"] for d in packed] == ["a"]
+    words = packed[0].page_content.split()
+    assert words == [f"word{i}" for i in range(len(words))]
+    assert 0 < len(words) < 100
+    assert packed_tokens(packed) <= 60
+
+
+def test_budget_is_respected_across_sources():
+    documents = [doc(f"https://www.uscis.gov/page-{i}", f"page {i} " * 40) for i in range(10)]
+
+    packed = ContextPacker(budget_tokens=300).pack(documents)
+
+    assert 1 < len(packed) < 10
+    assert packed_tokens(packed) <= 300
+
+
+def test_duplicates_and_per_source_cap_are_dropped():
+    documents = [doc("a", "same  text"), doc("b", "same text")] + [doc("a", f"chunk {i}") for i in range(5)]
+
+    packed = ContextPacker(budget_tokens=1000, max_chunks_per_source=3).pack(documents)
+
+    assert [(d.metadata["source"], d.page_content) for d in packed] == [
+        ("a", "same text\n...\nchunk 0\n...\nchunk 1"),
+    ]
+
+
+def test_custom_token_counter():
+    packer = ContextPacker(budget_tokens=8, count_tokens=lambda text: len(text.split()))
+
+    packed = packer.pack([doc("a", "one two three four five six seven eight nine")])
+
+    # The header "[a]" costs one token and the newline one more, leaving six words
+    assert packed[0].page_content == "one two three four five six"
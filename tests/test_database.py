@@ -0,0 +1,82 @@
+from src import database
+from src.database import ChromaDBHandler
+
+
+class ListingClient:
+    def __init__(self, names):
+        self.names = names
+
+    def list_collections(self):
+        return list(self.names)
+
+
+def test_partitions_pick_up_collections_created_by_another_process(tmp_path, monkeypatch):
+    handler = ChromaDBHandler(str(tmp_path / "chroma"))
+    client = handler._client = ListingClient(["uscis_gov__web", "archive__uscis_gov__web", "scraped_docs_test"])
+    assert handler.partitions() == ["uscis_gov__web"]
+
+    client.names.append("travel_state_gov__visa_bulletin")
+    assert handler.partitions() == ["uscis_gov__web"]
+
+    monkeypatch.setattr(database, "PARTITIONS_TTL", 0.0)
+    assert handler.partitions() == ["travel_state_gov__visa_bulletin", "uscis_gov__web"]
+
+
+class FakeCollection:
+    def __init__(self, name):
+        self.name = name
+        self.rows = {}
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        assert len(set(ids)) == len(ids), "Chroma rejects duplicate IDs in one call"
+        for row in zip(ids, documents, metadatas, embeddings):
+            self.rows[row[0]] = row[1:]
+
+    def get(self, limit, offset, include):
+        ids = list(self.rows)[offset:offset + limit]
+        columns = list(zip(*(self.rows[doc_id] for doc_id in ids))) or [(), (), ()]
+        return {"ids": ids, "documents": list(columns[0]), "metadatas": list(columns[1]),
+                "embeddings": list(columns[2])}
+
+    def count(self):
+        return len(self.rows)
+
+
+class FakeClient:
+    def __init__(self):
+        self.collections = {}
+
+    def list_collections(self):
+        return list(self.collections)
+
+    def get_or_create_collection(self, name):
+        return self.collections.setdefault(name, FakeCollection(name))
+
+    def delete_collection(self, name):
+        del self.collections[name]
+
+
+def test_migration_assigns_deterministic_ids(tmp_path):
+    from langchain.schema import Document
+
+    handler = ChromaDBHandler(str(tmp_path / "migrate"))
+    client = handler._client = FakeClient()
+    legacy = client.get_or_create_collection(database.LEGACY_COLLECTION_NAME)
+    page = "https://www.uscis.gov/green-card"
+    legacy.upsert(
+        ids=["uuid-1", "uuid-2", "uuid-3"],
+        embeddings=[[1.0], [1.0], [2.0]],
+        documents=["Green card", "Green card", "Form page"],
+        # The same page ingested twice by the legacy pipeline, and one PDF page
+        metadatas=[{"source": page}, {"source": page}, {"source": "https://www.uscis.gov/a.pdf", "page": 2}],
+    )
+
+    assert handler.migrate_legacy_collection() == 3
+
+    assert database.LEGACY_COLLECTION_NAME not in client.collections
+    migrated = {doc_id for collection in client.collections.values() for doc_id in collection.rows}
+    expected = {database.document_id(Document(page_content="", metadata={"source": page, "chunk": 0})),
+                database.document_id(Document(page_content="", metadata={"source": "https://www.uscis.gov/a.pdf",
+                                                                         "page": 2}))}
+    assert migrated == expected
+    assert handler.lexical_index.count() == 2
@@ -0,0 +1,77 @@
+from langchain_core.embeddings import Embeddings
+
+from src.embedding_cache import CachedEmbeddings
+
+
+class CountingEmbeddings(Embeddings):
+    """Deterministic embeddings that record every text they encode."""
+
+    def __init__(self):
+        self.encoded = []
+
+    def embed_documents(self, texts):
+        self.encoded.extend(texts)
+        return [[len(text) / 3, 0.1, -1.0] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def make_cache(tmp_path, embeddings, **kwargs) -> CachedEmbeddings:
+    return CachedEmbeddings(embeddings, "test-model", path=str(tmp_path / "cache.db"), **kwargs)
+
+
+def test_memory_tier_hit(tmp_path):
+    embeddings = CountingEmbeddings()
+    cache = make_cache(tmp_path, embeddings)
+
+    first = cache.embed_documents(["Form I-130", "Form I-485"])
+    # Whitespace differences share a key
+    assert cache.embed_documents(["Form  I-130"]) == first[:1]
+    assert embeddings.encoded == ["Form I-130", "Form I-485"]
+    assert cache.stats()["hits"] == 1
+
+
+def test_disk_tier_hit_after_restart(tmp_path):
+    make_cache(tmp_path, CountingEmbeddings()).embed_documents(["Form I-130"])
+
+    embeddings = CountingEmbeddings()
+    cache = make_cache(tmp_path, embeddings)
+    cache.embed_documents(["Form I-130"])
+
+    assert embeddings.encoded == []
+    assert cache.stats()["disk_entries"] == 1
+
+
+def test_vectors_round_trip_as_float32(tmp_path):
+    computed = make_cache(tmp_path, CountingEmbeddings()).embed_documents(["Form I-130"])[0]
+    from_disk = make_cache(tmp_path, CountingEmbeddings()).embed_documents(["Form I-130"])[0]
+
+    assert from_disk == computed
+    # 10 / 3 and 0.1 are not exactly representable, so only float32 precision is kept
+    assert from_disk != [10 / 3, 0.1, -1.0]
+    assert all(abs(a - b) < 1e-6 for a, b in zip(from_disk, [10 / 3, 0.1, -1.0]))
+
+
+def test_storing_a_cached_key_again_does_not_grow_the_count(tmp_path):
+    cache = make_cache(tmp_path, CountingEmbeddings())
+    cache.embed_documents(["Form I-130"])
+
+    cache._store({cache.key("Form I-130"): [1.0, 2.0, 3.0]})
+    assert cache.stats()["disk_entries"] == 1
+
+
+def test_disk_tier_evicts_least_recently_used(tmp_path):
+    cache = make_cache(tmp_path, CountingEmbeddings(), memory_entries=1, max_disk_entries=10)
+    cache.embed_documents([f"text {i}" for i in range(10)])
+    cache.embed_documents(["text 0"])  # touched, so it survives eviction
+
+    cache.embed_documents(["text 10"])
+
+    assert cache.stats()["disk_entries"] == 9
+    embeddings = CountingEmbeddings()
+    reopened = make_cache(tmp_path, embeddings)
+    reopened.embed_documents(["text 0", "text 10"])
+    assert embeddings.encoded == []
+    reopened.embed_documents(["text 1"])
+    assert embeddings.encoded == ["text 1"]
@@ -0,0 +1,74 @@
+import pytest
+
+from src import embeddings
+from src.embeddings import create_embeddings, length_sorted_batches
+from src.errors import ConfigurationError
+
+
+class Recorder:
+    """Stands in for an embeddings class, recording the options it was built with."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def __call__(self, **options):
+        self.options = options
+        return self
+
+
+@pytest.fixture
+def backends(monkeypatch):
+    for name in ("IMMIGO_EMBEDDING_BACKEND", "IMMIGO_EMBEDDING_BATCH_SIZE", "IMMIGO_EMBEDDING_PROCESSES",
+                 "IMMIGO_ONNX_MODEL_PATH", "IMMIGO_ONNX_QUANTIZED"):
+        monkeypatch.delenv(name, raising=False)
+    recorders = {"sentence-transformers": Recorder("sentence-transformers"), "onnx": Recorder("onnx")}
+    monkeypatch.setattr(embeddings, "SentenceTransformerEmbeddings", recorders["sentence-transformers"])
+    monkeypatch.setattr(embeddings, "OnnxEmbeddings", recorders["onnx"])
+    return recorders
+
+
+def test_defaults_to_sentence_transformers(backends):
+    built = create_embeddings()
+
+    assert built.backend == "sentence-transformers"
+    assert built.options == {"batch_size": 32, "processes": 0}
+
+
+def test_backend_and_options_come_from_the_environment(backends, monkeypatch):
+    monkeypatch.setenv("IMMIGO_EMBEDDING_BACKEND", "onnx")
+    monkeypatch.setenv("IMMIGO_EMBEDDING_BATCH_SIZE", "64")
+    monkeypatch.setenv("IMMIGO_ONNX_MODEL_PATH", "/models/minilm")
+    monkeypatch.setenv("IMMIGO_ONNX_QUANTIZED", "1")
+
+    built = create_embeddings()
+
+    assert built.backend == "onnx"
+    assert built.options == {"batch_size": 64, "model_path": "/models/minilm", "quantized": True}
+
+
+def test_arguments_override_the_environment(backends, monkeypatch):
+    monkeypatch.setenv("IMMIGO_EMBEDDING_BACKEND", "onnx")
+
+    built = create_embeddings("sentence-transformers", processes=4)
+
+    assert built.backend == "sentence-transformers"
+    assert built.options["processes"] == 4
+
+
+def test_onnx_without_a_model_path_is_a_configuration_error(backends):
+    with pytest.raises(ConfigurationError):
+        create_embeddings("onnx")
+
+
+def test_unknown_backend_is_rejected(backends):
+    with pytest.raises(ValueError, match="openvino"):
+        create_embeddings("openvino")
+
+
+def test_length_sorted_batches_cover_every_text_once():
+    texts = ["a", "abcd", "ab", "abcdef", "abc"]
+
+    batches = list(length_sorted_batches(texts, 2))
+
+    assert [batch for _, batch in batches] == [["abcdef", "abcd"], ["abc", "ab"], ["a"]]
+    assert sorted(i for indices, _ in batches for i in indices) == list(range(5))
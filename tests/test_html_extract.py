@@ -0,0 +1,55 @@
+from src.html_extract import HTMLPage, PrefixMatcher
+
+URL = "https://www.uscis.gov/newsroom/news-releases"
+
+
+def test_main_text_drops_page_chrome():
+    page = HTMLPage(
+        "<html><body><header><nav><a href='/'>Home</a></nav>Site header</header>"
+        "<main><h2>Sub</h2><p>Hello <b>bold</b> world</p><ul><li>one</li><li>two</li></ul></main>"
+        "<div role='contentinfo'>Contact</div><footer>Site footer</footer></body></html>",
+        URL,
+    )
+    assert page.main_text() == "Sub\nHello bold world\none\ntwo"
+
+
+def test_main_text_keeps_article_header_and_title_above_main():
+    page = HTMLPage(
+        "<html><body><header>Site header</header><h1>Green card</h1>"
+        "<main><article><header><h2>I-485 instructions</h2></header><p>Body para one.</p><p>Body two.</p>"
+        "<footer>Last reviewed 2024</footer></article></main><footer>Site footer</footer></body></html>",
+        URL,
+    )
+    assert page.main_text() == "Green card\nI-485 instructions\nBody para one.\nBody two.\nLast reviewed 2024"
+
+
+def test_main_text_keeps_pages_wrapped_in_a_form():
+    page = HTMLPage(
+        "<html><body><form id='aspnetForm'><header>Site header</header>"
+        "<main><p>Visa bulletin text.</p></main></form></body></html>",
+        URL,
+    )
+    assert page.main_text() == "Visa bulletin text."
+
+
+def test_metadata_and_links():
+    page = HTMLPage(
+        "<html lang='en'><head><title>News | USCIS</title><meta name='description' content='Releases'></head>"
+        "<body><nav><a href='/about'>About</a></nav><a href='/newsroom/news-releases/a'>A</a>"
+        "<a href='https://travel.state.gov/x'>B</a><a rel='nofollow next' href='?page=2'>Next</a></body></html>",
+        URL,
+    )
+    matcher = PrefixMatcher(["https://www.uscis.gov/newsroom/news-releases/"])
+    assert page.metadata() == {"source": URL, "title": "News | USCIS", "description": "Releases", "language": "en"}
+    assert page.links(base_url="https://www.uscis.gov", matcher=matcher) == {
+        "https://www.uscis.gov/newsroom/news-releases/a"
+    }
+    assert page.next_url() == URL + "?page=2"
+
+
+def test_prefix_matcher():
+    matcher = PrefixMatcher(["https://a.gov/news/", "https://a.gov/newsroom/", "https://b.gov/"])
+    assert matcher.matches("https://a.gov/newsroom/x")
+    assert matcher.matches("https://b.gov/")
+    assert not matcher.matches("https://a.gov/new")
+    assert not PrefixMatcher([]).matches("https://a.gov/")
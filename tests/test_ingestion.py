@@ -0,0 +1,38 @@
+import threading
+
+import pytest
+
+from src import ingestion
+from src.ingestion import IngestionCheckpoint, IngestionEngine
+from src.manifest import IngestionManifest
+
+
+class FakeScraper:
+    validators = {}
+    final_url = None
+
+    def scrape(self, url, headers=None):
+        return ["page"]
+
+
+class InterruptingEngine(IngestionEngine):
+    def index(self, url, documents, validators):
+        raise KeyboardInterrupt
+
+
+def test_interrupted_run_releases_fetch_threads(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingestion.ScraperFactory, "get_scraper", lambda *args, **kwargs: FakeScraper())
+    engine = InterruptingEngine(
+        chroma_db=object(), max_workers=4, queue_size=2, chunker=object(),
+        checkpoint=IngestionCheckpoint(str(tmp_path / "checkpoint.jsonl")),
+        manifest=IngestionManifest(str(tmp_path / "manifest.db")),
+    )
+    before = set(threading.enumerate())
+
+    with pytest.raises(KeyboardInterrupt):
+        engine.run([f"https://www.uscis.gov/page-{i}" for i in range(50)])
+
+    workers = set(threading.enumerate()) - before
+    for worker in workers:
+        worker.join(timeout=5)
+    assert not [worker for worker in workers if worker.is_alive()]
@@ -0,0 +1,90 @@
+from langchain.schema import Document
+
+from src.database import ChromaDBHandler
+from src.lexical_index import (
+    LexicalIndex, count_postings, decode_postings, encode_postings, is_identifier, is_identifier_query, tokenize,
+)
+
+
+def test_tokenize_keeps_identifiers_whole():
+    assert tokenize("File Form I129F and N-400 in FY25 under INA 245(k).") == [
+        "file", "form", "i-129f", "and", "n-400", "in", "fy25", "under", "ina", "245(k)",
+    ]
+    assert tokenize("H-1B cap") == ["h-1b", "cap"]
+    assert is_identifier("i-129f") and is_identifier("212(a)(9)") and not is_identifier("cap")
+
+
+def test_identifier_queries():
+    assert is_identifier_query("I-129F")
+    assert is_identifier_query("what is form N-400 fee")
+    assert not is_identifier_query("how do I apply for naturalization")
+
+
+def test_postings_round_trip():
+    postings = [(1, 3), (2, 1), (130, 200), (70_000, 1)]
+    assert decode_postings(encode_postings(postings)) == postings
+    assert decode_postings(b"") == []
+    assert count_postings(encode_postings(postings)) == 4
+    assert count_postings(b"") == 0
+
+
+def test_search_across_segments_and_after_compaction(tmp_path):
+    index = LexicalIndex(str(tmp_path / "lexical.db"))
+    index.add(["a", "b"], ["N-400 naturalization filing fee", "I-485 adjustment of status"], ["p1", "p1"])
+    index.add(["c"], ["N-400 interview and N-400 test"], ["p2"])
+    # Replacing a document drops its old postings from the results
+    index.add(["b"], ["green card renewal"], ["p1"])
+
+    assert [doc_id for doc_id, _ in index.search("N-400")] == ["c", "a"]
+    assert index.search("I-485") == []
+    assert [doc_id for doc_id, _ in index.search("N-400", partitions=["p1"])] == ["a"]
+
+    index.delete(["a"])
+    index.compact()
+    assert [doc_id for doc_id, _ in index.search("n400")] == ["c"]
+    assert index.count() == 2
+    assert index.locate(["b", "c", "missing"]) == {"b": "p1", "c": "p2"}
+
+
+def test_common_terms_are_skipped_when_the_query_has_rarer_ones(tmp_path):
+    index = LexicalIndex(str(tmp_path / "lexical.db"), max_df_ratio=0.5)
+    index.add([f"d{i}" for i in range(10)], ["uscis status update"] * 9 + ["uscis biometrics appointment"])
+    assert [doc_id for doc_id, _ in index.search("uscis biometrics", k=3)] == ["d9"]
+    assert len(index.search("uscis", k=3)) == 3
+
+
+class FakeLexicalIndex:
+    def __init__(self, ranking):
+        self.ranking = ranking
+
+    def search(self, query, k, partitions=None):
+        return [(doc_id, 1.0) for doc_id in self.ranking[:k]]
+
+
+def make_handler(tmp_path, lexical, vector):
+    handler = ChromaDBHandler(str(tmp_path / "hybrid"))
+    handler._lexical_index = FakeLexicalIndex(lexical)
+    handler.partitions = lambda: []
+    handler.search_calls = []
+
+    def search(query, k, where=None):
+        handler.search_calls.append(query)
+        return [Document(id=doc_id, page_content=doc_id) for doc_id in vector[:k]]
+
+    handler.search = search
+    handler.get_documents = lambda ids: [Document(id=doc_id, page_content=doc_id) for doc_id in ids]
+    return handler
+
+
+def test_reciprocal_rank_fusion(tmp_path):
+    handler = make_handler(tmp_path, lexical=["a", "b", "c"], vector=["b", "d"])
+    # b: 1/62 + 1/61, a: 1/61, d: 1/62, c: 1/63
+    assert [doc.id for doc in handler.hybrid_search("green card renewal", k=3, route="hybrid")] == ["b", "a", "d"]
+    assert [doc.id for doc in handler.hybrid_search("green card renewal", k=4, route="hybrid",
+                                                    lexical_weight=0.0)] == ["b", "d", "a", "c"]
+
+
+def test_identifier_queries_skip_the_dense_search(tmp_path):
+    handler = make_handler(tmp_path, lexical=["a", "b"], vector=["c"])
+    assert [doc.id for doc in handler.hybrid_search("I-129F", k=1)] == ["a"]
+    assert handler.search_calls == []
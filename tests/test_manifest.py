@@ -0,0 +1,36 @@
+import time
+
+from src.manifest import IngestionManifest
+from src.query_cache import QueryCache
+
+URL = "https://travel.state.gov/content/travel/en/legal/visa-law0/visa-bulletin/2024/visa-bulletin-for-may-2024.html"
+
+
+def test_forget_tombstones_the_entry(tmp_path):
+    manifest = IngestionManifest(str(tmp_path / "manifest.db"))
+    manifest.record(URL, {"etag": '"abc"'}, "hash", ["id-1", "id-2"])
+
+    manifest.forget({URL: "superseded", "https://www.uscis.gov/never-ingested": "gone"})
+
+    entry = manifest.get(URL)
+    assert entry["content_hash"] is None and entry["chunk_ids"] == []
+    assert entry["removed_reason"] == "superseded"
+    assert manifest.conditional_headers(URL) == {"If-None-Match": '"abc"'}
+    assert manifest.get("https://www.uscis.gov/never-ingested")["removed_reason"] == "gone"
+    assert manifest.urls() == []
+
+    manifest.record(URL, {"etag": '"def"'}, "hash", ["id-3"])
+    assert manifest.get(URL)["removed_reason"] is None
+
+
+def test_forgotten_source_invalidates_cached_retrievals(tmp_path):
+    manifest = IngestionManifest(str(tmp_path / "manifest.db"))
+    manifest.record(URL, {}, "hash", ["id-1"])
+    cache = QueryCache(manifest)
+    cache.put_retrieval("May 2024 visa bulletin", ["id-1"], [URL])
+    assert cache.get_retrieval("May 2024 visa bulletin") == ["id-1"]
+
+    time.sleep(0.01)
+    manifest.forget({URL: "gone"})
+
+    assert cache.get_retrieval("May 2024 visa bulletin") is None
@@ -0,0 +1,62 @@
+import os
+import threading
+import types
+
+from src import metrics as metrics_module
+from src.metrics import MetricsRegistry
+
+
+def make_registry(tmp_path, stage: str) -> MetricsRegistry:
+    registry = MetricsRegistry()
+    registry.enable(json_logs=False)
+    registry.profile_stages = {stage}
+    registry.profile_every = 1
+    registry.profile_dir = str(tmp_path)
+    return registry
+
+
+def test_prometheus_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.enable(json_logs=False)
+    registry.increment("immigo_scrape_errors_total", url='https://x/?q="a"\\b\nc')
+
+    line = registry.render_prometheus().splitlines()[1]
+    assert line == 'immigo_scrape_errors_total{url="https://x/?q=\\"a\\"\\\\b\\nc"} 1'
+
+
+def test_concurrent_sampled_calls_profile_one_at_a_time(tmp_path):
+    registry = make_registry(tmp_path, "search")
+    inside, release = threading.Barrier(2), threading.Event()
+
+    def call():
+        with registry.timer("search"):
+            inside.wait()
+            release.wait()
+
+    threads = [threading.Thread(target=call) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(os.listdir(tmp_path)) == 1
+    assert registry.histograms[("immigo_stage_seconds", (("stage", "search"),))].count == 2
+    # The profiling slot is free again for the next sampled call
+    with registry.timer("search"):
+        pass
+    assert len(os.listdir(tmp_path)) == 2
+
+
+def test_profiler_that_cannot_start_is_skipped(tmp_path, monkeypatch):
+    class ActiveProfiler:
+        def enable(self):
+            raise ValueError("Another profiling tool is already active")
+
+    monkeypatch.setattr(metrics_module, "cProfile", types.SimpleNamespace(Profile=ActiveProfiler))
+    registry = make_registry(tmp_path, "search")
+
+    with registry.timer("search"):
+        pass
+    assert os.listdir(tmp_path) == []
+    assert registry._profile_lock.acquire(blocking=False)
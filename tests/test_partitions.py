@@ -0,0 +1,18 @@
+from src.partitions import classify, route, select_partitions
+
+
+def test_route_ignores_a_bare_mention_of_a_form():
+    assert route("what form do I file for my spouse") is None
+    assert route("which forms do I need for naturalization") is None
+
+
+def test_route_on_unambiguous_cues():
+    assert route("current edition date of I-130") == {"content_type": {"$in": ["forms"]}}
+    assert route("visa bulletin final action dates") == {"content_type": {"$in": ["visa_bulletin"]}}
+
+
+def test_classify_and_select_partitions():
+    assert classify("https://www.uscis.gov/i-485") == ("uscis.gov", "forms")
+    partitions = ["travel_state_gov__visa_bulletin", "uscis_gov__forms", "uscis_gov__web"]
+    where = {"$and": [{"domain": "www.uscis.gov"}, {"content_type": {"$ne": "forms"}}]}
+    assert select_partitions(partitions, where) == ["uscis_gov__web"]
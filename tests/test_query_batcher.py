@@ -0,0 +1,78 @@
+import threading
+import time
+
+import pytest
+
+from src.query_batcher import QueryBatcher
+
+
+class RecordingSearch:
+    """search_many stand-in returning k numbered results per query and recording every call."""
+
+    def __init__(self, error: Exception = None):
+        self.calls = []
+        self.error = error
+
+    def __call__(self, queries, k):
+        self.calls.append((list(queries), k))
+        if self.error:
+            raise self.error
+        return [[f"{query}:{i}" for i in range(k)] for query in queries]
+
+
+def test_queries_within_the_window_share_one_call():
+    search = RecordingSearch()
+    batcher = QueryBatcher(search, window=0.05)
+
+    start = threading.Barrier(4)
+    results = {}
+
+    def submit(query, k):
+        start.wait()
+        results[query] = batcher.submit(query, k).result(timeout=5)
+
+    threads = [threading.Thread(target=submit, args=(f"q{i}", i + 1)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(search.calls) == 1
+    assert sorted(search.calls[0][0]) == ["q0", "q1", "q2", "q3"]
+    # One call at the largest k, truncated for each caller
+    assert search.calls[0][1] == 4
+    assert results == {f"q{i}": [f"q{i}:{j}" for j in range(i + 1)] for i in range(4)}
+
+
+def test_queries_after_the_window_get_their_own_call():
+    search = RecordingSearch()
+    batcher = QueryBatcher(search, window=0.005)
+
+    batcher.submit("first").result(timeout=5)
+    time.sleep(0.02)
+    batcher.submit("second").result(timeout=5)
+
+    assert [queries for queries, _ in search.calls] == [["first"], ["second"]]
+
+
+def test_batch_is_capped_at_max_batch():
+    search = RecordingSearch()
+    batcher = QueryBatcher(search, window=0.5, max_batch=2)
+
+    started = time.monotonic()
+    futures = [batcher.submit(f"q{i}") for i in range(4)]
+    for future in futures:
+        future.result(timeout=5)
+
+    assert [len(queries) for queries, _ in search.calls] == [2, 2]
+    # Full batches go out without waiting for the window to expire
+    assert time.monotonic() - started < 0.5
+
+
+def test_search_error_fans_out_to_every_caller():
+    batcher = QueryBatcher(RecordingSearch(error=RuntimeError("chroma unavailable")), window=0.05)
+
+    futures = [batcher.submit(f"q{i}") for i in range(3)]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="chroma unavailable"):
+            future.result(timeout=5)
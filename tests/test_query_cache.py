@@ -0,0 +1,48 @@
+from src.query_cache import QueryCache, normalize_query
+
+SOURCES = ["https://www.uscis.gov/i-130"]
+
+
+def same_direction(query):
+    """An embedding under which every query looks identical, as near-duplicate wordings do."""
+    return [1.0, 0.0]
+
+
+def test_normalize_query():
+    assert normalize_query("  What is  Form I-130? ") == "what is form i-130"
+
+
+def test_exact_hit_does_not_embed():
+    cache = QueryCache()
+    cache.put_answer("I-130 processing time", [1.0, 0.0], "About 12 months.", SOURCES)
+
+    def embed(query):
+        raise AssertionError("embedded on an exact hit")
+
+    assert cache.get_answer("i-130 processing time?", embed) == "About 12 months."
+
+
+def test_semantic_hit_requires_the_same_identifiers():
+    cache = QueryCache()
+    cache.put_answer("I-130 processing time", [1.0, 0.0], "About 12 months.", SOURCES)
+
+    assert cache.get_answer("how long does I-130 processing take", same_direction) == "About 12 months."
+    assert cache.get_answer("I-485 processing time", same_direction) is None
+    assert cache.get_answer("I130 and I-485 processing time", same_direction) is None
+    assert cache.stats["answer_hits"] == 1 and cache.stats["answer_misses"] == 2
+
+
+def test_answers_without_embedding_only_match_exactly():
+    cache = QueryCache()
+    cache.put_answer("N-400", None, "Application for Naturalization.", SOURCES)
+    assert cache.get_answer("n-400", same_direction) == "Application for Naturalization."
+    assert cache.get_answer("N-400 form", same_direction) is None
+    assert cache.get_answer("N-400 form") is None
+
+
+def test_retrieval_tier_is_exact():
+    cache = QueryCache(max_retrievals=1)
+    cache.put_retrieval("H-1B cap", ["a", "b"], SOURCES)
+    assert cache.get_retrieval("h-1b cap") == ["a", "b"]
+    cache.put_retrieval("N-400 fee", ["c"], SOURCES)
+    assert cache.get_retrieval("H-1B cap") is None
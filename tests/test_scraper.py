@@ -0,0 +1,44 @@
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import fitz
+
+from src import scraper
+from src.scraper import PDFScraper
+
+
+class BrokenPool:
+    """A process pool whose workers die after the first task."""
+
+    def __init__(self):
+        self.submitted = 0
+
+    def submit(self, func, *args):
+        future = Future()
+        if self.submitted == 0:
+            future.set_result(func(*args))
+        else:
+            future.set_exception(BrokenProcessPool("A process in the process pool was terminated abruptly"))
+        self.submitted += 1
+        return future
+
+
+def write_pdf(path, pages: int):
+    pdf = fitz.open()
+    for page_num in range(pages):
+        pdf.new_page().insert_text((72, 72), f"page {page_num + 1}")
+    pdf.save(path)
+    pdf.close()
+
+
+def test_broken_pool_falls_back_to_in_process_extraction(tmp_path, monkeypatch):
+    path = str(tmp_path / "form.pdf")
+    write_pdf(path, 10)
+    pool = BrokenPool()
+    monkeypatch.setattr(scraper, "_pdf_pool", pool)
+
+    texts = list(PDFScraper(pages_per_task=4)._extract_parallel(path, 10))
+
+    assert [text.strip() for text in texts] == [f"page {n}" for n in range(1, 11)]
+    # The broken pool is dropped so the next document gets a fresh one
+    assert scraper._pdf_pool is None
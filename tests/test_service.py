@@ -0,0 +1,71 @@
+import threading
+from urllib.error import HTTPError
+
+import pytest
+
+from src.errors import ConfigurationError
+from src.service import QueryService, QueryServiceClient
+
+
+class FakeEngine:
+    """QueryEngine stand-in whose streamed answer fails after `fail_after` pieces."""
+
+    def __init__(self, fail_after: int = None, error: Exception = None):
+        self.fail_after = fail_after
+        self.error = error
+
+    def stream_answer(self, query):
+        if self.fail_after == 0:
+            raise self.error
+        for i, piece in enumerate(["Form ", "I-130 ", "takes\nabout ", "a year."]):
+            if i == self.fail_after:
+                raise self.error
+            yield piece
+
+
+@pytest.fixture
+def serve():
+    services = []
+
+    def start(engine):
+        service = QueryService(engine=engine, port=0)
+        threading.Thread(target=service.serve_forever, daemon=True).start()
+        services.append(service)
+        return QueryServiceClient(service.url, timeout=5)
+
+    yield start
+    for service in services:
+        service.server.shutdown()
+
+
+def test_stream_answer_round_trip(serve):
+    client = serve(FakeEngine())
+
+    assert "".join(client.stream_answer("I-130")) == "Form I-130 takes\nabout a year."
+
+
+def test_stream_failure_after_headers_is_reported_in_band(serve):
+    client = serve(FakeEngine(fail_after=2, error=RuntimeError("model went away")))
+
+    pieces = []
+    with pytest.raises(RuntimeError, match="model went away"):
+        for piece in client.stream_answer("I-130"):
+            pieces.append(piece)
+    assert pieces == ["Form ", "I-130 "]
+    assert client.healthy()
+
+
+def test_missing_configuration_is_a_503(serve):
+    client = serve(FakeEngine(fail_after=0, error=ConfigurationError("GROQ_API_KEY environment variable not set.")))
+
+    with pytest.raises(HTTPError) as raised:
+        list(client.stream_answer("I-130"))
+    assert raised.value.code == 503
+
+
+def test_other_os_errors_are_a_500(serve):
+    client = serve(FakeEngine(fail_after=0, error=FileNotFoundError("chroma_db missing")))
+
+    with pytest.raises(HTTPError) as raised:
+        list(client.stream_answer("I-130"))
+    assert raised.value.code == 500
@@ -0,0 +1,59 @@
+import re
+
+import pytest
+
+from src.url_rules import URLFilter
+
+LEGACY_SUBSTRINGS = {
+    "/es", "https://www.uscis.gov/archive", "pashto", "dari", "korean",
+    "chinese", "spanish", "tagalog", "vietnamese", "amharic", "arabic",
+    "hindi", "creole", "farsi", "french", "polish", "punjabi", "russian",
+    "somali", "urdu", "portugese", "portuguese", "kor", "viet", "arab",
+    "nepali", "/contracts", "foia", "posters/", "outreach-engagements/",
+    "website-metrics/", "outreach/", "save/", "lesson-plans/", "memos/",
+    "presentations/", "notices/", "brochures/", "flash-cards/",
+    "injunctions/", "flyers/", "legal-docs/", "checklists/", "charts/",
+    "aao-decisions/", "outstanding-americans-by-choice/", "reports/", "tip-sheets",
+    "uscis-facilities-dedicated-to-the-memory-of-immigrant-medal-of-honor-recipients/",
+}
+LEGACY_EXTENSIONS = (".xlsx", ".mp3", ".mp4", ".doc", ".csv", ".docx", ".pptx")
+
+
+def legacy_is_valid(url: str) -> bool:
+    """The filter of batch/url_filter.py that URLFilter replaced."""
+    return not (url.lower().endswith(LEGACY_EXTENSIONS)
+                or any(sub in url.lower() for sub in LEGACY_SUBSTRINGS)
+                or any(1990 <= int(year) <= 2020 for year in re.findall(r"(\d{4})", url))
+                or re.search(r"FY(0[1-9]|20)", url))
+
+
+@pytest.mark.parametrize("url", [
+    "https://www.uscis.gov/green-card",
+    "https://www.uscis.gov/i-485",
+    "https://www.uscis.gov/x/notify10",
+    "https://www.uscis.gov/archive/old-page",
+    "https://www.uscis.gov/es/tarjeta-verde",
+    "https://www.uscis.gov/sites/default/files/document/reports/report.pdf",
+    "https://www.uscis.gov/news/2019/annual",
+    "https://www.uscis.gov/news/2024/annual",
+    "https://www.uscis.gov/data/FY05-approvals",
+    "https://www.uscis.gov/data/FY20-approvals",
+    "https://www.uscis.gov/data/FY24-approvals",
+    "https://www.uscis.gov/files/table.xlsx",
+    "https://www.uscis.gov/about-us/contracts/list",
+    "https://www.uscis.gov/tools/korean-resources",
+    "https://travel.state.gov/archive/visa-bulletin",
+    "https://travel.state.gov/content/travel/en/legal/visa-law0/visa-bulletin.html",
+])
+def test_matches_the_legacy_filter(url):
+    assert URLFilter().is_valid(url) == legacy_is_valid(url)
+
+
+@pytest.mark.parametrize("url, rule", [
+    # FY11 to FY19 were meant to be rejected but the legacy pattern missed them
+    ("https://www.uscis.gov/data/FY15-approvals", "fiscal_year"),
+    ("https://www.uscis.gov/data/fy05-approvals", "fiscal_year"),
+    ("https://www.uscis.gov/ARCHIVE/old", "url_prefix:https://www.uscis.gov/archive"),
+])
+def test_intended_differences_from_the_legacy_filter(url, rule):
+    assert URLFilter().rejection_rule(url) == rule
@@ -0,0 +1,71 @@
+import time
+
+import pytest
+
+from batch.url_tracker import URLTracker
+
+BASE_URL = "https://www.uscis.gov"
+
+
+def make_tracker(tmp_path, monkeypatch, known: set) -> URLTracker:
+    monkeypatch.chdir(tmp_path)
+    file_path = tmp_path / "news.txt"
+    file_path.write_text("".join(f"{url}\n" for url in sorted(known)))
+    return URLTracker(BASE_URL, [f"{BASE_URL}/newsroom/news-releases"], str(file_path), str(tmp_path / "new.txt"),
+                      follow_pagination=True)
+
+
+def test_crawl_stops_at_first_page_without_new_urls(tmp_path, monkeypatch):
+    known = {f"{BASE_URL}/newsroom/news-releases/item-{i}" for i in range(1, 200)}
+    tracker = make_tracker(tmp_path, monkeypatch, known)
+    fetched = []
+
+    def fetch_listing(url):
+        page = len(fetched)
+        fetched.append(url)
+        items = {f"{BASE_URL}/newsroom/news-releases/item-{page * 3 + i}" for i in range(3)}
+        return items, f"{BASE_URL}/newsroom/news-releases?page={page + 1}"
+
+    tracker.fetch_listing = fetch_listing
+    urls = tracker.crawl_listing(tracker.page_urls[0], time.monotonic() + 60)
+
+    # Page 1 holds the one new URL (item-0); page 2 holds only known URLs
+    assert len(fetched) == 2
+    assert f"{BASE_URL}/newsroom/news-releases/item-0" in urls
+
+
+def test_crawl_follows_pages_while_they_have_new_urls(tmp_path, monkeypatch):
+    tracker = make_tracker(tmp_path, monkeypatch, set())
+    fetched = []
+
+    def fetch_listing(url):
+        page = len(fetched)
+        fetched.append(url)
+        next_url = f"{BASE_URL}/newsroom/news-releases?page={page + 1}" if page < 4 else None
+        return {f"{BASE_URL}/newsroom/news-releases/item-{page}"}, next_url
+
+    tracker.fetch_listing = fetch_listing
+    assert len(tracker.crawl_listing(tracker.page_urls[0], time.monotonic() + 60)) == 5
+
+
+def test_failed_write_keeps_new_urls_for_the_next_run(tmp_path, monkeypatch):
+    tracker = make_tracker(tmp_path, monkeypatch, set())
+    new_url = f"{BASE_URL}/newsroom/news-releases/item-1"
+    listing_url = tracker.page_urls[0]
+
+    def fetch_listing(url):
+        tracker.pending_validators[url] = ('"v1"', None)
+        return {new_url}, None
+
+    tracker.fetch_listing = fetch_listing
+    tracker.new_file_path = str(tmp_path)  # a directory, so the append fails
+    with pytest.raises(OSError):
+        tracker.track_new_urls()
+    assert tracker.store.unknown({new_url}) == {new_url}
+    assert tracker.store.get_validators(listing_url) == {}
+
+    tracker.new_file_path = str(tmp_path / "new.txt")
+    tracker.track_new_urls()
+    assert (tmp_path / "new.txt").read_text() == f"{new_url}\n"
+    assert tracker.store.unknown({new_url}) == set()
+    assert tracker.store.get_validators(listing_url) == {"etag": '"v1"', "last_modified": None}